@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Add search_text column with trigram index to edugain_idp_data table."""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "1792371290"
+down_revision = "1764593266"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database."""
+    # stays NULL for existing rows until they're re-ingested or searched for
+    op.add_column(
+        "edugain_idp_data",
+        sa.Column("search_text", sa.Text(), nullable=True),
+    )
+    if op.get_context().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_edugain_idp_data_search_text_trgm",
+        "edugain_idp_data",
+        ["search_text"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"search_text": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database."""
+    # pg_trgm might be in use elsewhere, hence isn't dropped
+    op.drop_index(
+        "ix_edugain_idp_data_search_text_trgm",
+        table_name="edugain_idp_data",
+        postgresql_using="gin",
+    )
+    op.drop_column("edugain_idp_data", "search_text")
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Add discovery columns extracted from settings to edugain_idp_data table."""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "1792460311"
+down_revision = "1792371290"
+branch_labels = ()
+depends_on = None
+
+JSON_COLUMNS = [
+    "display_names",
+    "keywords",
+    "logos",
+    "organization_names",
+    "organization_urls",
+]
+
+
+def upgrade() -> None:
+    """Upgrade database."""
+    # stay NULL for existing rows until the next ingest or `manage` extracts them (the feed does in memory until then)
+    for column in JSON_COLUMNS:
+        op.add_column(
+            "edugain_idp_data",
+            sa.Column(
+                column,
+                sa.JSON().with_variant(postgresql.JSONB(), "postgresql"),
+                nullable=True,
+            ),
+        )
+    op.add_column(
+        "edugain_idp_data",
+        sa.Column("registration_authority", sa.String(), nullable=True),
+    )
+    op.create_index(
+        op.f("ix_edugain_idp_data_registration_authority"),
+        "edugain_idp_data",
+        ["registration_authority"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_edugain_idp_data_enabled_discoverable",
+        "edugain_idp_data",
+        ["enabled", "discoverable"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database."""
+    op.drop_index(
+        "ix_edugain_idp_data_enabled_discoverable",
+        table_name="edugain_idp_data",
+    )
+    op.drop_index(
+        op.f("ix_edugain_idp_data_registration_authority"),
+        table_name="edugain_idp_data",
+    )
+    op.drop_column("edugain_idp_data", "registration_authority")
+    for column in reversed(JSON_COLUMNS):
+        op.drop_column("edugain_idp_data", column)
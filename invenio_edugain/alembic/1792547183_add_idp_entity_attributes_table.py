@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Add edugain_idp_entity_attributes table, filled from ingested IdPs' settings."""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "1792547183"
+down_revision = "1792460311"
+branch_labels = ()
+depends_on = None
+
+ENTITY_ATTRIBUTES_CLASS = "urn:oasis:names:tc:SAML:metadata:attribute&EntityAttributes"
+ENTITY_CATEGORY_ATTRIBUTE = "http://macedir.org/entity-category"
+HIDE_FROM_DISCOVERY_CATEGORY = "http://refeds.org/category/hide-from-discovery"
+
+# as of this revision, independent of the current models
+idp_data = sa.table(
+    "edugain_idp_data",
+    sa.column("id", sa.String),
+    sa.column("discoverable", sa.Boolean),
+    sa.column("settings", sa.JSON),
+)
+
+
+def _entity_attributes(settings: dict) -> list[tuple[str, str]]:
+    pairs = {
+        (attribute["name"], value["text"]): None
+        for element in settings.get("extensions", {}).get("extension_elements", [])
+        if element.get("__class__") == ENTITY_ATTRIBUTES_CLASS
+        for attribute in element.get("attribute", [])
+        if "name" in attribute
+        for value in attribute.get("attribute_value", [])
+        if "text" in value
+    }
+    return list(pairs)
+
+
+def upgrade() -> None:
+    """Upgrade database."""
+    entity_attributes = op.create_table(
+        "edugain_idp_entity_attributes",
+        sa.Column("idp_id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["idp_id"],
+            ["edugain_idp_data.id"],
+            name=op.f("fk_edugain_idp_entity_attributes_idp_id_edugain_idp_data"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint(
+            "idp_id",
+            "name",
+            "value",
+            name=op.f("pk_edugain_idp_entity_attributes"),
+        ),
+    )
+    op.create_index(
+        "ix_edugain_idp_entity_attributes_name_value",
+        "edugain_idp_entity_attributes",
+        ["name", "value"],
+        unique=False,
+    )
+
+    rows = []
+    hidden_ids = []
+    for idp_id, settings in op.get_bind().execute(
+        sa.select(idp_data.c.id, idp_data.c.settings),
+    ):
+        attributes = _entity_attributes(settings or {})
+        rows.extend(
+            {"idp_id": idp_id, "name": name, "value": value}
+            for name, value in attributes
+        )
+        if (ENTITY_CATEGORY_ATTRIBUTE, HIDE_FROM_DISCOVERY_CATEGORY) in attributes:
+            hidden_ids.append(idp_id)
+    if rows:
+        op.bulk_insert(entity_attributes, rows)
+    if hidden_ids:
+        op.execute(
+            idp_data.update()
+            .where(idp_data.c.id.in_(hidden_ids))
+            .values(discoverable=False),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade database."""
+    op.drop_index(
+        "ix_edugain_idp_entity_attributes_name_value",
+        table_name="edugain_idp_entity_attributes",
+    )
+    op.drop_table("edugain_idp_entity_attributes")
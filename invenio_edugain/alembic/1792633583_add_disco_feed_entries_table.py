@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Add edugain_disco_feed_entries table, the revisioned change log of the disco feed."""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "1792633583"
+down_revision = "1792547183"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database."""
+    # stays empty until first recorded, on the next ingest/import/manage
+    op.create_table(
+        "edugain_disco_feed_entries",
+        sa.Column("entity_id", sa.String(), nullable=False),
+        sa.Column("revision", sa.Integer(), nullable=False),
+        sa.Column(
+            "entry",
+            sa.JSON().with_variant(postgresql.JSONB(), "postgresql"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint(
+            "entity_id",
+            name=op.f("pk_edugain_disco_feed_entries"),
+        ),
+    )
+    op.create_index(
+        op.f("ix_edugain_disco_feed_entries_revision"),
+        "edugain_disco_feed_entries",
+        ["revision"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database."""
+    op.drop_index(
+        op.f("ix_edugain_disco_feed_entries_revision"),
+        table_name="edugain_disco_feed_entries",
+    )
+    op.drop_table("edugain_disco_feed_entries")
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Add edugain_cached_logos table, where logos of the disco feed are stored locally."""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "1792719983"
+down_revision = "1792633583"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database."""
+    # stays empty unless `EDUGAIN_LOGO_CACHE_DIR` is configured
+    op.create_table(
+        "edugain_cached_logos",
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=True),
+        sa.Column("width", sa.Integer(), nullable=True),
+        sa.Column("height", sa.Integer(), nullable=True),
+        sa.Column("data_uri", sa.Text(), nullable=True),
+        sa.Column("fetched", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("url", name=op.f("pk_edugain_cached_logos")),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database."""
+    op.drop_table("edugain_cached_logos")
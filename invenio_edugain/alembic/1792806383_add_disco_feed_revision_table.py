@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Add edugain_disco_feed_revision table, the lock serializing recordings of disco feed changes."""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "1792806383"
+down_revision = "1792719983"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade() -> None:
+    """Upgrade database."""
+    op.create_table(
+        "edugain_disco_feed_revision",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("revision", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_edugain_disco_feed_revision")),
+    )
+    # continue from revisions recorded so far
+    op.execute(
+        "INSERT INTO edugain_disco_feed_revision (id, revision) "
+        "SELECT 1, COALESCE(MAX(revision), 0) FROM edugain_disco_feed_entries",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade database."""
+    op.drop_table("edugain_disco_feed_revision")
@@ -6,6 +6,69 @@
 import { IdPSelectUI } from "@js/shibboleth_eds/idpselect.js";
 import { IdPSelectUIParms } from "@js/shibboleth_eds/idpselect_config.js";
 
+// browser-cache of the feed as `{revision, feed}`, per URL (variants differ by language)
+const FEED_STORAGE_KEY = "invenio-edugain-discofeed";
+
+const readStoredFeed = (storageKey) => {
+  try {
+    const stored = JSON.parse(window.localStorage.getItem(storageKey));
+    const isValid = Number.isInteger(stored?.revision) && Array.isArray(stored?.feed);
+    return isValid ? stored : null;
+  } catch {
+    return null;
+  }
+};
+
+const storeFeed = (storageKey, revision, feed) => {
+  try {
+    window.localStorage.setItem(storageKey, JSON.stringify({ revision, feed }));
+  } catch {
+    // e.g. storage-quota exceeded, the whole feed is fetched again next time
+  }
+};
+
+// get feed by applying deltas since the stored revision to the stored feed
+const loadFeedViaDeltas = async (feedDeltasURL) => {
+  const storageKey = `${FEED_STORAGE_KEY}:${feedDeltasURL}`;
+  const stored = readStoredFeed(storageKey);
+  const url = new URL(feedDeltasURL, window.location.href);
+  if (stored) {
+    url.searchParams.set("since", stored.revision);
+  }
+  const response = await fetch(url, { credentials: "same-origin" });
+  if (!response.ok) {
+    throw new Error(`couldn't load feed deltas: ${response.status}`);
+  }
+  const deltas = await response.json();
+
+  let feed = deltas.feed;
+  if (!feed) {
+    const entriesByID = new Map(stored.feed.map((entry) => [entry.entityID, entry]));
+    deltas.removed.forEach((entityID) => entriesByID.delete(entityID));
+    deltas.changed.forEach((entry) => entriesByID.set(entry.entityID, entry));
+    feed = [...entriesByID.values()];
+  }
+  if (deltas.revision !== stored?.revision) {
+    storeFeed(storageKey, deltas.revision, feed);
+  }
+  return feed;
+};
+
+// get whole feed from `dataSource`, without blocking the page as shibboleth-eds does
+const loadFeed = async (dataSource) => {
+  const response = await fetch(dataSource, { credentials: "same-origin" });
+  if (!response.ok) {
+    throw new Error(`couldn't load feed: ${response.status}`);
+  }
+  return response.json();
+};
+
+// shibboleth-eds loads `dataSource` itself, hand it the feed as in-memory document
+const feedBlobURL = (feed) => {
+  const feedBlob = new Blob([JSON.stringify(feed)], { type: "application/json" });
+  return URL.createObjectURL(feedBlob);
+};
+
 const IdPSelectElement = document.getElementById("idpSelect");
 
 const backendEDSConfigText = IdPSelectElement?.dataset?.shibbolethEdsConfig || null;
@@ -13,4 +76,38 @@ const backendEDSConfig = backendEDSConfigText ? JSON.parse(backendEDSConfigText)
 const defaultEDSConfig = new IdPSelectUIParms();
 const mergedEDSConfig = { ...defaultEDSConfig, ...backendEDSConfig };
 
-new IdPSelectUI().draw(mergedEDSConfig);
+const drawEDS = (dataSource) => {
+  IdPSelectElement.replaceChildren();
+  new IdPSelectUI().draw({ ...mergedEDSConfig, dataSource });
+};
+
+// preferred and recently chosen IdPs, inlined s.t. their shortcuts show right away
+const preferredFeedText = IdPSelectElement?.dataset?.preferredFeed || null;
+const preferredFeed = preferredFeedText ? JSON.parse(preferredFeedText) : [];
+
+const feedDeltasURL = IdPSelectElement?.dataset?.feedDeltasUrl || null;
+if (IdPSelectElement && preferredFeed.length > 0) {
+  drawEDS(feedBlobURL(preferredFeed));
+  // then redraw with the whole feed once it's loaded in the background
+  const feedLoaded = feedDeltasURL
+    ? loadFeedViaDeltas(feedDeltasURL)
+    : loadFeed(mergedEDSConfig.dataSource);
+  feedLoaded
+    .then((feed) => drawEDS(feedBlobURL(feed)))
+    .catch((error) => {
+      console.warn(error);
+      drawEDS(mergedEDSConfig.dataSource);
+    });
+} else if (feedDeltasURL) {
+  loadFeedViaDeltas(feedDeltasURL)
+    .then((feed) => {
+      mergedEDSConfig.dataSource = feedBlobURL(feed);
+    })
+    .catch((error) => {
+      // fall back to loading the whole feed from `dataSource`
+      console.warn(error);
+    })
+    .finally(() => new IdPSelectUI().draw(mergedEDSConfig));
+} else {
+  new IdPSelectUI().draw(mergedEDSConfig);
+}
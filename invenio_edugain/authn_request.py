@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Fast path for sending AuthnRequests via HTTP-Redirect binding.
+
+pysaml2 loads the whole config (incl. every enabled IdP's settings from db),
+then builds and serializes the AuthnRequest anew on every click.
+This instead precomputes what only depends on the SP's config (host->ACS mapping, a client),
+caches each IdP's SSO location, and renders the AuthnRequest from a template
+that pysaml2 serialized once per IdP and ACS, with only ID and IssueInstant varying.
+Encoding (and potentially signing) is left to pysaml2, so output is byte-identical to pysaml2's.
+"""
+
+from time import monotonic
+from typing import Any
+from urllib.parse import urlsplit
+
+from invenio_db import db
+from saml2 import BINDING_HTTP_POST, BINDING_HTTP_REDIRECT
+from saml2.client import Saml2Client
+from saml2.client_base import IdpUnspecified
+from saml2.mdstore import InMemoryMetaData, locations
+from saml2.s_utils import sid
+from saml2.time_util import instant
+from sqlalchemy import true
+
+from .crypto import create_saml2_client, load_pysaml2_config
+from .models import IdPData
+from .revalidate import current_metadata_snapshot
+
+TEMPLATE_ID = "id-TEMPLATE"
+"""Placeholder for the AuthnRequest's ID when serializing templates."""
+
+
+def host_url_of(url: str) -> str:
+    """Get host-URL of `url` in the format of `flask.request.host_url`."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+class IdPSSOLocationCache:
+    """Cache of IdPs' SSO locations for HTTP-Redirect binding.
+
+    Locations are resolved from a single IdP's settings, rather than loading all IdPs' settings.
+    Entries expire after `ttl` seconds, s.t. ingests by other processes get picked up eventually.
+    """
+
+    def __init__(self) -> None:
+        """Init."""
+        # maps entity-id to (SSO location, monotonic time of expiry)
+        self._locations: dict[str, tuple[str, float]] = {}
+
+    def location(self, entity_id: str, ttl: float) -> str:
+        """Get SSO location of enabled IdP, raises `IdpUnspecified` (like pysaml2) for other IdPs."""
+        cached = self._locations.get(entity_id)
+        if cached is not None and cached[1] > monotonic():
+            return cached[0]
+
+        snapshot = current_metadata_snapshot()
+        if snapshot is not None:
+            settings = snapshot.settings_by_id.get(entity_id)
+        else:
+            settings = db.session.scalar(
+                db.select(IdPData.settings).where(
+                    IdPData.id == entity_id,
+                    IdPData.enabled == true(),
+                ),
+            )
+        location = None
+        if settings is not None:
+            # resolve the same way pysaml2's `Saml2Client._sso_location` does
+            metadata = InMemoryMetaData(None)
+            metadata.entity[entity_id] = settings
+            services = metadata.service(
+                entity_id,
+                "idpsso_descriptor",
+                "single_sign_on_service",
+                BINDING_HTTP_REDIRECT,
+            )
+            location = next(locations(services or []), None)
+        if location is None:
+            msg = f"IdP {entity_id!r} is unknown, disabled, or has no HTTP-Redirect SSO"
+            raise IdpUnspecified(msg)
+
+        self._locations[entity_id] = (location, monotonic() + ttl)
+        return location
+
+    def invalidate(self, entity_ids: list[str] | None = None) -> None:
+        """Drop cached locations of given IdPs, or of all IdPs if `None`."""
+        if entity_ids is None:
+            self._locations.clear()
+            return
+        for entity_id in entity_ids:
+            self._locations.pop(entity_id, None)
+
+
+idp_sso_location_cache = IdPSSOLocationCache()
+"""Module-level instance, s.t. its cache is shared between requests."""
+
+
+class AuthnRequestTemplates:
+    """Precomputed state for sending AuthnRequests of one SP config."""
+
+    def __init__(self, config_dict: dict[str, Any], nsprefix: dict[str, str]) -> None:
+        """Init, precomputing what only depends on the SP's config."""
+        self.config_dict = config_dict
+        self.nsprefix = nsprefix
+        # IdPs' settings are resolved per IdP instead, don't load them all
+        config = load_pysaml2_config(
+            {key: value for key, value in config_dict.items() if key != "metadata"},
+        )
+        self.client: Saml2Client = create_saml2_client(config)
+
+        # multiple ACS URLs may be configured (e.g. test-, prod-server)
+        # the first ACS URL under a host is the one for requests to that host
+        self.acs_url_by_host_url: dict[str, str] = {}
+        for url in self.client.service_urls() or []:
+            self.acs_url_by_host_url.setdefault(host_url_of(url), url)
+
+        # maps (destination, ACS URL) to serialized AuthnRequest, split around ID and IssueInstant
+        self._templates: dict[tuple[str, str], tuple[str, str, str]] = {}
+
+    def _template(self, destination: str, acs_url: str) -> tuple[str, str, str]:
+        template = self._templates.get((destination, acs_url))
+        if template is not None:
+            return template
+
+        # mirrors `Saml2Client.prepare_for_negotiated_authenticate` for HTTP-Redirect binding
+        _request_id, authn_request = self.client.create_authn_request(
+            destination=destination,
+            binding=BINDING_HTTP_POST,
+            message_id=TEMPLATE_ID,
+            sign=False,
+            nsprefix=self.nsprefix,
+            assertion_consumer_service_url=acs_url,
+        )
+        xml = str(authn_request)
+        head, rest = xml.split(f'ID="{TEMPLATE_ID}"')
+        middle, tail = rest.split(f'IssueInstant="{authn_request.issue_instant}"')
+
+        template = (head, middle, tail)
+        self._templates[(destination, acs_url)] = template
+        return template
+
+    def prepare_for_authenticate(
+        self,
+        entity_id: str,
+        relay_state: str,
+        acs_url: str,
+        *,
+        sso_location_ttl: float,
+        request_id: str | None = None,
+        issue_instant: str | None = None,
+    ) -> tuple[str, dict]:
+        """Prepare AuthnRequest, returns the same as `Saml2Client.prepare_for_authenticate`.
+
+        `request_id` and `issue_instant` default to newly generated ones.
+        """
+        destination = idp_sso_location_cache.location(entity_id, sso_location_ttl)
+        head, middle, tail = self._template(destination, acs_url)
+
+        request_id = request_id or sid()
+        issue_instant = issue_instant or instant()
+        xml = f'{head}ID="{request_id}"{middle}IssueInstant="{issue_instant}"{tail}'
+
+        http_args = self.client.apply_binding(
+            BINDING_HTTP_REDIRECT,
+            xml,
+            destination,
+            relay_state,
+        )
+        return request_id, http_args
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Timed scenarios of invenio-edugain's hot paths, run against the current db and config.
+
+Used by `invenio edugain benchmark`, s.t. releases and settings can be compared on one's own hardware and data.
+Scenarios that need an IdP use a throw-away IdP, whose key is generated on the fly.
+It's inserted into db within a savepoint that is rolled back afterwards,
+hence scenarios bypass the metadata snapshot and the read replica, which read in db-sessions of their own.
+pysaml2 and the modules relying on it are imported when running scenarios,
+as `invenio edugain`'s CLI imports this module on every call.
+"""
+
+import base64
+import math
+from collections.abc import Callable, Iterator
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Any
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from flask import Flask, current_app
+from invenio_db import db
+
+from . import views
+from .extraction import extract_missing_columns, extracted_columns, metadata_store
+from .models import IdPData
+
+BENCHMARK_IDP_ID = "https://benchmark.invenio-edugain.invalid/idp"
+"""Entity-id of the throw-away IdP (`.invalid` is reserved, s.t. it can't clash with real IdPs)."""
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """Latencies (in seconds) and throughput (per second) of one scenario."""
+
+    scenario: str
+    iterations: int
+    p50: float
+    p95: float
+    p99: float
+    throughput: float
+
+    def as_dict(self) -> dict[str, Any]:
+        """Get JSON-serializable representation."""
+        return asdict(self)
+
+
+def percentile(sorted_timings: list[float], fraction: float) -> float:
+    """Get percentile of `sorted_timings` by nearest-rank method."""
+    rank = max(math.ceil(fraction * len(sorted_timings)), 1)
+    return sorted_timings[rank - 1]
+
+
+def run_scenario(
+    scenario: str,
+    func: Callable[[], object],
+    *,
+    iterations: int,
+    warmup: int = 0,
+) -> BenchmarkResult:
+    """Call `func` `warmup` times untimed, then `iterations` times timed."""
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    for _ in range(iterations):
+        start = perf_counter()
+        func()
+        timings.append(perf_counter() - start)
+
+    timings.sort()
+    return BenchmarkResult(
+        scenario=scenario,
+        iterations=iterations,
+        p50=percentile(timings, 0.5),
+        p95=percentile(timings, 0.95),
+        p99=percentile(timings, 0.99),
+        throughput=iterations / sum(timings) if sum(timings) else math.inf,
+    )
+
+
+@dataclass(frozen=True)
+class BenchmarkIdP:
+    """Throw-away IdP, with its signing key on disk."""
+
+    entity_id: str
+    key_file: str
+    sso_location: str
+
+
+def _self_signed_cert(key: rsa.RSAPrivateKey, common_name: str) -> x509.Certificate:
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.now(UTC)
+    return (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+
+
+@contextmanager
+def benchmark_idp(directory: Path) -> Iterator[BenchmarkIdP]:
+    """Insert a throw-away, enabled IdP within a savepoint, roll back afterwards."""
+    from saml2 import BINDING_HTTP_REDIRECT  # noqa: PLC0415
+    from saml2.mdstore import InMemoryMetaData  # noqa: PLC0415
+
+    from .authn_request import idp_sso_location_cache  # noqa: PLC0415
+    from .certs import idp_certificate_cache  # noqa: PLC0415
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    key_file = directory / "benchmark-idp.key"
+    key_file.write_bytes(
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ),
+    )
+    cert_der = _self_signed_cert(key, "benchmark-idp").public_bytes(
+        serialization.Encoding.DER,
+    )
+    sso_location = f"{BENCHMARK_IDP_ID}/sso"
+    metadata_xml = f"""<md:EntityDescriptor
+    xmlns:md="urn:oasis:names:tc:SAML:2.0:metadata"
+    xmlns:ds="http://www.w3.org/2000/09/xmldsig#"
+    entityID="{BENCHMARK_IDP_ID}">
+<md:IDPSSODescriptor protocolSupportEnumeration="urn:oasis:names:tc:SAML:2.0:protocol">
+<md:KeyDescriptor use="signing">
+<ds:KeyInfo><ds:X509Data><ds:X509Certificate>{base64.b64encode(cert_der).decode()}</ds:X509Certificate></ds:X509Data></ds:KeyInfo>
+</md:KeyDescriptor>
+<md:SingleSignOnService Binding="{BINDING_HTTP_REDIRECT}" Location="{sso_location}"/>
+</md:IDPSSODescriptor>
+</md:EntityDescriptor>"""
+    metadata = InMemoryMetaData(None)
+    metadata.parse(metadata_xml)
+    idp = IdPData(
+        id=BENCHMARK_IDP_ID,
+        discoverable=False,
+        enabled=True,
+        settings=metadata.entity[BENCHMARK_IDP_ID],
+    )
+    for column, value in extracted_columns(metadata_store([idp]), idp.id).items():
+        setattr(idp, column, value)
+
+    # scenarios mustn't commit, lest they'd commit the throw-away IdP
+    if extract_missing_columns():
+        db.session.commit()
+
+    savepoint = db.session.begin_nested()
+    try:
+        db.session.add(idp)
+        db.session.flush()
+        yield BenchmarkIdP(
+            entity_id=BENCHMARK_IDP_ID,
+            key_file=str(key_file),
+            sso_location=sso_location,
+        )
+    finally:
+        savepoint.rollback()
+        idp_certificate_cache.invalidate([BENCHMARK_IDP_ID])
+        idp_sso_location_cache.invalidate([BENCHMARK_IDP_ID])
+
+
+@contextmanager
+def _overridden_config(app: Flask, overrides: dict[str, Any]) -> Iterator[None]:
+    """Override `app`'s config while in context, restore it afterwards."""
+    previous = {key: app.config[key] for key in overrides}
+    app.config.update(overrides)
+    try:
+        yield
+    finally:
+        app.config.update(previous)
+
+
+def signed_saml_response(
+    idp: BenchmarkIdP,
+    *,
+    sp_entity_id: str,
+    acs_url: str,
+    valid_for: timedelta,
+) -> str:
+    """Build a signed, base64-encoded SAML response, as the IdP would POST to the ACS."""
+    from saml2 import saml, samlp  # noqa: PLC0415
+    from saml2.s_utils import sid  # noqa: PLC0415
+    from saml2.saml import (  # noqa: PLC0415
+        NAME_FORMAT_URI,
+        NAMEID_FORMAT_TRANSIENT,
+        SCM_BEARER,
+    )
+    from saml2.sigver import pre_signature_part  # noqa: PLC0415
+    from saml2.time_util import TIME_FORMAT  # noqa: PLC0415
+    from saml2.xmldsig import DIGEST_SHA256, SIG_RSA_SHA256  # noqa: PLC0415
+
+    from .crypto import in_process_crypto_backend  # noqa: PLC0415
+    from .utils import NS_PREFIX  # noqa: PLC0415
+
+    now = datetime.now(UTC)
+    issue_instant = now.strftime(TIME_FORMAT)
+    not_on_or_after = (now + valid_for).strftime(TIME_FORMAT)
+    attributes = {
+        "urn:oid:1.3.6.1.4.1.5923.1.1.1.6": "benchmark@benchmark.invalid",  # eduPersonPrincipalName
+        "urn:oid:0.9.2342.19200300.100.1.3": "benchmark@benchmark.invalid",  # mail
+        "urn:oid:2.16.840.1.113730.3.1.241": "Bench Mark",  # displayName
+        "urn:oid:2.5.4.42": "Bench",  # givenName
+        "urn:oid:2.5.4.4": "Mark",  # sn
+    }
+
+    assertion = saml.Assertion(
+        id=sid(),
+        version="2.0",
+        issue_instant=issue_instant,
+        issuer=saml.Issuer(text=idp.entity_id, format=saml.NAMEID_FORMAT_ENTITY),
+        subject=saml.Subject(
+            name_id=saml.NameID(format=NAMEID_FORMAT_TRANSIENT, text=sid()),
+            subject_confirmation=[
+                saml.SubjectConfirmation(
+                    method=SCM_BEARER,
+                    subject_confirmation_data=saml.SubjectConfirmationData(
+                        recipient=acs_url,
+                        not_on_or_after=not_on_or_after,
+                    ),
+                ),
+            ],
+        ),
+        conditions=saml.Conditions(
+            not_before=issue_instant,
+            not_on_or_after=not_on_or_after,
+            audience_restriction=[
+                saml.AudienceRestriction(audience=[saml.Audience(text=sp_entity_id)]),
+            ],
+        ),
+        authn_statement=[
+            saml.AuthnStatement(
+                authn_instant=issue_instant,
+                session_index=sid(),
+                authn_context=saml.AuthnContext(
+                    authn_context_class_ref=saml.AuthnContextClassRef(
+                        text=saml.AUTHN_PASSWORD_PROTECTED,
+                    ),
+                ),
+            ),
+        ],
+        attribute_statement=[
+            saml.AttributeStatement(
+                attribute=[
+                    saml.Attribute(
+                        name=name,
+                        name_format=NAME_FORMAT_URI,
+                        attribute_value=[saml.AttributeValue(text=value)],
+                    )
+                    for name, value in attributes.items()
+                ],
+            ),
+        ],
+    )
+    response = samlp.Response(
+        id=sid(),
+        version="2.0",
+        issue_instant=issue_instant,
+        destination=acs_url,
+        issuer=saml.Issuer(text=idp.entity_id, format=saml.NAMEID_FORMAT_ENTITY),
+        status=samlp.Status(status_code=samlp.StatusCode(value=samlp.STATUS_SUCCESS)),
+        assertion=[assertion],
+    )
+    response.signature = pre_signature_part(
+        response.id,
+        sign_alg=SIG_RSA_SHA256,
+        digest_alg=DIGEST_SHA256,
+    )
+    signed = in_process_crypto_backend.sign_statement(
+        response.to_string(NS_PREFIX),
+        f"{samlp.Response.c_namespace}:{samlp.Response.c_tag}",
+        idp.key_file,
+        response.id,
+    )
+    return base64.b64encode(signed.encode("utf-8")).decode("ascii")
+
+
+SCENARIOS = (
+    "sp-config-load",
+    "metadata-load",
+    "disco-feed",
+    "sp-xml",
+    "authn-request",
+    "parse-response",
+)
+"""Names of available scenarios, in the order they're run."""
+
+
+def run_benchmarks(
+    scenarios: list[str],
+    *,
+    iterations: int,
+    warmup: int,
+) -> list[BenchmarkResult]:
+    """Run given `scenarios` against current app's db and config. Needs an app-context."""
+    from .authn_request import AuthnRequestTemplates  # noqa: PLC0415
+    from .crypto import load_pysaml2_config  # noqa: PLC0415
+    from .sp_metadata import render_sp_metadata  # noqa: PLC0415
+    from .utils import NS_PREFIX, AuthnInfo, MetaDataFlaskSQL  # noqa: PLC0415
+
+    app = current_app._get_current_object()  # noqa: SLF001
+    config_dict = app.config["EDUGAIN_PYSAML2_CONFIG"]
+    if not isinstance(config_dict, dict):
+        msg = "EDUGAIN_PYSAML2_CONFIG isn't set up, see its documentation"
+        raise TypeError(msg)
+
+    sp_config = load_pysaml2_config(
+        {key: value for key, value in config_dict.items() if key != "metadata"},
+    )
+    acs_url = sp_config.getattr("endpoints", "sp")["assertion_consumer_service"][0][0]
+    templates = AuthnRequestTemplates(config_dict, NS_PREFIX)
+    host_url = next(iter(templates.acs_url_by_host_url))
+
+    results = []
+    with ExitStack() as stack:
+        # neither could see the throw-away IdP, see `invenio_edugain.revalidate`, `invenio_edugain.replica`
+        stack.enter_context(
+            _overridden_config(
+                app,
+                {
+                    "EDUGAIN_METADATA_SNAPSHOT_TTL": None,
+                    "EDUGAIN_READ_REPLICA_BIND": None,
+                },
+            ),
+        )
+        idp = stack.enter_context(
+            benchmark_idp(Path(stack.enter_context(TemporaryDirectory()))),
+        )
+        saml_response = signed_saml_response(
+            idp,
+            sp_entity_id=sp_config.entityid,
+            acs_url=acs_url,
+            valid_for=timedelta(hours=1),
+        )
+
+        def disco_feed() -> object:
+            with app.test_request_context():
+                return views.disco_feed()
+
+        def authn_request() -> object:
+            with app.test_request_context(
+                "/",
+                base_url=host_url,
+                query_string={"entityID": idp.entity_id, "next": "/"},
+            ):
+                return views.authn_request()
+
+        funcs: dict[str, Callable[[], object]] = {
+            "sp-config-load": lambda: load_pysaml2_config(config_dict),
+            "metadata-load": lambda: MetaDataFlaskSQL(None, "benchmark").load(),
+            "disco-feed": disco_feed,
+            "sp-xml": lambda: render_sp_metadata(
+                config_dict,
+                valid_for=app.config["EDUGAIN_SP_METADATA_VALID_FOR"],
+                cache_duration=app.config["EDUGAIN_SP_METADATA_CACHE_DURATION"],
+                sign=app.config["EDUGAIN_SP_METADATA_SIGNED"],
+            ),
+            "authn-request": authn_request,
+            "parse-response": lambda: AuthnInfo.from_saml_response(saml_response),
+        }
+        results.extend(
+            run_scenario(
+                scenario,
+                funcs[scenario],
+                iterations=iterations,
+                warmup=warmup,
+            )
+            for scenario in SCENARIOS
+            if scenario in scenarios
+        )
+
+    return results
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Post-login bookkeeping for invenio-edugain.
+
+After a login, some non-critical data is written to db:
+login-tracking (if `SECURITY_TRACKABLE`), profile-refresh from IdP-sent attributes
+(if `EDUGAIN_REFRESH_PROFILE_ON_LOGIN`), and linking of additional id-methods sent by the IdP.
+This can either happen on the request-path,
+or be queued and written in batches by the `process_login_bookkeeping` celery-task.
+"""
+
+from datetime import datetime
+from typing import TypedDict
+
+from flask import current_app
+from flask_security.utils import config_value
+from invenio_accounts.models import User, UserIdentity
+from invenio_db import db
+from invenio_queues.proxies import current_queues
+from kombu import Exchange
+from sqlalchemy import tuple_
+
+LOGIN_BOOKKEEPING_QUEUE = "edugain-login-bookkeeping"
+"""Name of the queue that login-records are published to in deferred mode."""
+
+
+def declare_queues() -> list[dict]:
+    """Declare queues for invenio-queues."""
+    return [
+        {
+            "name": LOGIN_BOOKKEEPING_QUEUE,
+            "exchange": Exchange("edugain", type="direct"),
+        },
+    ]
+
+
+class LoginRecord(TypedDict):
+    """JSON-serializable record of a login, holding what's written after the fact."""
+
+    user_id: int
+    login_at: str  # ISO-formatted datetime, in UTC
+    remote_addr: str | None
+    full_name: str  # potentially empty string
+    affiliations: list[str]
+    identities: list[tuple[str, str]]  # (method, external id)
+
+
+def queue_login_records(records: list[LoginRecord]) -> None:
+    """Publish login-records, for `process_login_bookkeeping` to write them in batches."""
+    current_queues.queues[LOGIN_BOOKKEEPING_QUEUE].publish(records)
+
+
+def apply_login_records(records: list[LoginRecord]) -> None:
+    """Apply login-records to db-session, without committing.
+
+    Records are applied in order of login-time, s.t. any batch of records
+    leaves the same state as applying them one-by-one on login would.
+    """
+    if not records:
+        return
+    records = sorted(records, key=lambda record: record["login_at"])
+    user_ids = {record["user_id"] for record in records}
+    users: dict[int, User] = {
+        user.id: user
+        for user in db.session.scalars(db.select(User).where(User.id.in_(user_ids)))
+    }
+    _link_identities(records, users)
+
+    trackable = config_value("TRACKABLE")
+    refresh_profile = current_app.config["EDUGAIN_REFRESH_PROFILE_ON_LOGIN"]
+    for record in records:
+        user = users.get(record["user_id"])
+        if user is None:
+            # user was deleted since login
+            continue
+
+        if trackable:
+            # mirrors flask_security.utils:login_user
+            login_at = datetime.fromisoformat(record["login_at"])
+            user.last_login_at = user.current_login_at or login_at
+            user.current_login_at = login_at
+            user.last_login_ip = user.current_login_ip
+            user.current_login_ip = record["remote_addr"]
+            user.login_count = (user.login_count or 0) + 1
+
+        if refresh_profile:
+            _refresh_profile(user, record)
+
+
+def _refresh_profile(user: User, record: LoginRecord) -> None:
+    """Overwrite user's full name and affiliations with those their IdP sent, where sent."""
+    profile_update = {}
+    if record["full_name"]:
+        profile_update["full_name"] = record["full_name"]
+    if record["affiliations"]:
+        profile_update["affiliations"] = ";".join(record["affiliations"])
+    profile = dict(user.user_profile or {})
+    if any(profile.get(key) != value for key, value in profile_update.items()):
+        user.user_profile = {**profile, **profile_update}
+
+
+def _link_identities(records: list[LoginRecord], users: dict[int, User]) -> None:
+    """Link not-yet-linked identities, unless the user has another id of that method."""
+    wanted = {
+        (external_id, method): record["user_id"]
+        for record in records
+        if record["user_id"] in users
+        for method, external_id in record["identities"]
+    }
+    if not wanted:
+        return
+
+    existing = db.session.scalars(
+        db.select(UserIdentity).where(
+            tuple_(UserIdentity.id, UserIdentity.method).in_(wanted)
+            | UserIdentity.id_user.in_(set(wanted.values())),
+        ),
+    ).all()
+    linked_ids = {(identity.id, identity.method) for identity in existing}
+    linked_methods = {(identity.id_user, identity.method) for identity in existing}
+    for (external_id, method), user_id in wanted.items():
+        if (external_id, method) in linked_ids or (user_id, method) in linked_methods:
+            continue
+        db.session.add(
+            UserIdentity(id=external_id, method=method, user=users[user_id]),
+        )
+        linked_methods.add((user_id, method))
+
+
+def process_queued_login_records(batch_size: int) -> int:
+    """Consume queued login-records, committing once per batch. Returns number of records."""
+    count = 0
+    batch: list[LoginRecord] = []
+    for record in current_queues.queues[LOGIN_BOOKKEEPING_QUEUE].consume():
+        batch.append(record)
+        if len(batch) >= batch_size:
+            apply_login_records(batch)
+            db.session.commit()
+            count += len(batch)
+            batch = []
+    if batch:
+        apply_login_records(batch)
+        db.session.commit()
+        count += len(batch)
+
+    return count
@@ -5,20 +5,52 @@
 # invenio-edugain is free software; you can redistribute it and/or modify it
 # under the terms of the MIT License; see LICENSE file for more details.
 
-"""Utils to build configurations for use with pysaml2 and shibboleth-eds."""
-
-from .pysaml2 import build_pysaml2_config
-from .pysaml2_core import (
-    Pysaml2ConfigCore,
-    Pysaml2ConfigCoreContacts,
-    Pysaml2ConfigCoreCryptographicCredentials,
-    Pysaml2ConfigCoreEntityCategories,
-    Pysaml2ConfigCoreOrganization,
-    Pysaml2ConfigCoreProvidedService,
-    Pysaml2ConfigCoreUIInfo,
-)
-from .shibboleth import build_shibboleth_eds_config
-from .utils import UninitializedConfig
+"""Utils to build configurations for use with pysaml2 and shibboleth-eds.
+
+Names are imported from their submodules on first access,
+s.t. importing e.g. `build_config.utils` doesn't import pysaml2.
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .pysaml2 import build_pysaml2_config
+    from .pysaml2_core import (
+        Pysaml2ConfigCore,
+        Pysaml2ConfigCoreContacts,
+        Pysaml2ConfigCoreCryptographicCredentials,
+        Pysaml2ConfigCoreEntityCategories,
+        Pysaml2ConfigCoreOrganization,
+        Pysaml2ConfigCoreProvidedService,
+        Pysaml2ConfigCoreUIInfo,
+    )
+    from .shibboleth import build_shibboleth_eds_config
+    from .utils import UninitializedConfig
+
+_SUBMODULE_BY_NAME = {
+    "Pysaml2ConfigCore": ".pysaml2_core",
+    "Pysaml2ConfigCoreContacts": ".pysaml2_core",
+    "Pysaml2ConfigCoreCryptographicCredentials": ".pysaml2_core",
+    "Pysaml2ConfigCoreEntityCategories": ".pysaml2_core",
+    "Pysaml2ConfigCoreOrganization": ".pysaml2_core",
+    "Pysaml2ConfigCoreProvidedService": ".pysaml2_core",
+    "Pysaml2ConfigCoreUIInfo": ".pysaml2_core",
+    "UninitializedConfig": ".utils",
+    "build_pysaml2_config": ".pysaml2",
+    "build_shibboleth_eds_config": ".shibboleth",
+}
+
+
+def __getattr__(name: str) -> Any:  # noqa: ANN401
+    """Import `name` from its submodule on first access."""
+    if name not in _SUBMODULE_BY_NAME:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(import_module(_SUBMODULE_BY_NAME[name], __name__), name)
+    globals()[name] = value
+    return value
+
 
 __all__ = (
     "Pysaml2ConfigCore",
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""On-disk cache of automatically built configurations.
+
+Building the pysaml2 config validates emails, checks file-paths, builds URLs,
+and searches for an `xmlsec1` binary - in every web-worker, celery-worker, and CLI-call.
+Built configurations are hence cached on disk, keyed by a hash of everything they're built from.
+
+This module must stay cheap to import, as it's used before deciding whether pysaml2 is needed at all.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING, Any
+
+from flask import Flask
+
+from .. import __version__
+from ..sentinels import NOT_CONFIGURED
+
+if TYPE_CHECKING:
+    from .pysaml2 import JSONplusTuples
+
+# bump when the cache-file's format changes
+CACHE_FORMAT_VERSION = 1
+
+# config-vars the built configurations are computed from
+RELEVANT_CONFIG_KEYS = (
+    "APPLICATION_ROOT",
+    "EDUGAIN_CONTACT_SECURITY_EMAIL",
+    "EDUGAIN_CONTACT_SECURITY_GIVEN_NAME",
+    "EDUGAIN_CONTACT_SECURITY_SUR_NAME",
+    "EDUGAIN_CONTACT_SUPPORT_EMAIL",
+    "EDUGAIN_CONTACT_SUPPORT_GIVEN_NAME",
+    "EDUGAIN_CONTACT_SUPPORT_SUR_NAME",
+    "EDUGAIN_CRYPTO_BACKEND",
+    "EDUGAIN_ENCRYPTION_CERT",
+    "EDUGAIN_ENCRYPTION_KEY",
+    "EDUGAIN_FEED_EXPORT_DIR",
+    "EDUGAIN_FEED_EXPORT_URL",
+    "EDUGAIN_GEANT_COC_COMPLIANT",
+    "EDUGAIN_MAIN_SERVER_DOMAIN",
+    "EDUGAIN_ORG_DISPLAYNAMES_BY_LANG",
+    "EDUGAIN_ORG_NAMES_BY_LANG",
+    "EDUGAIN_ORG_URLS_BY_LANG",
+    "EDUGAIN_OTHER_SERVER_DOMAINS",
+    "EDUGAIN_REFEDS_COMPLIANT",
+    "EDUGAIN_SERVICE_DESCRIPTION_EN",
+    "EDUGAIN_SERVICE_NAME_EN",
+    "EDUGAIN_SHIBBOLETH_EDS_CONFIG_KWARGS",
+    "EDUGAIN_SIGNING_CERT",
+    "EDUGAIN_SIGNING_KEY",
+    "EDUGAIN_UIINFO_DESCRIPTIONS_BY_LANG",
+    "EDUGAIN_UIINFO_DISPLAYNAMES_BY_LANG",
+    "EDUGAIN_UIINFO_INFO_URLS_BY_LANG",
+    "EDUGAIN_UIINFO_LOGOS",
+    "EDUGAIN_UIINFO_PRIVACY_URLS_BY_LANG",
+    "PREFERRED_URL_SCHEME",
+    "SERVER_NAME",
+    "SITE_API_URL",
+    "SITE_UI_URL",
+)
+
+# config-vars holding paths of files whose content ends up in the built configurations
+CREDENTIAL_CONFIG_KEYS = (
+    "EDUGAIN_ENCRYPTION_CERT",
+    "EDUGAIN_ENCRYPTION_KEY",
+    "EDUGAIN_SIGNING_CERT",
+    "EDUGAIN_SIGNING_KEY",
+)
+
+# endpoints whose URLs end up in the built configurations
+URL_ENDPOINTS = (
+    "invenio_edugain.acs",
+    "invenio_edugain.authn_request",
+    "invenio_edugain.disco_feed",
+    "invenio_edugain.sp_xml",
+)
+
+# JSON has no tuples, but pysaml2 configs need them
+TUPLE_TAG = "__tuple__"
+
+
+def tag_tuples(value: "JSONplusTuples") -> Any:  # noqa: ANN401
+    """Convert tuples within `value` to JSON objects tagged as tuples."""
+    if isinstance(value, tuple):
+        return {TUPLE_TAG: [tag_tuples(item) for item in value]}
+    if isinstance(value, list):
+        return [tag_tuples(item) for item in value]
+    if isinstance(value, dict):
+        return {key: tag_tuples(item) for key, item in value.items()}
+    return value
+
+
+def untag_tuples(obj: dict[str, Any]) -> Any:  # noqa: ANN401
+    """Convert JSON objects tagged as tuples back to tuples, for use as `object_hook`."""
+    if obj.keys() == {TUPLE_TAG}:
+        return tuple(obj[TUPLE_TAG])
+    return obj
+
+
+def file_mtime(filepath: object) -> int | None:
+    """Get mtime [ns] of file at `filepath`, `None` if there is none."""
+    if not isinstance(filepath, str | os.PathLike):
+        return None
+    try:
+        return Path(filepath).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def cache_key(app: Flask) -> str:
+    """Hash everything the automatically built configurations are computed from."""
+    key_data = {
+        "format": CACHE_FORMAT_VERSION,
+        "version": __version__,
+        "config": {key: app.config.get(key) for key in RELEVANT_CONFIG_KEYS},
+        "mtimes": {
+            key: file_mtime(app.config.get(key)) for key in CREDENTIAL_CONFIG_KEYS
+        },
+        "rules": {
+            endpoint: sorted(str(rule) for rule in app.url_map.iter_rules(endpoint))
+            for endpoint in URL_ENDPOINTS
+            if endpoint in app.view_functions
+        },
+    }
+    serialized = json.dumps(key_data, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class ConfigCache:
+    """File holding automatically built configurations of an app, by config-var name."""
+
+    def __init__(self, directory: Path, key: str) -> None:
+        """Init."""
+        self.path = directory / f"{key}.json"
+
+    @classmethod
+    def for_app(cls, app: Flask) -> "ConfigCache | None":
+        """Get cache for `app`'s current configuration, `None` when caching is turned off."""
+        directory = app.config.get("EDUGAIN_CONFIG_CACHE_DIR", NOT_CONFIGURED)
+        if directory is None:
+            return None
+        if directory is NOT_CONFIGURED:
+            directory = Path(app.instance_path) / "edugain-config-cache"
+        return cls(Path(directory), cache_key(app))
+
+    def load(self) -> dict[str, "JSONplusTuples"]:
+        """Load cached configurations, empty if there are none (yet)."""
+        try:
+            with self.path.open(encoding="utf-8") as file:
+                configs = json.load(file, object_hook=untag_tuples)
+        except (OSError, ValueError):
+            return {}
+
+        # the xmlsec1-binary found on building might since have been removed
+        pysaml2_config = configs.get("EDUGAIN_PYSAML2_CONFIG", {})
+        xmlsec_binary = pysaml2_config.get("xmlsec_binary")
+        if xmlsec_binary is not None and not Path(xmlsec_binary).is_file():
+            configs.pop("EDUGAIN_PYSAML2_CONFIG")
+        return configs
+
+    def store(self, configs: dict[str, "JSONplusTuples"]) -> None:
+        """Store configurations, replacing the cache-file atomically.
+
+        Raises `OSError` if the cache-directory isn't writable,
+        `TypeError` if configurations aren't JSON-serializable (e.g. due to objects in kwargs).
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=self.path.parent,
+            prefix=".tmp-",
+            suffix=".json",
+            delete=False,
+        ) as file:
+            try:
+                json.dump(tag_tuples(configs), file)
+            except BaseException:
+                Path(file.name).unlink()
+                raise
+        Path(file.name).replace(self.path)
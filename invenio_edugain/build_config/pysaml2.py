@@ -15,6 +15,7 @@ from saml2.saml import NAME_FORMAT_URI
 from saml2.sigver import get_xmlsec_binary
 from saml2.xmldsig import DIGEST_SHA256, SIG_RSA_SHA256
 
+from ..crypto import IN_PROCESS_CRYPTO_BACKEND
 from .pysaml2_core import Pysaml2ConfigCore
 from .utils import url_for_server
 
@@ -36,8 +37,13 @@ The inclusion of tuples was considered different enough to introduce this new ty
 def build_pysaml2_config(
     app: Flask,
     config_core: Pysaml2ConfigCore,
+    *,
+    crypto_backend: str = "xmlsec1",
 ) -> dict[str, JSONplusTuples]:
-    """Build configuration for use with pysaml2."""
+    """Build configuration for use with pysaml2.
+
+    `crypto_backend` is either `"xmlsec1"` (pysaml2's default) or `"in-process"` (see `invenio_edugain.crypto`).
+    """
     # contacts
     contacts: list[JSONplusTuples] = [
         {
@@ -82,6 +88,19 @@ def build_pysaml2_config(
         (url, lang_code) for lang_code, url in config_core.org.urls_by_lang.items()
     ]
 
+    # crypto backend
+    crypto: dict[str, JSONplusTuples]
+    if crypto_backend == IN_PROCESS_CRYPTO_BACKEND:
+        # no need to search for an xmlsec1 binary that won't be used
+        crypto = {"crypto_backend": IN_PROCESS_CRYPTO_BACKEND}
+    elif crypto_backend == "xmlsec1":
+        crypto = {
+            "xmlsec_binary": get_xmlsec_binary(["/opt/local/bin", "/usr/local/bin"]),
+        }
+    else:
+        msg = f'unknown crypto backend {crypto_backend!r}, choose "xmlsec1" or "{IN_PROCESS_CRYPTO_BACKEND}"'
+        raise ValueError(msg)
+
     return {
         "accepted_time_diff": 4
         * 60,  # IdPs' clock may drift from our server's clock by this many seconds, default-value as per saml2int [SDP-G01]
@@ -128,7 +147,7 @@ def build_pysaml2_config(
                 "cert_file": str(config_core.credentials.encryption_cert_filepath),
             },
         ],
-        "xmlsec_binary": get_xmlsec_binary(["/opt/local/bin", "/usr/local/bin"]),
+        **crypto,
     }
 
 
@@ -12,7 +12,7 @@ from collections.abc import Mapping
 from dataclasses import Field, InitVar, dataclass, field, fields
 from typing import Any, get_origin
 
-from ..utils import ABSENT
+from ..sentinels import ABSENT
 from .utils import (
     JSON,
     EdugainConfigCoreExceptionGroup,
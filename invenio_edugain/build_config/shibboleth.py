@@ -91,12 +91,17 @@ def build_shibboleth_eds_config(
         redirect_allow.append(f"^{escaped_name}$")
         redirect_allow.append(f"^{escaped_name}/.*$")
 
+    # imported here, as config imports this module before the db is set up
+    from ..feed import exported_feed_url  # noqa: PLC0415
+
+    # prefer feed exported to static files, s.t. feed traffic never reaches the app
+    data_source = exported_feed_url(app) or url_for_server(
+        app,
+        server_name=None,  # construct relative URL, e.g. "/saml/discofeed"
+        endpoint="invenio_edugain.disco_feed",
+    )
     res = {
-        "dataSource": url_for_server(
-            app,
-            server_name=None,  # construct relative URL, e.g. "/saml/discofeed"
-            endpoint="invenio_edugain.disco_feed",
-        ),
+        "dataSource": data_source,
         # logo defaults are as per shibboleth's suggestion
         # see https://shibboleth.atlassian.net/wiki/spaces/EDS10/pages/2383446048/3.2+EDS+Configuration+Options#defaultLogo
         "defaultLogo": "/static/icons/transparent-80x60.png",
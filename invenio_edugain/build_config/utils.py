@@ -17,7 +17,7 @@ from flask import Flask
 from flask.app import BuildError
 from uritools import uricompose, urisplit
 
-from ..utils import ABSENT
+from ..sentinels import ABSENT
 
 type JSON = str | int | float | bool | None | dict[str, JSON] | list[JSON]
 
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Cache of IdPs' parsed certificates.
+
+To check a SAML response's signature, pysaml2 re-extracts the issuing IdP's certificates
+from its settings on every login, and writes each of them to a new temporary file.
+The cache in here instead parses each certificate once and writes it to a file once.
+pysaml2 asks its metadata-store for certificates, never the store's sources,
+hence `CertCachingMetadataStore` hands that over to the sources (see `MetaDataFlaskSQL.certs`).
+"""
+
+import base64
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Lock
+from typing import Self
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from flask import current_app
+from saml2.mdstore import InMemoryMetaData, MetadataStore
+
+
+def settings_digest(settings: dict) -> str:
+    """Digest of (pysaml2-internal) idp-settings, independent of key order."""
+    dumped = json.dumps(settings, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(dumped.encode()).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedCertificate:
+    """Parsed certificate of an IdP.
+
+    pysaml2 hands certificates that aren't `str` to its crypto backend by their `.name`,
+    hence `name` is the path of a PEM-file containing the certificate.
+    """
+
+    key_name: str | None
+    certificate: x509.Certificate
+    fingerprint_sha256: str  # colon-separated hex, as `OpenSSL.crypto.X509.digest`
+    name: str
+
+    @property
+    def not_valid_after(self) -> datetime:
+        """Expiry date of certificate."""
+        return self.certificate.not_valid_after_utc
+
+
+@dataclass(frozen=True)
+class _CacheEntry:
+    settings_digest: str
+    certs_by_usage: dict[tuple[str, str], list[CachedCertificate]]
+
+
+class IdPCertificateCache:
+    """Parsed certificates of IdPs, keyed by (entityID, digest of settings).
+
+    Populated lazily on first use of an IdP's certificates.
+    As the digest of settings is part of the key, re-ingested settings are never served stale,
+    even when ingest ran in another process.
+    `invalidate` additionally frees entries of re-ingested IdPs right away.
+    """
+
+    def __init__(self) -> None:
+        """Init."""
+        self._entries: dict[str, _CacheEntry] = {}
+        self._lock = Lock()
+        self._pem_dir: TemporaryDirectory | None = None
+
+    def certs(
+        self,
+        entity_id: str,
+        settings: dict,
+        descriptor: str = "any",
+        use: str = "signing",
+    ) -> list[CachedCertificate]:
+        """Get (cached) certificates of IdP `entity_id` with given `settings`.
+
+        Arguments `descriptor` and `use` select certificates as in pysaml2's `MetaData.certs`.
+        """
+        digest = settings_digest(settings)
+        entry = self._entries.get(entity_id)
+        if entry is None or entry.settings_digest != digest:
+            entry = _CacheEntry(settings_digest=digest, certs_by_usage={})
+            with self._lock:
+                self._entries[entity_id] = entry
+
+        usage = (descriptor, use)
+        if usage not in entry.certs_by_usage:
+            entry.certs_by_usage[usage] = self._parse_certs(
+                entity_id,
+                settings,
+                descriptor,
+                use,
+            )
+        return entry.certs_by_usage[usage]
+
+    def invalidate(self, entity_ids: list[str] | None = None) -> None:
+        """Drop cached certificates of given IdPs (of all IdPs if `entity_ids` is None)."""
+        with self._lock:
+            if entity_ids is None:
+                self._entries.clear()
+                return
+            for entity_id in entity_ids:
+                self._entries.pop(entity_id, None)
+
+    def _parse_certs(
+        self,
+        entity_id: str,
+        settings: dict,
+        descriptor: str,
+        use: str,
+    ) -> list[CachedCertificate]:
+        # re-use pysaml2's extraction logic, s.t. the same certificates are selected
+        metadata = InMemoryMetaData(None)
+        metadata.entity[entity_id] = settings
+        certs = []
+        for key_name, cert_b64 in metadata.certs(entity_id, descriptor, use):
+            try:
+                certs.append(self._parse_cert(key_name, cert_b64))
+            except ValueError:
+                # a malformed certificate can't verify anything, leave it out
+                msg = f"skipped malformed certificate in metadata of {entity_id!r}"
+                current_app.logger.warning(msg)
+        return certs
+
+    def _parse_cert(self, key_name: str | None, cert_b64: str) -> CachedCertificate:
+        certificate = x509.load_der_x509_certificate(
+            base64.b64decode("".join(cert_b64.split())),
+        )
+        fingerprint = certificate.fingerprint(hashes.SHA256()).hex(":").upper()
+        return CachedCertificate(
+            key_name=key_name,
+            certificate=certificate,
+            fingerprint_sha256=fingerprint,
+            name=self._write_pem(certificate, fingerprint),
+        )
+
+    def _write_pem(self, certificate: x509.Certificate, fingerprint: str) -> str:
+        """Write certificate to a PEM-file named by its fingerprint, once per process."""
+        with self._lock:
+            if self._pem_dir is None:
+                # removed on garbage-collection of the cache, i.e. at latest on interpreter exit
+                self._pem_dir = TemporaryDirectory(prefix="invenio-edugain-certs-")
+            path = Path(self._pem_dir.name) / f"{fingerprint.replace(':', '')}.pem"
+            if not path.exists():
+                path.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+        return str(path)
+
+
+idp_certificate_cache = IdPCertificateCache()
+"""Module-level instance, s.t. cached certificates are shared between requests."""
+
+
+class CertCachingMetadataStore(MetadataStore):
+    """pysaml2's metadata-store, getting certificates from the source that holds the entity.
+
+    `MetadataStore.certs` extracts certificates from an entity's settings itself,
+    which bypasses sources that cache them.
+    """
+
+    @classmethod
+    def from_store(cls, store: MetadataStore) -> Self:
+        """Create from an already loaded store, sharing its sources."""
+        caching_store = cls.__new__(cls)
+        caching_store.__dict__.update(store.__dict__)
+        return caching_store
+
+    def certs(
+        self,
+        entity_id: str,
+        descriptor: str,
+        use: str = "signing",
+    ) -> list[tuple[str | None, str | CachedCertificate]]:
+        """Get certificates of `entity_id` from its source, raises `KeyError` for unknown entities."""
+        for source in self.metadata.values():
+            if entity_id in source:
+                return source.certs(entity_id, descriptor, use)
+        raise KeyError(entity_id)
@@ -7,16 +7,44 @@
 
 """Command line interface for invenio-edugain."""
 
+import json
 import re
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import BinaryIO, TextIO
 
-from click import Context, argument, group, option, pass_context, secho, style
-from flask.cli import with_appcontext
+from click import (
+    BadParameter,
+    Choice,
+    Context,
+    File,
+    IntRange,
+    Parameter,
+    argument,
+    group,
+    option,
+    pass_context,
+    secho,
+    style,
+)
+from flask import current_app
+from flask.cli import ScriptInfo, with_appcontext
 from invenio_db import db
-from saml2.mdstore import InMemoryMetaData, MetadataStore
+from sqlalchemy import func, true
 
-from . import ingest
+from .benchmark import SCENARIOS, run_benchmarks
+from .extraction import extract_missing_columns
+from .feed import export_feed_if_configured, record_feed_changes
+from .logos import cache_logos_if_configured
+from .manage import IdPSelector, read_ids, selection, unknown_ids, update_idps
 from .models import IdPData
-from .utils import load_mdstore
+from .policy import load_ingest_rules
+from .profiling import Profiler, profile_dir
+from .revalidate import invalidate_metadata_snapshot
+from .search import InvalidRegexError, search_idps
+
+# every `invenio` CLI-call imports this module, hence modules that import pysaml2
+# (ingest, certs, snapshot, utils) are imported within the commands that need them
 
 
 @group()
@@ -24,21 +52,81 @@ def edugain() -> None:
     """CLI-group for `invenio edugain` commands."""
 
 
+def _start_profile(
+    ctx: Context,
+    _param: Parameter,
+    profile: bool,  # noqa: FBT001
+) -> None:
+    if not profile:
+        return
+    app = ctx.ensure_object(ScriptInfo).load_app()
+    profiler = Profiler(f"cli-{ctx.info_name}", profile_dir(app))
+    if not profiler.start():
+        secho("another profile is being recorded, not profiling", err=True, fg="yellow")
+        return
+
+    def stop_profile() -> None:
+        summary_path = profiler.stop()
+        secho(f"wrote profile to {summary_path}", err=True, fg="yellow")
+
+    # runs after the command finished
+    ctx.call_on_close(stop_profile)
+
+
+def profile_option[F: Callable](func: F) -> F:
+    """Add `--profile` to command, which profiles the command (see `invenio_edugain.profiling`)."""
+    return option(
+        "--profile",
+        is_flag=True,
+        default=False,
+        expose_value=False,
+        callback=_start_profile,
+        help="write cProfile-stats and peak memory to EDUGAIN_PROFILE_DIR",
+    )(func)
+
+
 @edugain.command("ingest")
+@pass_context
 @argument("metadata_xml_location")
 @option("--xml-sig-cert")
 @option("--cert-fingerprint-sha256")
+@option(
+    "--federation",
+    "federations",
+    multiple=True,
+    help="only ingest IdPs registered by this registration authority (repeatable), overrides EDUGAIN_FEDERATIONS",
+)
+@option(
+    "--reapply-rules",
+    is_flag=True,
+    default=False,
+    help="apply EDUGAIN_INGEST_RULES to already ingested IdPs too, not just to added ones",
+)
+@option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="report what would change, without writing to db",
+)
+@profile_option
 @with_appcontext
 def ingest_idps(
+    ctx: Context,
+    *,
     metadata_xml_location: str,
     xml_sig_cert: str | None,
     cert_fingerprint_sha256: str | None,
+    federations: tuple[str, ...],
+    reapply_rules: bool,
+    dry_run: bool,
 ) -> None:
     """Import IdP-configuration(s) from file/url.
 
     \b
     Examples:
       invenio edugain ingest ./saml-metadata.xml
+      invenio edugain ingest ./saml-metadata.xml --reapply-rules --dry-run
+      invenio edugain ingest ./edugain-metadata.xml --federation http://www.eduid.at/
       invenio edugain ingest
         https://url/to/saml-metadata.xml
         --xml-sig-cert https://url/to/cert
@@ -46,138 +134,179 @@ def ingest_idps(
 
     When ingesting from url, a signing cert is required.
     When getting cert from url, a fingerprint of the cert is required.
+    Added IdPs get enabled/shown as configured in EDUGAIN_INGEST_RULES.
     """  # noqa: D301  # \b prevents click's line-wrapping
+    from . import ingest  # noqa: PLC0415
+    from .utils import load_mdstore  # noqa: PLC0415
+
+    try:
+        rules = load_ingest_rules(current_app.config["EDUGAIN_INGEST_RULES"])
+    except (ValueError, OSError) as error:
+        secho(f"invalid EDUGAIN_INGEST_RULES: {error}", err=True, fg="red")
+        ctx.exit(2)
+
     mds = load_mdstore(
         metadata_xml_location,
         cert_location=xml_sig_cert,
         fingerprint_sha256=cert_fingerprint_sha256,
     )
-    import_item = ingest.from_mdstore(mds)
+    import_item = ingest.from_mdstore(
+        mds,
+        rules=rules,
+        reapply_rules=reapply_rules,
+        dry_run=dry_run,
+        federations=federations or None,
+    )
+    rule_changes = import_item.rule_changes
+    if dry_run:
+        for idp_id, changes in sorted(rule_changes.items()):
+            changes_str = ", ".join(f"{k}={v}" for k, v in sorted(changes.items()))
+            secho(f"{idp_id}: {changes_str}")
     secho(
-        f"Successfully imported idp-settings from {metadata_xml_location!r}\n"
+        f"{'Dry-run, would have imported' if dry_run else 'Successfully imported'}"
+        f" idp-settings from {metadata_xml_location!r}\n"
         f"- {len(import_item.added_idp_ids)} added\n"
         f"- {len(import_item.updated_idp_ids)} updated\n"
-        f"- {len(import_item.unchanged_idp_ids)} already up-to-date",
-        fg="green",
+        f"- {len(import_item.unchanged_idp_ids)} already up-to-date\n"
+        f"- {sum('enabled' in c for c in rule_changes.values())} enabled/disabled by rules\n"
+        f"- {sum('discoverable' in c for c in rule_changes.values())} shown/hidden by rules",
+        fg="yellow" if dry_run else "green",
     )
 
 
-class MetadataLoader(InMemoryMetaData):
-    """Loads idp-settings from SQL-db.
-
-    This is akin to saml2.mdstore.MetaDataMD, which loads from file rather than from db.
-    Also stores columns from IdPData table to its `.idp_data` attribute.
-    """
-
-    def __init__(self, attrc: tuple | None) -> None:
-        """Init."""
-        super().__init__(attrc)
-        self.idp_data: dict[str, dict] = {}
-
-    def load(self) -> None:
-        """Load."""
-        for idp in db.session.scalars(db.select(IdPData)):
-            self.entity[idp.id] = idp.settings
-            self.idp_data[idp.id] = {
-                col.key: getattr(idp, col.key) for col in idp.__table__.columns
-            }
-
-
 @edugain.command()
+@pass_context
 @argument("regex")
+@option(
+    "--limit",
+    type=IntRange(min=1),
+    default=50,
+    show_default=True,
+    help="show at most this many IdPs",
+)
+@option(
+    "--federation",
+    "federations",
+    multiple=True,
+    help="only search IdPs registered by this registration authority (repeatable)",
+)
+@profile_option
 @with_appcontext
-def search(regex: str) -> None:
-    """Search through ingested IdPs' names/urls to find matching IdPs.
+def search(
+    ctx: Context,
+    regex: str,
+    limit: int,
+    federations: tuple[str, ...],
+) -> None:
+    """Search through ingested IdPs' ids/names/keywords to find matching IdPs.
 
     \b
     Examples:
       invenio edugain search 'university'
-      invenio edugain search 'uni.*ity'
-    """  # noqa: D301  # \b prevents click's line-wrapping
-    pattern = re.compile(regex, flags=re.IGNORECASE)
-
-    mds = MetadataStore(None, {})
-    mdl = MetadataLoader(mds.attrc)
-    mdl.load()
-    mds.metadata["db"] = mdl
-
-    matches = {}
-    for idp_id in sorted(mds.identity_providers()):
-        match_candidates = []
-        match_candidates.extend(mds.mdui_uiinfo_display_name(idp_id))
-        if name := mds.name(idp_id):
-            match_candidates.append(name)
-        uiinfos = list(mds.mdui_uiinfo(idp_id))
-        match_candidates.extend(
-            keyword_dict["text"]
-            for uiinfo in uiinfos
-            for keyword_dict in uiinfo.get("keywords", [])
-        )
-        if pattern.search(idp_id) or any(pattern.search(dn) for dn in match_candidates):
-            matches[idp_id] = mdl.idp_data[idp_id]
-            matches[idp_id]["match_info"] = match_candidates
+      invenio edugain search 'uni.*ity' --limit 200
+      invenio edugain search 'graz' --federation http://www.eduid.at/
 
+    On PostgreSQL, results are ranked by similarity to the words spelled out in given regex.
+    """  # noqa: D301  # \b prevents click's line-wrapping
+    try:
+        # fetch one more than shown, to tell whether there are more
+        matches = search_idps(regex, limit=limit + 1, federations=federations or None)
+    except InvalidRegexError as error:
+        raise BadParameter(str(error), ctx=ctx, param_hint="REGEX") from error
     if not matches:
-        secho(f"no results found for given reges {regex!r}", fg="yellow")
+        secho(f"no results found for given regex {regex!r}", fg="yellow")
         return
 
     # echo table header
-    max_id_len = max(len(idp_id) for idp_id in matches)
+    max_id_len = max(len(match.id) for match in matches)
     secho(
         f"enabled discoverable idp-id{" " * (max_id_len - 4)}name0;name1;...;keyword0;...",
         bold=True,
     )
-    for idp_id, idp_data in matches.items():
-        match_info = idp_data["match_info"]
-        enabled = idp_data["enabled"]
-        discoverable = idp_data["discoverable"]
-        enabled_chr = "O" if enabled else "X"
+    for match in matches[:limit]:
+        enabled_chr = "O" if match.enabled else "X"
         enabled_str = style(
             enabled_chr.center(len("enabled")),
-            fg="green" if enabled else "red",
+            fg="green" if match.enabled else "red",
         )
-        disco_chr = "O" if discoverable else "X"
+        disco_chr = "O" if match.discoverable else "X"
         disco_str = style(
             disco_chr.center(len("discoverable")),
-            fg="green" if discoverable else "red",
+            fg="green" if match.discoverable else "red",
         )
         secho(
-            f"{enabled_str} {disco_str} {idp_id}{' '*(max_id_len-len(idp_id)+2)}{';'.join(match_info)}",
+            f"{enabled_str} {disco_str} {match.id}{' '*(max_id_len-len(match.id)+2)}{';'.join(match.terms)}",
         )
+    if len(matches) > limit:
+        secho(f"showing first {limit} results only, see --limit", fg="yellow")
 
 
 @edugain.command()
 @pass_context
 @argument("idp-ids", nargs=-1)
+@option(
+    "--ids-from",
+    "ids_file",
+    type=File("r"),
+    help="also manage IdPs whose ids are read from file, one per line ('-' for stdin)",
+)
+@option("--id-regex", help="also manage IdPs whose id matches regex")
+@option(
+    "--registration-authority",
+    "--federation",
+    "registration_authority",
+    help="restrict --id-regex et al. to IdPs registered by this federation",
+)
+@option(
+    "--entity-category",
+    help="restrict --id-regex et al. to IdPs of this entity-category",
+)
 @option("--disable", is_flag=True, default=False)
 @option("--enable", is_flag=True, default=False)
 @option("--hide", is_flag=True, default=False)
 @option("--show", is_flag=True, default=False)
+@profile_option
 @with_appcontext
-def manage(  # noqa: C901
+def manage(
     ctx: Context,
+    *,
     idp_ids: tuple[str, ...],
-    disable: bool,  # noqa: FBT001
-    enable: bool,  # noqa: FBT001
-    hide: bool,  # noqa: FBT001
-    show: bool,  # noqa: FBT001
+    ids_file: TextIO | None,
+    id_regex: str | None,
+    registration_authority: str | None,
+    entity_category: str | None,
+    disable: bool,
+    enable: bool,
+    hide: bool,
+    show: bool,
 ) -> None:
     """Manage given IdPs' configuration in db (enable/disble, show/hide).
 
     \b
     Examples:
       invenio edugain manage --enable --show idp-id-1 idp-id-2
-      xargs -a whitelisted-idp_ids invenio edugain manage --enable
-      generated-blacklist | xargs edugain manage --disable
-
+      invenio edugain manage --enable --ids-from whitelisted-idp_ids
+      generated-blacklist | invenio edugain manage --disable --ids-from -
+      invenio edugain manage --enable --registration-authority http://www.eduid.at/
+      invenio edugain manage --hide --id-regex '^https://test-'
 
     Choose actions out of `--disable`, `--enable`, `--hide`, `--show`
-    and apply given actions to given IdPs.
+    and apply given actions to given IdPs, in a single db-statement.
     IdP-ids are in URI format and can be found via `invenio edugain search`.
+    Selectors (`--id-regex`, `--registration-authority`, `--entity-category`)
+    select IdPs that match all of them, additionally to given IdP-ids.
     """  # noqa: D301  # \b prevents click's line-wrapping
+    if ids_file is not None:
+        idp_ids = (*idp_ids, *read_ids(ids_file))
+    selector = IdPSelector(
+        id_regex=id_regex,
+        registration_authority=registration_authority,
+        entity_category=entity_category,
+    )
+
     error_msgs: list[str] = []
-    if not idp_ids:
-        error_msgs.append("supply at least one idp-id to change")
+    if not idp_ids and not selector:
+        error_msgs.append("supply at least one idp-id or selector to change")
     if disable and enable:
         error_msgs.append("--disable and --enable are mutually exclusive")
     if hide and show:
@@ -186,36 +315,287 @@ def manage(  # noqa: C901
         error_msgs.append(
             "command would have no effect, choose at least one action out of --disable, --enable, --hide, --show",
         )
+    if id_regex is not None:
+        try:
+            re.compile(id_regex)
+        except re.error as error:
+            error_msgs.append(f"invalid regex {id_regex!r}: {error}")
 
     if error_msgs:
         msg = "\n".join(error_msgs)
         secho(msg, err=True, fg="red")
         ctx.exit(2)
 
-    idps_data: dict[str, IdPData] = {
-        idp_data.id: idp_data
-        for idp_data in db.session.scalars(db.select(IdPData).order_by(IdPData.id))
-    }
-    if unknown_ids := set(idp_ids) - set(idps_data):
-        msg = f"no idps were ingested for the following given ids: {sorted(unknown_ids)!r}"
+    if unknown := unknown_ids(set(idp_ids)):
+        msg = f"no idps were ingested for the following given ids: {unknown!r}"
         secho(msg, err=True, fg="red")
         ctx.exit(1)
 
-    updated_ids = set()
-    for idp_id in idp_ids:
-        idp_data = idps_data[idp_id]
-        if disable and idp_data.enabled:
-            idp_data.enabled = False
-            updated_ids.add(idp_id)
-        if enable and not idp_data.enabled:
-            idp_data.enabled = True
-            updated_ids.add(idp_id)
-        if hide and idp_data.discoverable:
-            idp_data.discoverable = False
-            updated_ids.add(idp_id)
-        if show and not idp_data.discoverable:
-            idp_data.discoverable = True
-            updated_ids.add(idp_id)
-
+    updated_ids = update_idps(
+        selection(set(idp_ids), selector),
+        enabled=True if enable else False if disable else None,
+        discoverable=True if show else False if hide else None,
+    )
+    # backfill IdPs that were ingested before their columns existed, see `extract_missing_columns`
+    extract_missing_columns()
     db.session.commit()
+    # newly enabled or shown IdPs' logos aren't cached yet,
+    # fetching them takes a while, hence happens after the update is committed
+    cache_logos_if_configured(updated_ids)
+    record_feed_changes(updated_ids)
+    db.session.commit()
+    invalidate_metadata_snapshot()
     secho(f"Updated {len(updated_ids)} IdPs", fg="green")
+    export_feed_if_configured()
+
+
+@edugain.command()
+@option(
+    "--expiring-within",
+    type=int,
+    help="only list certs expiring within given days",
+)
+@profile_option
+@with_appcontext
+def certs(expiring_within: int | None) -> None:
+    """List expiry dates of enabled IdPs' signing certificates, soonest first.
+
+    \b
+    Examples:
+      invenio edugain certs
+      invenio edugain certs --expiring-within 30
+    """  # noqa: D301  # \b prevents click's line-wrapping
+    from .certs import idp_certificate_cache  # noqa: PLC0415
+
+    now = datetime.now(UTC)
+    rows = []
+    for idp in db.session.scalars(
+        db.select(IdPData).where(IdPData.enabled == true()),
+    ):
+        rows.extend(
+            (cert.not_valid_after, cert.fingerprint_sha256, idp.id)
+            for cert in idp_certificate_cache.certs(idp.id, idp.settings)
+        )
+    if expiring_within is not None:
+        rows = [row for row in rows if row[0] <= now + timedelta(days=expiring_within)]
+
+    if not rows:
+        secho("no signing certificates found", fg="yellow")
+        return
+
+    secho("not-valid-after      sha256-fingerprint idp-id", bold=True)
+    for not_valid_after, fingerprint, idp_id in sorted(rows):
+        secho(
+            f"{not_valid_after:%Y-%m-%d %H:%M:%S}  {fingerprint[:17]}  {idp_id}",
+            fg="red" if not_valid_after <= now else None,
+        )
+
+
+@edugain.command()
+@profile_option
+@with_appcontext
+def federations() -> None:
+    """List registration authorities (i.e. federations) of ingested IdPs, with IdP-counts.
+
+    \b
+    Examples:
+      invenio edugain federations
+
+    Use listed registration authorities with `--federation` of other commands,
+    or in `EDUGAIN_FEDERATIONS`/`EDUGAIN_INGEST_RULES`.
+    """  # noqa: D301  # \b prevents click's line-wrapping
+    rows = db.session.execute(
+        db.select(
+            IdPData.registration_authority,
+            func.count(),
+            func.count().filter(IdPData.enabled == true()),
+        )
+        .group_by(IdPData.registration_authority)
+        .order_by(IdPData.registration_authority),
+    ).all()
+    if not rows:
+        secho("no IdPs were ingested", fg="yellow")
+        return
+
+    secho("  idps enabled registration-authority", bold=True)
+    for authority, idp_count, enabled_count in rows:
+        secho(f"{idp_count:>6} {enabled_count:>7} {authority or '(none)'}")
+
+
+@edugain.command("export-feed")
+@pass_context
+@profile_option
+@with_appcontext
+def export_feed(ctx: Context) -> None:
+    """Export disco feed to static files in `EDUGAIN_FEED_EXPORT_DIR`.
+
+    \b
+    Examples:
+      invenio edugain export-feed
+
+    Happens automatically after ingest, import, and manage,
+    use this e.g. after first configuring `EDUGAIN_FEED_EXPORT_DIR`.
+    """  # noqa: D301  # \b prevents click's line-wrapping
+    if current_app.config.get("EDUGAIN_FEED_EXPORT_DIR") is None:
+        secho("configure EDUGAIN_FEED_EXPORT_DIR to export to", err=True, fg="red")
+        ctx.exit(2)
+    filename = export_feed_if_configured()
+    if filename is None:
+        secho("couldn't export disco feed, see logs", err=True, fg="red")
+        ctx.exit(1)
+    secho(f"Exported disco feed as {filename}", fg="green")
+
+
+@edugain.command("cache-logos")
+@pass_context
+@profile_option
+@with_appcontext
+def cache_logos(ctx: Context) -> None:
+    """Fetch and store logos of IdPs in the disco feed in `EDUGAIN_LOGO_CACHE_DIR`.
+
+    \b
+    Examples:
+      invenio edugain cache-logos
+
+    Happens automatically after ingest, import, and manage,
+    use this e.g. after first configuring `EDUGAIN_LOGO_CACHE_DIR`, or to retry failed logos.
+    """  # noqa: D301  # \b prevents click's line-wrapping
+    if current_app.config.get("EDUGAIN_LOGO_CACHE_DIR") is None:
+        secho("configure EDUGAIN_LOGO_CACHE_DIR to store logos in", err=True, fg="red")
+        ctx.exit(2)
+    stored_count = cache_logos_if_configured()
+    record_feed_changes()
+    db.session.commit()
+    secho(f"Stored {stored_count} logos", fg="green")
+    export_feed_if_configured()
+
+
+@edugain.command("export")
+@argument("destination", type=File("wb"))
+@profile_option
+@with_appcontext
+def export_idps(destination: BinaryIO) -> None:
+    """Export ingested IdPs, including flags and settings, to a snapshot file.
+
+    \b
+    Examples:
+      invenio edugain export idps.jsonl.gz
+      invenio edugain export - | ssh new-node 'invenio edugain import -'
+
+    Snapshots are gzip-compressed JSON Lines, see `invenio edugain import`.
+    """  # noqa: D301  # \b prevents click's line-wrapping
+    from .snapshot import export_snapshot  # noqa: PLC0415
+
+    count = export_snapshot(destination)
+    secho(f"Exported {count} IdPs", err=True, fg="green")
+
+
+@edugain.command("import")
+@pass_context
+@argument("source", type=File("rb"))
+@option(
+    "--replace",
+    is_flag=True,
+    default=False,
+    help="delete ingested IdPs that aren't in the snapshot",
+)
+@profile_option
+@with_appcontext
+def import_idps(ctx: Context, source: BinaryIO, replace: bool) -> None:  # noqa: FBT001
+    """Import IdPs from a snapshot file made by `invenio edugain export`.
+
+    \b
+    Examples:
+      invenio edugain import idps.jsonl.gz
+      invenio edugain import --replace idps.jsonl.gz
+
+    Needs no network, making it a fast alternative to `invenio edugain ingest`
+    for bootstrapping new nodes (staging, disaster-recovery, CI).
+    IdPs in the snapshot overwrite ingested IdPs of the same id, flags included.
+    """  # noqa: D301  # \b prevents click's line-wrapping
+    from .snapshot import SnapshotError, import_snapshot  # noqa: PLC0415
+
+    try:
+        count = import_snapshot(source, replace=replace)
+    except SnapshotError as error:
+        secho(f"couldn't import snapshot: {error}", err=True, fg="red")
+        ctx.exit(1)
+    secho(f"Imported {count} IdPs", fg="green")
+
+
+@edugain.command()
+@option(
+    "--scenario",
+    "scenarios",
+    type=Choice(SCENARIOS),
+    multiple=True,
+    help="run only given scenario(s), runs all by default",
+)
+@option(
+    "--iterations",
+    type=IntRange(min=1),
+    default=100,
+    show_default=True,
+    help="timed calls per scenario",
+)
+@option(
+    "--warmup",
+    type=IntRange(min=0),
+    default=3,
+    show_default=True,
+    help="untimed calls per scenario, before timed calls",
+)
+@option(
+    "--format",
+    "output_format",
+    type=Choice(["table", "json"]),
+    default="table",
+    show_default=True,
+)
+@profile_option
+@with_appcontext
+def benchmark(
+    scenarios: tuple[str, ...],
+    iterations: int,
+    warmup: int,
+    output_format: str,
+) -> None:
+    """Time hot paths against current db and config, print latencies and throughput.
+
+    \b
+    Examples:
+      invenio edugain benchmark
+      invenio edugain benchmark --scenario disco-feed --iterations 20
+      invenio edugain benchmark --format json > benchmark-v1.json
+
+    \b
+    Scenarios:
+      sp-config-load  loading pysaml2 config, including all enabled IdPs
+      metadata-load   loading all enabled IdPs' settings from db
+      disco-feed      generating the discovery-feed
+      sp-xml          rendering (and signing, if so configured) SP metadata
+      authn-request   preparing an AuthnRequest and its redirect
+      parse-response  parsing (and verifying) a signed SAML response
+
+    Scenarios that need an IdP use a throw-away IdP, which is rolled back afterwards.
+    """  # noqa: D301  # \b prevents click's line-wrapping
+    results = run_benchmarks(
+        list(scenarios or SCENARIOS),
+        iterations=iterations,
+        warmup=warmup,
+    )
+
+    if output_format == "json":
+        secho(json.dumps([result.as_dict() for result in results], indent=2))
+        return
+
+    secho(
+        f"{'scenario':<16}{'iterations':>12}{'p50 [ms]':>12}{'p95 [ms]':>12}{'p99 [ms]':>12}{'ops/s':>12}",
+        bold=True,
+    )
+    for result in results:
+        secho(
+            f"{result.scenario:<16}{result.iterations:>12}"
+            f"{result.p50 * 1000:>12.2f}{result.p95 * 1000:>12.2f}{result.p99 * 1000:>12.2f}"
+            f"{result.throughput:>12.1f}",
+        )
@@ -7,18 +7,20 @@
 
 """Configuration for invenio-edugain."""
 
-from collections.abc import Callable
+from collections.abc import Callable, Mapping
+from datetime import timedelta
+from typing import TYPE_CHECKING
 
 from werkzeug.wrappers import Response
 
-from .build_config import UninitializedConfig
+# keep imports cheap, as every app and `invenio` CLI-call imports this module
 from .build_config.shibboleth import ShibbolethEDSKwargs
-from .utils import (
-    NOT_CONFIGURED,
-    AuthnInfo,
-    NotConfiguredType,
-    default_authn_response_handler,
-)
+from .build_config.utils import UninitializedConfig
+from .metrics import MetricsSink
+from .sentinels import NOT_CONFIGURED, NotConfiguredType
+
+if TYPE_CHECKING:
+    from .utils import AuthnInfo
 
 EDUGAIN_ALLOW_IMGSRC_CSP: bool | None = None
 """Whether to allow dico-page to set the `imgsrc: *` content-security-policy.
@@ -27,6 +29,8 @@ NOTE: this potential CSP change only affects discovery-page
 Since logos are hosted on their home-organization, this is necessary to load logo-imgs on discovery-page.
 Since changes to CSP are security-relevant, we won't change it without this opt-in.
 Since most people will want this, the default `None` raises an error.
+With `EDUGAIN_LOGO_CACHE_DIR` configured (and the "logos" route in `EDUGAIN_ROUTES`), logos are served from this origin instead,
+hence `img-src` is restricted to this origin and data-URIs unless this is `False`.
 """
 
 EDUGAIN_LOGIN_ENABLED = True
@@ -35,9 +39,15 @@ EDUGAIN_ROUTES = {
     "acs": "/acs",
     "authn-request": "/login/authn-request",
     "discofeed": "/discofeed",
+    "discofeed-deltas": "/discofeed/deltas",
     "login-discover": "/login/discover",
+    "logos": "/logos/<filename>",
     "sp-xml": "/sp/xml",
 }
+"""Routes (under `/saml`) to serve views at, routes left out aren't served.
+
+`"metrics"` (see `EDUGAIN_METRICS_SINK`) is left out per default, as it exposes per-IdP login counts.
+"""
 
 #
 # Configuration for pysaml2 and shibboleth-eds
@@ -58,6 +68,34 @@ When configuring yourself, set your configuration to `app.config["EDUGAIN_PYSAML
 Feel free to use (parts of) the config-building-machinery in `invenio_edugain.build_config`.
 """
 
+EDUGAIN_CRYPTO_BACKEND: str = "xmlsec1"
+"""Which crypto backend verifies signatures and decrypts assertions of SAML responses.
+Set to `"xmlsec1"` for pysaml2's default, which runs an `xmlsec1` subprocess per operation.
+Set to `"in-process"` to verify/decrypt in-process instead (see `invenio_edugain.crypto`), which needs no `xmlsec1` binary.
+Only used in automatic config-building.
+"""
+
+EDUGAIN_DEFER_LOGIN_BOOKKEEPING: bool = False
+"""Whether to defer non-critical post-login db-writes to a celery-task.
+
+These are login-tracking, profile-refresh (if `EDUGAIN_REFRESH_PROFILE_ON_LOGIN`), and linking of additional id-methods
+(see `invenio_edugain.bookkeeping`).
+When `True`, only session-establishment (and creation of new users) stays on the login's request-path.
+Post-login writes are then queued via invenio-queues,
+and written in batches by periodically running `invenio_edugain.tasks.process_login_bookkeeping`,
+which you need to add to `CELERY_BEAT_SCHEDULE`.
+"""
+
+EDUGAIN_LOGIN_BOOKKEEPING_BATCH_SIZE: int = 500
+"""How many queued login-records `process_login_bookkeeping` writes per db-transaction."""
+
+EDUGAIN_REFRESH_PROFILE_ON_LOGIN: bool = False
+"""Whether to overwrite users' full name and affiliations with those sent by their IdP on each login.
+
+When `False`, these are only taken from the IdP when the user is created,
+s.t. users' edits to their profile persist.
+"""
+
 EDUGAIN_SHIBBOLETH_EDS_CONFIG: dict[str, str | list | dict] | None = None
 """After app-finalization, this must be set to a dict for use with shibboleth-EDS.
 You will usually want to build this using the machinery in `invenio_edugain.build_config`.
@@ -76,6 +114,13 @@ EDUGAIN_SHIBBOLETH_EDS_CONFIG_KWARGS: ShibbolethEDSKwargs | None = None
 Only used in automatic config-building.
 """
 
+EDUGAIN_CONFIG_CACHE_DIR: str | NotConfiguredType | None = NOT_CONFIGURED
+"""Directory to cache automatically built configurations in, across restarts.
+Cached configurations are reused while the config-vars they're built from
+(and the mtimes of the certificate/key files) stay the same.
+Defaults to `<instance-path>/edugain-config-cache`, set to `None` to turn caching off.
+"""
+
 #
 # Configuration for discovery service
 #
@@ -94,12 +139,151 @@ Set to configured webpack key.
 EDUGAIN_DISCOVERY_TEMPLATE: str = "invenio_edugain/login_discovery.html"
 """Template used for discovery page (i.e. the *choose your institution to log in with* page)."""
 
+EDUGAIN_FEED_EXPORT_DIR: str | None = None
+"""Directory to export the disco feed to as static files, after each ingest, import, and manage.
+
+Exports are named by a hash of their content (e.g. `discofeed.<hash>.json`, plus `.gz` and (with `brotli` installed) `.br` variants),
+s.t. a web-server or CDN can serve them with `Cache-Control: immutable`.
+Set to `None` to turn this off.
+"""
+
+EDUGAIN_FEED_EXPORT_URL: str | None = None
+"""URL under which `EDUGAIN_FEED_EXPORT_DIR` is served, e.g. `"/static/edugain-feed"` or a CDN's URL.
+
+When set, shibboleth-EDS loads the latest export from there instead of from the app.
+"""
+
+EDUGAIN_LOGO_CACHE_DIR: str | None = None
+"""Directory to store IdPs' logos in, s.t. the discovery page doesn't load them from their home-organizations.
+
+On ingest (and `invenio edugain cache-logos`), logos are fetched, validated, resized (with `Pillow` installed),
+and stored under content-addressed filenames, served from `EDUGAIN_ROUTES["logos"]`.
+Small icons get inlined into the feed as data-URIs, logos that failed to fetch are left out of it.
+Set to `None` to turn this off.
+"""
+
+EDUGAIN_LOGO_FETCH_CONCURRENCY: int = 8
+"""Number of logos fetched at once."""
+
+EDUGAIN_LOGO_FETCH_TIMEOUT: float = 10
+"""Seconds after which fetching a logo is given up."""
+
+EDUGAIN_LOGO_MAX_BYTES: int = 1024 * 1024
+"""Logos larger than this many bytes (before resizing) are rejected."""
+
+EDUGAIN_LOGO_INLINE_MAX_BYTES: int = 2048
+"""Square logos (i.e. icons) of at most this many bytes (after resizing) are inlined into the feed as data-URIs, `-1` to never inline."""
+
+EDUGAIN_AUTHN_REQUEST_CACHE_TTL: float = 300
+"""Seconds for which each process caches an IdP's SSO location for sending AuthnRequests.
+
+Ingests update the cache of their own process immediately, other processes pick up changes after this long.
+"""
+
+EDUGAIN_METADATA_SNAPSHOT_TTL: float | None = None
+"""Seconds for which each process serves IdPs' metadata from an in-memory snapshot as is, `None` to query db on each request.
+
+Applies to the disco feed, sending AuthnRequests, and the ACS.
+Older snapshots are still served while a single background thread per process loads anew from db,
+s.t. requests neither wait on nor fail with the db.
+Changes show up in other processes after this long, in the changing process once revalidated on its next request.
+"""
+
+EDUGAIN_METADATA_SNAPSHOT_MAX_STALENESS: float = 3600
+"""Seconds after which a snapshot isn't served anymore, should loading anew keep failing.
+
+Requests then load anew themselves, failing as without a snapshot while the db does.
+"""
+
+EDUGAIN_READ_REPLICA_BIND: str | None = None
+"""Key of `SQLALCHEMY_BINDS` (e.g. a read replica) to execute heavy read-only queries of IdPs' metadata on, `None` for the primary.
+
+Applies to loading enabled IdPs on login, the disco feed, metadata snapshots, and `invenio edugain search`.
+Should the bind fail, those queries fall back to the primary, retrying the bind 30 seconds later.
+Writes (ingest, `invenio edugain manage`, provisioning users on login) always go to the primary.
+As replicas may lag behind, changes may show up a bit later.
+"""
+
+EDUGAIN_SP_METADATA_VALID_FOR: timedelta | None = None
+"""Validity of the SP's metadata, sets its `validUntil` (unless `None`).
+
+Metadata is rendered once and served from cache, it's rendered anew once half of its validity elapsed.
+"""
+
+EDUGAIN_SP_METADATA_CACHE_DURATION: timedelta | None = None
+"""Sets `cacheDuration` of the SP's metadata, and `Cache-Control: max-age` of its responses (unless `None`).
+
+When `None`, responses may be cached but need revalidation (via `ETag`).
+"""
+
+EDUGAIN_SP_METADATA_SIGNED: bool = False
+"""Whether to sign the SP's metadata with the SP's signing key.
+
+Signing happens once per rendering, not per request.
+"""
+
+#
+# configuration for ingest
+#
+EDUGAIN_INGEST_RULES: list[dict[str, str | bool | None]] = []
+"""Rules that set `enabled`/`discoverable` of IdPs as they're ingested (see `invenio_edugain.policy`).
+
+Each rule is a dict of criteria and the values it sets, e.g.
+`{"registration_authority": "http://www.eduid.at/", "enabled": True}`.
+Criteria are `id_regex`, `registration_authority`, `entity_category`,
+and `ids_file` (path to an allow/deny list of IdP-ids, one per line).
+A rule applies to IdPs that match all its criteria; where rules disagree, later rules win.
+Rules apply to newly added IdPs only, unless ingested with `--reapply-rules`.
+"""
+
+EDUGAIN_FEDERATIONS: list[str] | None = None
+"""Registration authorities (i.e. federations) whose IdPs get ingested, e.g. `["http://www.eduid.at/"]`.
+
+Set to `None` to ingest IdPs of all federations found in ingested metadata.
+IdPs of other federations that were ingested before are kept, see `invenio edugain manage`.
+"""
+
 #
 # configuration for response handler
 #
-EDUGAIN_AUTHN_RESPONSE_HANDLER: str | Callable[[AuthnInfo, str], Response] = (
-    default_authn_response_handler
+EDUGAIN_AUTHN_RESPONSE_HANDLER: str | Callable[["AuthnInfo", str], Response] = (
+    "invenio_edugain.utils:default_authn_response_handler"
 )
 """Called after authn-response is parsed.
 Either a response-handler callable or an import-string to a response-handler callable.
 """
+
+#
+# configuration for instrumentation
+#
+EDUGAIN_METRICS_SINK: (
+    str | MetricsSink | Callable[[str, float, Mapping[str, str]], None] | None
+) = None
+"""Where to report timings of login-pipeline stages to (see `invenio_edugain.metrics`).
+
+Set to `None` to turn instrumentation off.
+Set to `"prometheus"` to aggregate histograms in-process,
+served in Prometheus text-format under `EDUGAIN_ROUTES["metrics"]` once that route is added
+(restrict access to it in your reverse-proxy, as it exposes per-IdP login counts).
+Otherwise set to a `MetricsSink`, a callable `(stage, seconds, labels) -> None`, or an import-string to either.
+"""
+
+#
+# configuration for profiling
+#
+EDUGAIN_PROFILE_DIR: str | None = None
+"""Directory to write profiles to (see `invenio_edugain.profiling`).
+
+Defaults to `edugain-profiles` within the app's instance-path.
+CLI commands are profiled when given `--profile`, e.g. `invenio edugain ingest --profile ...`.
+"""
+
+EDUGAIN_PROFILE_REQUEST_TOKEN: str | None = None
+"""Profile requests to invenio-edugain's views that send this token in an `X-Edugain-Profile` header.
+
+Set to `None` to turn header-triggered profiling off.
+Treat it like a password, as profiling slows down requests and fills up `EDUGAIN_PROFILE_DIR`.
+"""
+
+EDUGAIN_PROFILE_SAMPLE_RATE: float = 0.0
+"""Fraction of requests to invenio-edugain's views to profile, between `0.0` (none) and `1.0` (all)."""
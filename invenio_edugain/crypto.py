@@ -0,0 +1,756 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""In-process crypto backend for pysaml2.
+
+pysaml2's default crypto backend forks an `xmlsec1` subprocess (plus temporary files)
+for every signature-check and every decryption.
+The backend in here instead does XML-signature and XML-encryption in-process via lxml and cryptography.
+"""
+
+import base64
+import binascii
+import hmac
+import re
+from functools import lru_cache
+from pathlib import Path
+from xml.sax.saxutils import quoteattr
+
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature, InvalidTag
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+from cryptography.hazmat.primitives.asymmetric.types import (
+    PrivateKeyTypes,
+    PublicKeyTypes,
+)
+from cryptography.hazmat.primitives.asymmetric.utils import (
+    decode_dss_signature,
+    encode_dss_signature,
+)
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from lxml import etree
+from saml2.client import Saml2Client
+from saml2.config import Config, SPConfig
+from saml2.mdstore import MetadataStore
+from saml2.sigver import (
+    CryptoBackend,
+    DecryptError,
+    RSACrypto,
+    SecurityContext,
+    SignatureError,
+    security_context,
+)
+
+from .certs import CertCachingMetadataStore
+
+try:
+    from cryptography.hazmat.decrepit.ciphers.algorithms import TripleDES
+except ImportError:  # cryptography<43
+    TripleDES = algorithms.TripleDES
+
+IN_PROCESS_CRYPTO_BACKEND = "in-process"
+"""Value for pysaml2's `crypto_backend` config-field that selects `CryptoBackendInProcess`."""
+
+DS_NS = "http://www.w3.org/2000/09/xmldsig#"
+XENC_NS = "http://www.w3.org/2001/04/xmlenc#"
+XENC11_NS = "http://www.w3.org/2009/xmlenc11#"
+
+C14N_ALGORITHMS: dict[str, tuple[bool, bool]] = {
+    # maps algorithm to whether it is exclusive, and whether it keeps comments
+    "http://www.w3.org/TR/2001/REC-xml-c14n-20010315": (False, False),
+    "http://www.w3.org/TR/2001/REC-xml-c14n-20010315#WithComments": (False, True),
+    "http://www.w3.org/2001/10/xml-exc-c14n#": (True, False),
+    "http://www.w3.org/2001/10/xml-exc-c14n#WithComments": (True, True),
+}
+TRANSFORM_ENVELOPED = "http://www.w3.org/2000/09/xmldsig#enveloped-signature"
+
+DIGEST_ALGORITHMS: dict[str, type[hashes.HashAlgorithm]] = {
+    "http://www.w3.org/2000/09/xmldsig#sha1": hashes.SHA1,
+    "http://www.w3.org/2001/04/xmldsig-more#sha224": hashes.SHA224,
+    "http://www.w3.org/2001/04/xmlenc#sha256": hashes.SHA256,
+    "http://www.w3.org/2001/04/xmldsig-more#sha384": hashes.SHA384,
+    "http://www.w3.org/2001/04/xmlenc#sha512": hashes.SHA512,
+}
+
+SIGNATURE_ALGORITHMS: dict[str, tuple[str, type[hashes.HashAlgorithm]]] = {
+    "http://www.w3.org/2000/09/xmldsig#rsa-sha1": ("rsa", hashes.SHA1),
+    "http://www.w3.org/2001/04/xmldsig-more#rsa-sha224": ("rsa", hashes.SHA224),
+    "http://www.w3.org/2001/04/xmldsig-more#rsa-sha256": ("rsa", hashes.SHA256),
+    "http://www.w3.org/2001/04/xmldsig-more#rsa-sha384": ("rsa", hashes.SHA384),
+    "http://www.w3.org/2001/04/xmldsig-more#rsa-sha512": ("rsa", hashes.SHA512),
+    "http://www.w3.org/2001/04/xmldsig-more#ecdsa-sha1": ("ecdsa", hashes.SHA1),
+    "http://www.w3.org/2001/04/xmldsig-more#ecdsa-sha224": ("ecdsa", hashes.SHA224),
+    "http://www.w3.org/2001/04/xmldsig-more#ecdsa-sha256": ("ecdsa", hashes.SHA256),
+    "http://www.w3.org/2001/04/xmldsig-more#ecdsa-sha384": ("ecdsa", hashes.SHA384),
+    "http://www.w3.org/2001/04/xmldsig-more#ecdsa-sha512": ("ecdsa", hashes.SHA512),
+}
+
+BLOCK_CIPHERS: dict[str, tuple[str, int]] = {
+    # maps algorithm to mode and key-size in bytes
+    f"{XENC_NS}aes128-cbc": ("aes-cbc", 16),
+    f"{XENC_NS}aes192-cbc": ("aes-cbc", 24),
+    f"{XENC_NS}aes256-cbc": ("aes-cbc", 32),
+    f"{XENC_NS}tripledes-cbc": ("3des-cbc", 24),
+    f"{XENC11_NS}aes128-gcm": ("aes-gcm", 16),
+    f"{XENC11_NS}aes192-gcm": ("aes-gcm", 24),
+    f"{XENC11_NS}aes256-gcm": ("aes-gcm", 32),
+}
+KEY_TRANSPORTS = {
+    f"{XENC_NS}rsa-1_5",
+    f"{XENC_NS}rsa-oaep-mgf1p",
+    f"{XENC11_NS}rsa-oaep",
+}
+MGF_ALGORITHMS: dict[str, type[hashes.HashAlgorithm]] = {
+    f"{XENC11_NS}mgf1sha1": hashes.SHA1,
+    f"{XENC11_NS}mgf1sha224": hashes.SHA224,
+    f"{XENC11_NS}mgf1sha256": hashes.SHA256,
+    f"{XENC11_NS}mgf1sha384": hashes.SHA384,
+    f"{XENC11_NS}mgf1sha512": hashes.SHA512,
+}
+GCM_IV_LEN = 12
+GCM_TAG_LEN = 16
+
+XML_PARSER = etree.XMLParser(
+    load_dtd=False,
+    no_network=True,
+    remove_blank_text=False,
+    resolve_entities=False,
+)
+XML_DECLARATION_RE = re.compile(rb"^\s*<\?xml[^>]*\?>")
+
+
+def _parse_xml(xml: str | bytes) -> etree._ElementTree:
+    """Parse untrusted XML, refusing DTDs."""
+    if isinstance(xml, str):
+        xml = xml.encode("utf-8")
+    # parser neither loads DTDs nor resolves entities nor accesses the network
+    tree = etree.ElementTree(etree.fromstring(xml, parser=XML_PARSER))
+    if tree.docinfo.doctype:
+        msg = "XML documents with a DTD are not accepted"
+        raise ValueError(msg)
+    return tree
+
+
+def _clark(node_name: str) -> str:
+    """Convert pysaml2's `namespace:tag` node-names to lxml's `{namespace}tag`."""
+    namespace, _, tag = node_name.rpartition(":")
+    return f"{{{namespace}}}{tag}"
+
+
+def _b64decode(text: str, error_cls: type[Exception], what: str) -> bytes:
+    """Decode base64 `text` (ignoring whitespace), raises `error_cls` if it's malformed."""
+    try:
+        return base64.b64decode("".join(text.split()))
+    except binascii.Error as error:
+        msg = f"{what} isn't valid base64"
+        raise error_cls(msg) from error
+
+
+@lru_cache(maxsize=1024)
+def load_certificate_public_key(
+    cert_bytes: bytes,
+    cert_type: str = "pem",
+) -> PublicKeyTypes:
+    """Load the public key of a (PEM or DER) certificate, cached by the certificate's content."""
+    if cert_type == "der":
+        cert = x509.load_der_x509_certificate(cert_bytes)
+    else:
+        cert = x509.load_pem_x509_certificate(cert_bytes)
+    return cert.public_key()
+
+
+@lru_cache(maxsize=32)
+def _load_private_key_cached(
+    key_file: str,
+    _mtime_ns: int,  # only part of the cache-key, s.t. changed key-files get reloaded
+) -> PrivateKeyTypes:
+    key_bytes = Path(key_file).read_bytes()
+    return serialization.load_pem_private_key(key_bytes, password=None)
+
+
+def load_private_key(key_file: str) -> PrivateKeyTypes:
+    """Load a PEM private key from file, cached until the file is modified."""
+    return _load_private_key_cached(key_file, Path(key_file).stat().st_mtime_ns)
+
+
+def _canonicalize(
+    element: etree._Element,
+    algorithm: str,
+    inclusive_ns_prefixes: list[str] | None = None,
+    *,
+    allow_comments: bool = True,
+) -> bytes:
+    if algorithm not in C14N_ALGORITHMS:
+        msg = f"unsupported canonicalization algorithm {algorithm!r}"
+        raise SignatureError(msg)
+    exclusive, with_comments = C14N_ALGORITHMS[algorithm]
+    return etree.tostring(
+        element,
+        method="c14n",
+        exclusive=exclusive,
+        with_comments=with_comments and allow_comments,
+        inclusive_ns_prefixes=inclusive_ns_prefixes if exclusive else None,
+    )
+
+
+def _inclusive_ns_prefixes(transform: etree._Element) -> list[str] | None:
+    inclusive_namespaces = transform.find(
+        "{http://www.w3.org/2001/10/xml-exc-c14n#}InclusiveNamespaces",
+    )
+    if inclusive_namespaces is None:
+        return None
+    prefix_list = inclusive_namespaces.get("PrefixList", "")
+    return [None if prefix == "#default" else prefix for prefix in prefix_list.split()]
+
+
+def _remove_keeping_tail(element: etree._Element) -> None:
+    """Remove `element` from its parent, without lxml's default of also removing its tail-text."""
+    parent = element.getparent()
+    if element.tail:
+        previous = element.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + element.tail
+        else:
+            parent.text = (parent.text or "") + element.tail
+    parent.remove(element)
+
+
+def _find_by_id(
+    tree: etree._ElementTree,
+    id_: str,
+    id_attr: str,
+    tag: str | None = None,
+) -> etree._Element:
+    """Find the element with `id_attr`==`id_`, refusing ambiguous IDs (as used by signature-wrapping attacks)."""
+    found = [
+        element
+        for element in tree.iter(tag)
+        if isinstance(element.tag, str) and element.get(id_attr) == id_
+    ]
+    if len(found) != 1:
+        msg = f"expected exactly one element with {id_attr}={id_!r}, found {len(found)}"
+        raise SignatureError(msg)
+    return found[0]
+
+
+def _digest_reference(
+    tree: etree._ElementTree,
+    reference: etree._Element,
+    signature: etree._Element,
+    id_tag: str,
+) -> bytes:
+    """Dereference and transform a <ds:Reference>, then return the digest of the result."""
+    uri = reference.get("URI")
+    if uri is None:
+        msg = "<ds:Reference> without URI"
+        raise SignatureError(msg)
+    if uri == "":
+        referenced = tree.getroot()
+    elif uri.startswith("#") and not uri.startswith("#xpointer("):
+        referenced = _find_by_id(tree, uri[1:], "ID", id_tag)
+    else:
+        msg = f"unsupported <ds:Reference> URI {uri!r}"
+        raise SignatureError(msg)
+
+    octets: bytes | None = None
+    for transform in reference.iterfind(f"{{{DS_NS}}}Transforms/{{{DS_NS}}}Transform"):
+        algorithm = transform.get("Algorithm")
+        if octets is not None:
+            msg = f"transform {algorithm!r} after canonicalization is unsupported"
+            raise SignatureError(msg)
+        if algorithm == TRANSFORM_ENVELOPED:
+            if signature.getparent() is not None:
+                _remove_keeping_tail(signature)
+        else:
+            # same-document references by bare ID never include comments, as per xmldsig-core
+            octets = _canonicalize(
+                referenced,
+                algorithm,
+                _inclusive_ns_prefixes(transform),
+                allow_comments=False,
+            )
+    if octets is None:
+        octets = _canonicalize(
+            referenced,
+            "http://www.w3.org/TR/2001/REC-xml-c14n-20010315",
+        )
+
+    digest_method = reference.find(f"{{{DS_NS}}}DigestMethod")
+    hash_cls = DIGEST_ALGORITHMS.get(
+        digest_method.get("Algorithm") if digest_method is not None else "",
+    )
+    if hash_cls is None:
+        msg = "missing or unsupported <ds:DigestMethod>"
+        raise SignatureError(msg)
+    digest = hashes.Hash(hash_cls())
+    digest.update(octets)
+    return digest.finalize()
+
+
+def _signature_method(signed_info: etree._Element) -> tuple[str, hashes.HashAlgorithm]:
+    signature_method = signed_info.find(f"{{{DS_NS}}}SignatureMethod")
+    algorithm = (
+        signature_method.get("Algorithm") if signature_method is not None else ""
+    )
+    if algorithm not in SIGNATURE_ALGORITHMS:
+        msg = f"unsupported <ds:SignatureMethod> {algorithm!r}"
+        raise SignatureError(msg)
+    key_type, hash_cls = SIGNATURE_ALGORITHMS[algorithm]
+    return key_type, hash_cls()
+
+
+def _canonicalize_signed_info(signed_info: etree._Element) -> bytes:
+    c14n_method = signed_info.find(f"{{{DS_NS}}}CanonicalizationMethod")
+    if c14n_method is None:
+        msg = "<ds:SignedInfo> without <ds:CanonicalizationMethod>"
+        raise SignatureError(msg)
+    return _canonicalize(
+        signed_info,
+        c14n_method.get("Algorithm", ""),
+        _inclusive_ns_prefixes(c14n_method),
+    )
+
+
+def _find_signature(
+    tree: etree._ElementTree,
+    node_name: str,
+    node_id: str | None,
+) -> etree._Element:
+    """Find the signature to work on the same way xmlsec1's `--node-id` does."""
+    if node_id:
+        start = _find_by_id(tree, node_id, "ID", _clark(node_name))
+    else:
+        start = tree.getroot()
+    signature = next(start.iter(f"{{{DS_NS}}}Signature"), None)
+    if signature is None:
+        msg = "no <ds:Signature> found"
+        raise SignatureError(msg)
+    return signature
+
+
+def _decrypt_session_key(
+    encrypted_key: etree._Element,
+    private_key: PrivateKeyTypes,
+) -> bytes:
+    encryption_method = encrypted_key.find(f"{{{XENC_NS}}}EncryptionMethod")
+    algorithm = (
+        encryption_method.get("Algorithm") if encryption_method is not None else ""
+    )
+    if algorithm not in KEY_TRANSPORTS:
+        msg = f"unsupported key-transport algorithm {algorithm!r}"
+        raise DecryptError(msg)
+    if not isinstance(private_key, rsa.RSAPrivateKey):
+        msg = "key-transport requires an RSA private key"
+        raise DecryptError(msg)
+    cipher_value = encrypted_key.findtext(
+        f"{{{XENC_NS}}}CipherData/{{{XENC_NS}}}CipherValue",
+    )
+    if not cipher_value:
+        msg = "<xenc:EncryptedKey> without <xenc:CipherValue>"
+        raise DecryptError(msg)
+    encrypted = _b64decode(cipher_value, DecryptError, "<xenc:CipherValue>")
+
+    if algorithm == f"{XENC_NS}rsa-1_5":
+        key_padding: padding.AsymmetricPadding = padding.PKCS1v15()
+    else:
+        digest_method = encryption_method.find(f"{{{DS_NS}}}DigestMethod")
+        digest_cls = DIGEST_ALGORITHMS.get(
+            digest_method.get("Algorithm") if digest_method is not None else "",
+            hashes.SHA1,
+        )
+        mgf = encryption_method.find(f"{{{XENC11_NS}}}MGF")
+        mgf_cls = MGF_ALGORITHMS.get(
+            mgf.get("Algorithm") if mgf is not None else "",
+            hashes.SHA1,
+        )
+        oaep_params = encryption_method.findtext(f"{{{XENC_NS}}}OAEPparams")
+        key_padding = padding.OAEP(
+            mgf=padding.MGF1(algorithm=mgf_cls()),
+            algorithm=digest_cls(),
+            label=(
+                _b64decode(oaep_params, DecryptError, "<xenc:OAEPparams>")
+                if oaep_params
+                else None
+            ),
+        )
+    try:
+        return private_key.decrypt(encrypted, key_padding)
+    except ValueError as error:
+        msg = "could not decrypt session key"
+        raise DecryptError(msg) from error
+
+
+def _decrypt_cipher_data(algorithm: str, session_key: bytes, encrypted: bytes) -> bytes:
+    if algorithm not in BLOCK_CIPHERS:
+        msg = f"unsupported block-encryption algorithm {algorithm!r}"
+        raise DecryptError(msg)
+    mode, key_size = BLOCK_CIPHERS[algorithm]
+    if len(session_key) != key_size:
+        msg = f"session key has wrong size for {algorithm!r}"
+        raise DecryptError(msg)
+
+    if mode == "aes-gcm":
+        iv, ciphertext, tag = (
+            encrypted[:GCM_IV_LEN],
+            encrypted[GCM_IV_LEN:-GCM_TAG_LEN],
+            encrypted[-GCM_TAG_LEN:],
+        )
+        decryptor = Cipher(algorithms.AES(session_key), modes.GCM(iv, tag)).decryptor()
+        try:
+            return decryptor.update(ciphertext) + decryptor.finalize()
+        except InvalidTag as error:
+            msg = "authentication of GCM-encrypted data failed"
+            raise DecryptError(msg) from error
+
+    block_algorithm = (
+        algorithms.AES(session_key) if mode == "aes-cbc" else TripleDES(session_key)
+    )
+    block_len = block_algorithm.block_size // 8
+    if len(encrypted) < 2 * block_len or len(encrypted) % block_len:
+        msg = "CBC-encrypted data has invalid length"
+        raise DecryptError(msg)
+    iv, ciphertext = encrypted[:block_len], encrypted[block_len:]
+    decryptor = Cipher(block_algorithm, modes.CBC(iv)).decryptor()
+    plaintext = decryptor.update(ciphertext) + decryptor.finalize()
+    # xmlenc padding: last byte holds padding-length, other padding bytes are arbitrary
+    pad_len = plaintext[-1]
+    if not 1 <= pad_len <= block_len:
+        msg = "CBC-decrypted data has invalid padding"
+        raise DecryptError(msg)
+    return plaintext[:-pad_len]
+
+
+def _candidate_encrypted_keys(
+    tree: etree._ElementTree,
+    encrypted_data: etree._Element,
+) -> list[etree._Element]:
+    """Collect <xenc:EncryptedKey>s that might hold `encrypted_data`'s session key."""
+    key_info = encrypted_data.find(f"{{{DS_NS}}}KeyInfo")
+    candidates = []
+    if key_info is not None:
+        candidates.extend(key_info.iterfind(f"{{{XENC_NS}}}EncryptedKey"))
+        for retrieval_method in key_info.iterfind(f"{{{DS_NS}}}RetrievalMethod"):
+            uri = retrieval_method.get("URI", "")
+            if uri.startswith("#"):
+                candidates.extend(
+                    element
+                    for element in tree.iter(f"{{{XENC_NS}}}EncryptedKey")
+                    if element.get("Id") == uri[1:]
+                )
+    if not candidates:
+        # lax key search, akin to xmlsec1's `--lax-key-search`
+        candidates.extend(tree.iter(f"{{{XENC_NS}}}EncryptedKey"))
+    return candidates
+
+
+def _replace_with_fragment(element: etree._Element, fragment: bytes) -> None:
+    """Replace `element` with the nodes parsed from `fragment`, in the namespace-context of `element`."""
+    parent = element.getparent()
+    namespace_declarations = "".join(
+        f" xmlns:{prefix}={quoteattr(uri)}" if prefix else f" xmlns={quoteattr(uri)}"
+        for prefix, uri in parent.nsmap.items()
+    )
+    fragment = XML_DECLARATION_RE.sub(b"", fragment)
+    wrapper = _parse_xml(
+        f"<wrapper{namespace_declarations}>".encode() + fragment + b"</wrapper>",
+    ).getroot()
+
+    index = parent.index(element)
+    if wrapper.text:
+        previous = element.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + wrapper.text
+        else:
+            parent.text = (parent.text or "") + wrapper.text
+    children = list(wrapper)
+    tail = element.tail
+    parent.remove(element)
+    for offset, child in enumerate(children):
+        parent.insert(index + offset, child)
+    if children:
+        children[-1].tail = (children[-1].tail or "") + (tail or "")
+    elif tail:
+        if index > 0:
+            parent[index - 1].tail = (parent[index - 1].tail or "") + tail
+        else:
+            parent.text = (parent.text or "") + tail
+
+
+class CryptoBackendInProcess(CryptoBackend):
+    """pysaml2 crypto backend that verifies, signs, and decrypts in-process.
+
+    Accepts the same inputs and raises the same exceptions as pysaml2's `CryptoBackendXmlSec1`.
+    Parsed certificates are cached by content, parsed private keys by path (until the file changes).
+    Encryption is not implemented, as an SP never needs to encrypt.
+    """
+
+    @property
+    def version(self) -> str:
+        """Version, mimicking the newest xmlsec1 behaviour."""
+        return "1.3.0"
+
+    def validate_signature(
+        self,
+        signedtext: str | bytes,
+        cert_file: str,
+        cert_type: str,
+        node_name: str,
+        node_id: str | None,
+    ) -> bool:
+        """Validate the signature within the node of type `node_name` with ID `node_id`.
+
+        Returns True on success, raises `SignatureError` otherwise (as `CryptoBackendXmlSec1` does).
+        """
+        try:
+            tree = _parse_xml(signedtext)
+        except (etree.XMLSyntaxError, ValueError) as error:
+            msg = "could not parse signed XML"
+            raise SignatureError(msg) from error
+
+        signature = _find_signature(tree, node_name, node_id)
+        signed_info = signature.find(f"{{{DS_NS}}}SignedInfo")
+        signature_value = signature.findtext(f"{{{DS_NS}}}SignatureValue")
+        if signed_info is None or not signature_value:
+            msg = "<ds:Signature> is missing <ds:SignedInfo> or <ds:SignatureValue>"
+            raise SignatureError(msg)
+
+        key_type, hash_algorithm = _signature_method(signed_info)
+        # canonicalize <ds:SignedInfo> before the enveloped transform removes it from the document
+        signed_octets = _canonicalize_signed_info(signed_info)
+        references = signed_info.findall(f"{{{DS_NS}}}Reference")
+        if not references:
+            msg = "<ds:SignedInfo> has no <ds:Reference>"
+            raise SignatureError(msg)
+        for reference in references:
+            digest_value = reference.findtext(f"{{{DS_NS}}}DigestValue") or ""
+            expected = _b64decode(digest_value, SignatureError, "<ds:DigestValue>")
+            actual = _digest_reference(tree, reference, signature, _clark(node_name))
+            if not hmac.compare_digest(expected, actual):
+                msg = "digest of <ds:Reference> didn't match"
+                raise SignatureError(msg)
+
+        public_key = load_certificate_public_key(
+            Path(cert_file).read_bytes(),
+            cert_type,
+        )
+        signature_bytes = _b64decode(
+            signature_value,
+            SignatureError,
+            "<ds:SignatureValue>",
+        )
+        try:
+            if key_type == "rsa" and isinstance(public_key, rsa.RSAPublicKey):
+                public_key.verify(
+                    signature_bytes,
+                    signed_octets,
+                    padding.PKCS1v15(),
+                    hash_algorithm,
+                )
+            elif key_type == "ecdsa" and isinstance(
+                public_key,
+                ec.EllipticCurvePublicKey,
+            ):
+                # xmldsig encodes ECDSA signatures as r||s, cryptography expects DER
+                half = len(signature_bytes) // 2
+                public_key.verify(
+                    encode_dss_signature(
+                        int.from_bytes(signature_bytes[:half]),
+                        int.from_bytes(signature_bytes[half:]),
+                    ),
+                    signed_octets,
+                    ec.ECDSA(hash_algorithm),
+                )
+            else:
+                msg = "certificate's key doesn't fit <ds:SignatureMethod>"
+                raise SignatureError(msg)
+        except InvalidSignature as error:
+            msg = "signature verification failed"
+            raise SignatureError(msg) from error
+
+        return True
+
+    def sign_statement(
+        self,
+        statement: str | bytes,
+        node_name: str,
+        key_file: str,
+        node_id: str | None,
+    ) -> str:
+        """Fill in the (pre-filled, as via `saml2.sigver.pre_signature_part`) signature template."""
+        if not isinstance(statement, (str, bytes)):
+            statement = str(statement)
+        tree = _parse_xml(statement)
+        signature = _find_signature(tree, node_name, node_id)
+        signed_info = signature.find(f"{{{DS_NS}}}SignedInfo")
+        signature_value = signature.find(f"{{{DS_NS}}}SignatureValue")
+        if signed_info is None or signature_value is None:
+            msg = "<ds:Signature> template is missing <ds:SignedInfo> or <ds:SignatureValue>"
+            raise SignatureError(msg)
+
+        # digesting applies the enveloped transform, so digest on a copy to keep the signature in `tree`
+        scratch_tree = _parse_xml(etree.tostring(tree))
+        scratch_signature = _find_signature(scratch_tree, node_name, node_id)
+        scratch_references = scratch_signature.findall(
+            f"{{{DS_NS}}}SignedInfo/{{{DS_NS}}}Reference",
+        )
+        references = signed_info.findall(f"{{{DS_NS}}}Reference")
+        for reference, scratch_reference in zip(
+            references,
+            scratch_references,
+            strict=True,
+        ):
+            digest = _digest_reference(
+                scratch_tree,
+                scratch_reference,
+                scratch_signature,
+                _clark(node_name),
+            )
+            digest_value = reference.find(f"{{{DS_NS}}}DigestValue")
+            if digest_value is None:
+                digest_value = etree.SubElement(reference, f"{{{DS_NS}}}DigestValue")
+            digest_value.text = base64.b64encode(digest).decode("ascii")
+
+        key_type, hash_algorithm = _signature_method(signed_info)
+        signed_octets = _canonicalize_signed_info(signed_info)
+        private_key = load_private_key(key_file)
+        if key_type == "rsa" and isinstance(private_key, rsa.RSAPrivateKey):
+            signature_bytes = private_key.sign(
+                signed_octets,
+                padding.PKCS1v15(),
+                hash_algorithm,
+            )
+        elif key_type == "ecdsa" and isinstance(
+            private_key,
+            ec.EllipticCurvePrivateKey,
+        ):
+            r, s = decode_dss_signature(
+                private_key.sign(signed_octets, ec.ECDSA(hash_algorithm)),
+            )
+            coordinate_len = (private_key.curve.key_size + 7) // 8
+            signature_bytes = r.to_bytes(coordinate_len) + s.to_bytes(coordinate_len)
+        else:
+            msg = "private key doesn't fit <ds:SignatureMethod>"
+            raise SignatureError(msg)
+        signature_value.text = base64.b64encode(signature_bytes).decode("ascii")
+
+        return etree.tostring(tree, encoding="unicode")
+
+    def decrypt(self, enctext: str | bytes, key_file: str) -> str:
+        """Decrypt the first <xenc:EncryptedData> in `enctext`, return the whole document.
+
+        Mirrors `xmlsec1 --decrypt`: the <xenc:EncryptedData> is replaced by its decrypted content.
+        """
+        try:
+            tree = _parse_xml(enctext)
+        except (etree.XMLSyntaxError, ValueError) as error:
+            msg = "could not parse encrypted XML"
+            raise DecryptError(msg) from error
+
+        encrypted_data = next(tree.iter(f"{{{XENC_NS}}}EncryptedData"), None)
+        if encrypted_data is None:
+            msg = "no <xenc:EncryptedData> found"
+            raise DecryptError(msg)
+        encryption_method = encrypted_data.find(f"{{{XENC_NS}}}EncryptionMethod")
+        algorithm = (
+            encryption_method.get("Algorithm") if encryption_method is not None else ""
+        )
+        cipher_value = encrypted_data.findtext(
+            f"{{{XENC_NS}}}CipherData/{{{XENC_NS}}}CipherValue",
+        )
+        if not cipher_value:
+            msg = "<xenc:EncryptedData> without <xenc:CipherValue>"
+            raise DecryptError(msg)
+        encrypted = _b64decode(cipher_value, DecryptError, "<xenc:CipherValue>")
+
+        private_key = load_private_key(key_file)
+        plaintext = None
+        for encrypted_key in _candidate_encrypted_keys(tree, encrypted_data):
+            try:
+                session_key = _decrypt_session_key(encrypted_key, private_key)
+                plaintext = _decrypt_cipher_data(algorithm, session_key, encrypted)
+            except DecryptError:
+                continue
+            break
+        if plaintext is None:
+            msg = "no <xenc:EncryptedKey> was decryptable with given key"
+            raise DecryptError(msg)
+
+        if encrypted_data.get("Type") not in {f"{XENC_NS}Element", f"{XENC_NS}Content"}:
+            # xmlsec1 outputs the raw decrypted data for untyped <xenc:EncryptedData>
+            return plaintext.decode("utf-8")
+        try:
+            _replace_with_fragment(encrypted_data, plaintext)
+        except (etree.XMLSyntaxError, ValueError) as error:
+            msg = "decrypted data is not well-formed XML"
+            raise DecryptError(msg) from error
+        return etree.tostring(tree, encoding="unicode")
+
+
+in_process_crypto_backend = CryptoBackendInProcess()
+"""Module-level instance, s.t. its caches are shared between requests."""
+
+
+def load_pysaml2_config[C: Config](
+    config_dict: dict,
+    config_cls: type[C] = SPConfig,
+) -> C:
+    """Load pysaml2 config, accepting `IN_PROCESS_CRYPTO_BACKEND` as crypto backend."""
+    config = config_cls()
+    if config_dict.get("crypto_backend") != IN_PROCESS_CRYPTO_BACKEND:
+        config.load(config_dict)
+        return config
+
+    # pysaml2 refuses unknown crypto backends when building the metadata-store's security context
+    # load with pysaml2's binary-less backend instead, then swap in ours
+    config.load({**config_dict, "crypto_backend": "XMLSecurity"})
+    config.crypto_backend = IN_PROCESS_CRYPTO_BACKEND
+    return config
+
+
+def create_saml2_client(config: SPConfig) -> Saml2Client:
+    """Create a pysaml2 client, hooking up `CryptoBackendInProcess` if so configured.
+
+    Signature checks get IdPs' certificates via `CertCachingMetadataStore`, i.e. cached if the source caches them.
+    """
+    if config.crypto_backend != IN_PROCESS_CRYPTO_BACKEND:
+        return _with_cert_caching(Saml2Client(config))
+
+    # pysaml2 refuses unknown crypto backends when building its security context
+    # build with pysaml2's binary-less backend instead, then swap in ours
+    config.crypto_backend = "XMLSecurity"
+    try:
+        client = Saml2Client(config)
+    finally:
+        config.crypto_backend = IN_PROCESS_CRYPTO_BACKEND
+    client.sec.crypto = in_process_crypto_backend
+    if key_file := config.getattr("key_file", ""):
+        # pysaml2's xmlsec1 backend sets this up for HTTP-Redirect binding signatures
+        client.sec.sec_backend = RSACrypto(load_private_key(key_file))
+    return _with_cert_caching(client)
+
+
+def _with_cert_caching(client: Saml2Client) -> Saml2Client:
+    """Have `client`'s signature checks ask metadata-sources for certificates."""
+    if isinstance(client.sec.metadata, MetadataStore):
+        client.sec.metadata = CertCachingMetadataStore.from_store(client.sec.metadata)
+    return client
+
+
+def create_security_context(config: Config) -> SecurityContext:
+    """Create a pysaml2 security context, hooking up `CryptoBackendInProcess` if so configured."""
+    if config.crypto_backend != IN_PROCESS_CRYPTO_BACKEND:
+        return security_context(config)
+
+    # same as in `create_saml2_client`
+    config.crypto_backend = "XMLSecurity"
+    try:
+        sec = security_context(config)
+    finally:
+        config.crypto_backend = IN_PROCESS_CRYPTO_BACKEND
+    sec.crypto = in_process_crypto_backend
+    return sec
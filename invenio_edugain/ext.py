@@ -7,18 +7,23 @@
 
 """Flask-extension setup for invenio-edugain."""
 
+from functools import cached_property
 from traceback import format_exception
+from typing import TYPE_CHECKING
 
 from flask import Flask
 
 from . import config
-from .build_config import (
-    Pysaml2ConfigCore,
-    UninitializedConfig,
-    build_pysaml2_config,
-    build_shibboleth_eds_config,
-)
-from .build_config.pysaml2 import JSONplusTuples  # noqa: TC001
+from .metrics import MetricsSink, load_metrics_sink
+
+# pysaml2-machinery is imported on first use, as it's slow to import
+if TYPE_CHECKING:
+    from .authn_request import AuthnRequestTemplates
+    from .build_config.pysaml2 import JSONplusTuples
+    from .build_config.utils import JSON, UninitializedConfig
+    from .feed import FeedVariantCache
+    from .revalidate import MetadataSnapshot, StaleWhileRevalidate
+    from .sp_metadata import SPMetadataCache
 
 
 class InvenioEdugain:
@@ -32,6 +37,13 @@ class InvenioEdugain:
     def init_app(self, app: Flask) -> None:
         """Flask application initialization."""
         self.init_config(app)
+        self.metrics_sink: MetricsSink | None = None  # set on app-finalization
+        self._authn_request_templates: AuthnRequestTemplates | None = None
+        # created on first use, see `revalidate.current_metadata_snapshot`
+        self.metadata_snapshot_holder: StaleWhileRevalidate[MetadataSnapshot] | None
+        self.metadata_snapshot_holder = None
+        # set once no IdP lacks extracted columns, see `extraction.extract_missing_columns`
+        self.missing_columns_extracted = False
         app.extensions["invenio-edugain"] = self
 
     def init_config(self, app: Flask) -> None:
@@ -40,44 +52,126 @@ class InvenioEdugain:
             if k.startswith("EDUGAIN_"):
                 app.config.setdefault(k, getattr(config, k))
 
+    @cached_property
+    def sp_metadata_cache(self) -> "SPMetadataCache":
+        """Cache of rendered SP-metadata."""
+        from .sp_metadata import SPMetadataCache  # noqa: PLC0415
+
+        return SPMetadataCache()
+
+    @cached_property
+    def feed_variant_cache(self) -> "FeedVariantCache":
+        """Cache of serialized variants of the disco feed."""
+        from .feed import FeedVariantCache  # noqa: PLC0415
+
+        return FeedVariantCache()
+
+    def authn_request_templates(
+        self,
+        config_dict: dict[str, "JSONplusTuples"],
+    ) -> "AuthnRequestTemplates":
+        """Get AuthnRequest templates of given pysaml2 config, precomputing them on first use."""
+        from .authn_request import AuthnRequestTemplates  # noqa: PLC0415
+        from .utils import NS_PREFIX  # noqa: PLC0415
+
+        templates = self._authn_request_templates
+        if templates is None or templates.config_dict is not config_dict:
+            templates = AuthnRequestTemplates(config_dict, NS_PREFIX)
+            self._authn_request_templates = templates
+        return templates
+
 
 def finalize_app(app: Flask) -> None:
     """Finalize app."""
     setup_configuration(app)
+    extension = app.extensions["invenio-edugain"]
+    extension.metrics_sink = load_metrics_sink(app.config.get("EDUGAIN_METRICS_SINK"))
 
-
-def setup_configuration(app: Flask) -> None:
-    """Automatic setup of configuration (insofar enabled)."""
-    if app.config.get("EDUGAIN_PYSAML2_CONFIG_BUILDING_ENABLED", True):
-        pysaml2_config: UninitializedConfig | dict[str, JSONplusTuples]
+    pysaml2_config = app.config.get("EDUGAIN_PYSAML2_CONFIG")
+    if isinstance(pysaml2_config, dict):
+        # precompute on startup rather than on first login
         try:
-            config_core = Pysaml2ConfigCore(flask_config=app.config)
-            pysaml2_config = build_pysaml2_config(app=app, config_core=config_core)
+            extension.authn_request_templates(pysaml2_config)
         except Exception as exception:  # noqa: BLE001
-            exception.add_note(
-                "note: occured when automatically building pysaml2 config on startup\n"
-                "either make sure app.config is correct or turn off automatic building and build yourself\n"
-                "automatic building can be turned off via `EDUGAIN_PYSAML2_CONFIG_BUILDING_ENABLED`.",
-            )
-            msg = "".join(format_exception(exception))
-            app.logger.warning(msg)
+            log_msg = f"couldn't precompute AuthnRequest templates, retrying on first login: {exception!r}"
+            app.logger.warning(log_msg)
+
+
+def setup_configuration(app: Flask) -> None:
+    """Automatic setup of configuration (insofar enabled).
+
+    Built configurations are reused from an on-disk cache while what they're built from stays the same.
+    """
+    from .build_config.cache import ConfigCache  # noqa: PLC0415
+
+    cache = ConfigCache.for_app(app)
+    cached_configs = cache.load() if cache is not None else {}
+    built_configs: dict[str, JSONplusTuples] = {}
 
-            pysaml2_config = UninitializedConfig(exception)
+    if app.config.get("EDUGAIN_PYSAML2_CONFIG_BUILDING_ENABLED", True):
+        pysaml2_config = cached_configs.get("EDUGAIN_PYSAML2_CONFIG")
+        if pysaml2_config is None:
+            pysaml2_config = build_pysaml2_config_on_startup(app)
+            if isinstance(pysaml2_config, dict):
+                built_configs["EDUGAIN_PYSAML2_CONFIG"] = pysaml2_config
         app.config["EDUGAIN_PYSAML2_CONFIG"] = pysaml2_config
 
     if app.config.get("EDUGAIN_SHIBBOLETH_EDS_CONFIG_BUILDING_ENABLED", True):
-        shibboleth_kwargs = (
-            app.config.get("EDUGAIN_SHIBBOLETH_EDS_CONFIG_KWARGS", {}) or {}
-        )
+        shibboleth_eds_config = cached_configs.get("EDUGAIN_SHIBBOLETH_EDS_CONFIG")
+        if shibboleth_eds_config is None:
+            shibboleth_eds_config = build_shibboleth_eds_config_on_startup(app)
+            built_configs["EDUGAIN_SHIBBOLETH_EDS_CONFIG"] = shibboleth_eds_config
+        app.config["EDUGAIN_SHIBBOLETH_EDS_CONFIG"] = shibboleth_eds_config
+
+    if cache is not None and built_configs:
         try:
-            shibboleth_eds_config = build_shibboleth_eds_config(
-                app,
-                **shibboleth_kwargs,
+            cache.store(cached_configs | built_configs)
+        except (OSError, TypeError) as exception:
+            log_msg = (
+                f"couldn't cache built configuration at {cache.path}: {exception!r}"
             )
-        except Exception as exception:
-            exception.add_note(
-                "when automatically building shibboleth-eds config on startup\n"
-                "automatic building can be turned off via `EDUGAIN_SHIBBOLETH_EDS_CONFIG_BUILDING_ENABLED`.",
-            )
-            raise
-        app.config["EDUGAIN_SHIBBOLETH_EDS_CONFIG"] = shibboleth_eds_config
+            app.logger.warning(log_msg)
+
+
+def build_pysaml2_config_on_startup(
+    app: Flask,
+) -> "UninitializedConfig | dict[str, JSONplusTuples]":
+    """Build pysaml2 config from `app.config`, log and wrap exceptions rather than raising."""
+    from .build_config import (  # noqa: PLC0415
+        Pysaml2ConfigCore,
+        UninitializedConfig,
+        build_pysaml2_config,
+    )
+
+    try:
+        config_core = Pysaml2ConfigCore(flask_config=app.config)
+        return build_pysaml2_config(
+            app=app,
+            config_core=config_core,
+            crypto_backend=app.config.get("EDUGAIN_CRYPTO_BACKEND", "xmlsec1"),
+        )
+    except Exception as exception:  # noqa: BLE001
+        exception.add_note(
+            "note: occured when automatically building pysaml2 config on startup\n"
+            "either make sure app.config is correct or turn off automatic building and build yourself\n"
+            "automatic building can be turned off via `EDUGAIN_PYSAML2_CONFIG_BUILDING_ENABLED`.",
+        )
+        msg = "".join(format_exception(exception))
+        app.logger.warning(msg)
+
+        return UninitializedConfig(exception)
+
+
+def build_shibboleth_eds_config_on_startup(app: Flask) -> "dict[str, JSON]":
+    """Build shibboleth-eds config from `app.config`."""
+    from .build_config import build_shibboleth_eds_config  # noqa: PLC0415
+
+    shibboleth_kwargs = app.config.get("EDUGAIN_SHIBBOLETH_EDS_CONFIG_KWARGS", {}) or {}
+    try:
+        return build_shibboleth_eds_config(app, **shibboleth_kwargs)
+    except Exception as exception:
+        exception.add_note(
+            "when automatically building shibboleth-eds config on startup\n"
+            "automatic building can be turned off via `EDUGAIN_SHIBBOLETH_EDS_CONFIG_BUILDING_ENABLED`.",
+        )
+        raise
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Extraction of IdPs' display data from their settings into dedicated columns.
+
+Values are extracted on ingest, s.t. discovery and search are answered by narrow queries,
+rather than by deserializing whole entity documents via pysaml2.
+Rows ingested before a column existed are extracted by the next ingest or `manage` (see `extract_missing_columns`),
+until then the disco feed extracts them in memory, s.t. serving it stays read-only.
+Entity attributes (entity categories, assurance certifications, ...) are extracted into
+their own table (see `replace_entity_attributes`), to find IdPs by them via an index.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+from flask import current_app
+from invenio_db import db
+from sqlalchemy import ColumnElement, or_
+
+from .models import IdPData, IdPEntityAttribute
+
+# imported by views, hence pysaml2 is only imported on first use
+if TYPE_CHECKING:
+    from saml2.mdstore import MetadataStore
+
+REGISTRATION_INFO_CLASS = "urn:oasis:names:tc:SAML:metadata:rpi&RegistrationInfo"
+ENTITY_ATTRIBUTES_CLASS = "urn:oasis:names:tc:SAML:metadata:attribute&EntityAttributes"
+ENTITY_CATEGORY_ATTRIBUTE = "http://macedir.org/entity-category"
+ASSURANCE_CERTIFICATION_ATTRIBUTE = (
+    "urn:oasis:names:tc:SAML:attribute:assurance-certification"
+)
+# IdPs of this entity-category mustn't be shown in discovery services
+HIDE_FROM_DISCOVERY_CATEGORY = "http://refeds.org/category/hide-from-discovery"
+
+
+def _extension_elements(settings: dict[str, Any], cls: str) -> list[dict[str, Any]]:
+    """Get elements of class `cls` from `settings`' top-level extensions."""
+    return [
+        element
+        for element in settings.get("extensions", {}).get("extension_elements", [])
+        if element.get("__class__") == cls
+    ]
+
+
+def registration_authority(settings: dict[str, Any]) -> str | None:
+    """Get registration authority (i.e. federation) that registered the IdP of `settings`."""
+    for element in _extension_elements(settings, REGISTRATION_INFO_CLASS):
+        return element.get("registration_authority")
+    return None
+
+
+def entity_attributes(settings: dict[str, Any]) -> list[tuple[str, str]]:
+    """Get (name, value)-pairs of entity attributes of the IdP of `settings`, deduplicated."""
+    pairs = {
+        (attribute["name"], value["text"]): None
+        for element in _extension_elements(settings, ENTITY_ATTRIBUTES_CLASS)
+        for attribute in element.get("attribute", [])
+        if "name" in attribute
+        for value in attribute.get("attribute_value", [])
+        if "text" in value
+    }
+    return list(pairs)
+
+
+def entity_categories(settings: dict[str, Any]) -> list[str]:
+    """Get entity categories of the IdP of `settings`."""
+    return [
+        value
+        for name, value in entity_attributes(settings)
+        if name == ENTITY_CATEGORY_ATTRIBUTE
+    ]
+
+
+def hidden_from_discovery(settings: dict[str, Any]) -> bool:
+    """Whether the IdP of `settings` asks to be hidden from discovery services."""
+    return HIDE_FROM_DISCOVERY_CATEGORY in entity_categories(settings)
+
+
+def search_terms(mds: "MetadataStore", idp_id: str) -> list[str]:
+    """Get names and keywords of IdP, as found in its metadata."""
+    terms = list(mds.mdui_uiinfo_display_name(idp_id))
+    if name := mds.name(idp_id):
+        terms.append(name)
+    terms.extend(
+        keyword_dict["text"]
+        for uiinfo in mds.mdui_uiinfo(idp_id)
+        for keyword_dict in uiinfo.get("keywords", [])
+    )
+    return terms
+
+
+def search_text(mds: "MetadataStore", idp_id: str) -> str:
+    """Get text to search IdP by: its entity-id, names, and keywords, one per line."""
+    return "\n".join([idp_id, *search_terms(mds, idp_id)])
+
+
+def _lang_values(texts: Iterable[dict[str, str]]) -> list[dict[str, str]]:
+    return [{"lang": text["lang"], "value": text["text"]} for text in texts]
+
+
+def extracted_columns(mds: "MetadataStore", idp_id: str) -> dict[str, Any]:
+    """Get values of `IdPData`'s columns that are extracted from the IdP's settings."""
+    settings = mds[idp_id]
+    uiinfos = list(mds.mdui_uiinfo(idp_id))
+    organization = settings.get("organization", {})
+    organization_names = _lang_values(
+        [
+            *organization.get("organization_display_name", []),
+            *organization.get("organization_name", []),
+        ],
+    )
+    organization_urls = _lang_values(organization.get("organization_url", []))
+
+    # names ordered by relevance, organization's as fallback
+    names_by_lang = defaultdict(list)
+    for uiinfo in uiinfos:
+        for display_name in uiinfo.get("display_name", []):
+            names_by_lang[display_name["lang"]].append(display_name["text"])
+    for name in [*organization_names, *organization_urls]:
+        names_by_lang[name["lang"]].append(name["value"])
+
+    logos = []
+    for uiinfo in uiinfos:
+        for logo in uiinfo.get("logo", []):
+            logo_entry = {
+                "value": logo["text"],
+                "height": logo["height"],
+                "width": logo["width"],
+            }
+            if "lang" in logo:
+                logo_entry["lang"] = logo["lang"]
+            logos.append(logo_entry)
+
+    return {
+        "display_names": [
+            {"lang": lang, "value": names[0]} for lang, names in names_by_lang.items()
+        ],
+        "keywords": _lang_values(
+            keyword for uiinfo in uiinfos for keyword in uiinfo.get("keywords", [])
+        ),
+        "logos": logos,
+        "organization_names": organization_names,
+        "organization_urls": organization_urls,
+        "registration_authority": registration_authority(settings),
+        "search_text": search_text(mds, idp_id),
+    }
+
+
+def metadata_store(idps: Iterable[IdPData]) -> "MetadataStore":
+    """Get in-memory metadata-store of given IdPs' settings, for pysaml2's accessors."""
+    from saml2.mdstore import InMemoryMetaData, MetadataStore  # noqa: PLC0415
+
+    mds = MetadataStore(None, {})
+    metadata = InMemoryMetaData(mds.attrc)
+    mds.metadata["db"] = metadata
+    for idp in idps:
+        metadata.entity[idp.id] = idp.settings
+    return mds
+
+
+def extract_missing_columns() -> int:
+    """Extract columns of IdPs that were ingested before those columns existed.
+
+    Returns number of updated IdPs. Doesn't commit.
+    Once none were missing, this process doesn't look again,
+    as ingest and snapshot-imports extract the columns of all rows they write.
+    """
+    extension = current_app.extensions["invenio-edugain"]
+    if extension.missing_columns_extracted:
+        return 0
+    idps = db.session.scalars(
+        db.select(IdPData).where(
+            or_(IdPData.search_text.is_(None), IdPData.display_names.is_(None)),
+        ),
+    ).all()
+    if not idps:
+        extension.missing_columns_extracted = True
+        return 0
+
+    mds = metadata_store(idps)
+    for idp in idps:
+        for column, value in extracted_columns(mds, idp.id).items():
+            setattr(idp, column, value)
+    return len(idps)
+
+
+def replace_entity_attributes(settings_by_id: dict[str, dict[str, Any]]) -> None:
+    """Replace entity attributes of IdPs with those found in their given settings.
+
+    Takes one DELETE and one (executemany-)INSERT, no matter how many IdPs.
+    IdPs must already be flushed to db. Doesn't commit.
+    """
+    if not settings_by_id:
+        return
+    table = IdPEntityAttribute.__table__
+    db.session.execute(
+        db.delete(table).where(table.c.idp_id.in_(list(settings_by_id))),
+    )
+    rows = [
+        {"idp_id": idp_id, "name": name, "value": value}
+        for idp_id, settings in settings_by_id.items()
+        for name, value in entity_attributes(settings)
+    ]
+    if rows:
+        db.session.execute(db.insert(table), rows)
+
+
+def has_entity_category(category: str) -> ColumnElement[bool]:
+    """Get SQL-expression that's true for rows of `IdPData` with entity-category `category`."""
+    return (
+        db.select(IdPEntityAttribute)
+        .where(
+            IdPEntityAttribute.idp_id == IdPData.id,
+            IdPEntityAttribute.name == ENTITY_CATEGORY_ATTRIBUTE,
+            IdPEntityAttribute.value == category,
+        )
+        .exists()
+    )
@@ -0,0 +1,701 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Discovery feed for shibboleth-EDS, and its export to static files.
+
+The feed only changes on ingest and `invenio edugain manage`.
+When `EDUGAIN_FEED_EXPORT_DIR` is configured, it's written there after each such change,
+under a content-hashed filename (plus pre-compressed variants),
+s.t. a web-server or CDN can serve it as immutable and the app never sees feed traffic.
+A pointer-file names the latest export, from which shibboleth-EDS' `dataSource` is set.
+
+Changes of the feed are also recorded per IdP in a revisioned change log (see `DiscoFeedEntry`),
+s.t. browsers holding the feed of an earlier revision only fetch what changed since.
+
+The whole feed holds every language's names and keywords and every logo,
+of which a discovery page shows one each. `FeedVariant`s slim it down to those,
+for a single language; they're cached per revision and exported per language.
+"""
+
+import base64
+import binascii
+import gzip
+import hashlib
+import json
+import math
+from collections import defaultdict
+from collections.abc import Collection, Iterable, Mapping
+from dataclasses import dataclass
+from itertools import batched
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from typing import Any
+from urllib.parse import unquote
+
+from flask import Flask, current_app
+from invenio_db import db
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from .extraction import (
+    HIDE_FROM_DISCOVERY_CATEGORY,
+    extracted_columns,
+    has_entity_category,
+    metadata_store,
+)
+from .metrics import timed_stage
+from .models import CachedLogo, DiscoFeedEntry, DiscoFeedRevision, IdPData
+from .replica import read_replica
+
+try:
+    import brotli
+except ImportError:  # optional, only the gzip-compressed variant gets written without
+    brotli = None
+
+FEED_FILENAME_PREFIX = "discofeed."
+LATEST_POINTER_FILENAME = "discofeed.latest"
+# previous exports may still be referenced by discovery pages in browser-caches
+KEPT_EXPORTS = 3
+
+# pointer-file's path -> ((mtime [ns], inode), filename of latest export)
+_latest_export_by_pointer: dict[Path, tuple[tuple[int, int], str]] = {}
+# shibboleth-EDS' default of `maxPreferredIdPs`
+MAX_PREFERRED_IDPS = 3
+# name of cookie in which shibboleth-EDS keeps the IdPs chosen before
+SAML_IDP_COOKIE = "_saml_idp"
+
+# bound on variants held by `FeedVariantCache` (of the current revision) and by metadata snapshots,
+# which evict the least recently used variant beyond it
+MAX_CACHED_VARIANTS = 64
+
+
+def _cached_logos(*, from_replica: bool = False) -> dict[str, Any] | None:
+    """Get logos stored locally by URL, `None` when logos aren't cached (see `invenio_edugain.logos`)."""
+    if (
+        current_app.config.get("EDUGAIN_LOGO_CACHE_DIR") is None
+        or "invenio_edugain.logo" not in current_app.view_functions
+    ):
+        return None
+    query = db.select(
+        CachedLogo.url,
+        CachedLogo.filename,
+        CachedLogo.width,
+        CachedLogo.height,
+        CachedLogo.data_uri,
+    ).where(CachedLogo.filename.is_not(None))
+    with timed_stage("query"):
+        if from_replica:
+            rows = read_replica.execute(query)
+        else:
+            rows = db.session.execute(query).all()
+        return {row.url: row for row in rows}
+
+
+def _cached_logo_entry(
+    logo: dict[str, Any],
+    cached_logos: dict[str, Any],
+) -> dict[str, Any] | None:
+    """Point feed's logo-entry to its locally stored logo, `None` when it isn't stored."""
+    if logo["value"].startswith("data:"):
+        return logo
+    cached = cached_logos.get(logo["value"])
+    if cached is None:
+        # shibboleth-EDS shows its default logo instead
+        return None
+    entry = dict(logo)
+    if cached.width is not None:
+        # resized
+        entry |= {"width": cached.width, "height": cached.height}
+    if cached.data_uri is not None and entry["width"] == entry["height"]:
+        # small icons cost less inlined than as another request
+        entry["value"] = cached.data_uri
+    else:
+        entry["value"] = current_app.url_map.bind("").build(
+            "invenio_edugain.logo",
+            {"filename": cached.filename},
+        )
+    return entry
+
+
+def _extract_in_memory(
+    idp_ids: Collection[str],
+    *,
+    from_replica: bool = False,
+) -> dict[str, dict[str, Any]]:
+    """Extract columns of IdPs ingested before those columns existed, without writing them.
+
+    Keeps building the feed read-only, the db is backfilled by the next ingest or `manage`
+    (see `extract_missing_columns`).
+    """
+    if not idp_ids:
+        return {}
+    query = db.select(IdPData.id, IdPData.settings).where(IdPData.id.in_(idp_ids))
+    if from_replica:
+        rows = read_replica.execute(query)
+    else:
+        rows = db.session.execute(query).all()
+    mds = metadata_store(rows)
+    return {row.id: extracted_columns(mds, row.id) for row in rows}
+
+
+def build_feed(
+    federations: Collection[str] | None = None,
+    idp_ids: Collection[str] | None = None,
+    *,
+    from_replica: bool = False,
+) -> list[dict[str, Any]]:
+    """Build disco feed of enabled, discoverable IdPs, optionally of given `federations` only.
+
+    With `idp_ids`, only the entries of those IdPs (insofar in the feed) are built.
+    With `from_replica`, it's built from the read replica (see `invenio_edugain.replica`),
+    which may lag behind, hence not for what was just written.
+    """
+    with timed_stage("query"):
+        discoverable_query = (
+            db.select(
+                IdPData.id,
+                IdPData.display_names,
+                IdPData.keywords,
+                IdPData.logos,
+            )
+            .where(
+                IdPData.discoverable == db.true(),
+                IdPData.enabled == db.true(),
+                # even if made discoverable by hand
+                ~has_entity_category(HIDE_FROM_DISCOVERY_CATEGORY),
+            )
+            .order_by(IdPData.id)
+        )
+        if federations:
+            discoverable_query = discoverable_query.where(
+                IdPData.registration_authority.in_(federations),
+            )
+        if idp_ids is not None:
+            discoverable_query = discoverable_query.where(IdPData.id.in_(idp_ids))
+        if from_replica:
+            rows = read_replica.execute(discoverable_query)
+        else:
+            rows = db.session.execute(discoverable_query).all()
+
+    unextracted = _extract_in_memory(
+        [
+            row.id
+            for row in rows
+            if None in (row.display_names, row.keywords, row.logos)
+        ],
+        from_replica=from_replica,
+    )
+    cached_logos = _cached_logos(from_replica=from_replica)
+    with timed_stage("build_feed"):
+        feed = []
+        for row in rows:
+            display_names, keywords, logos = row.display_names, row.keywords, row.logos
+            if row.id in unextracted:
+                columns = unextracted[row.id]
+                display_names, keywords, logos = (
+                    columns["display_names"],
+                    columns["keywords"],
+                    columns["logos"],
+                )
+            logo_entries = list(logos)
+            if cached_logos is not None:
+                logo_entries = [
+                    cached
+                    for logo in logo_entries
+                    if (cached := _cached_logo_entry(logo, cached_logos)) is not None
+                ]
+            if not any(le["height"] == le["width"] for le in logo_entries):
+                # add fallback for small icon showing next to dropdown choices
+                logo_entries.append(
+                    {
+                        "value": "/static/transparent-16x16.png",
+                        "height": 16,
+                        "width": 16,
+                    },
+                )
+
+            # entry is one item in the feed
+            feed.append(
+                {
+                    "entityID": row.id,
+                    "DisplayNames": display_names,
+                    "Keywords": keywords,
+                    "Logos": logo_entries,
+                },
+            )
+
+    return feed
+
+
+def serialize_feed(feed: list[dict[str, Any]]) -> bytes:
+    """Serialize (a variant of) the disco feed compactly."""
+    return json.dumps(feed, separators=(",", ":")).encode("utf-8")
+
+
+def _logo_size(logo: Mapping[str, Any]) -> tuple[int, int] | None:
+    """Get (width, height) of a feed's logo-entry, `None` if not given as numbers."""
+    try:
+        return int(logo["width"]), int(logo["height"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def app_languages(app: Flask) -> list[str]:
+    """Get the app's languages (lowercased), its default locale first."""
+    config = app.config
+    languages = [
+        config.get("BABEL_DEFAULT_LOCALE", "en"),
+        *(code for code, _name in config.get("I18N_LANGUAGES", [])),
+    ]
+    return list(dict.fromkeys(lang.lower() for lang in languages))
+
+
+@dataclass(frozen=True)
+class FeedVariant:
+    """Variant of the disco feed, slimmed down to what a discovery page in `lang` shows.
+
+    Selection mirrors shibboleth-EDS': the localized entry is the first one of
+    `lang`, its major language, no language, or `default_lang`.
+    Of the logos, only the best fit for the default logo's aspect ratio is kept,
+    plus the square icon shown next to dropdown choices.
+    """
+
+    lang: str
+    keywords: bool = True
+    logo_width: int = 80
+    logo_height: int = 60
+    min_logo_width: int = 20
+    min_logo_height: int = 20
+    default_lang: str = "en"
+
+    @classmethod
+    def for_app(cls, app: Flask, lang: str) -> "FeedVariant":
+        """Create variant for `lang`, matching the app's shibboleth-EDS configuration.
+
+        `lang` is narrowed to one of the app's languages (see `app_languages`):
+        itself, else its major language, else the default locale.
+        Hence there are only as many variants as configured languages, whatever is requested.
+        """
+        languages = app_languages(app)
+        lang = lang.lower()
+        if lang not in languages:
+            major_lang = lang.split("-")[0]
+            lang = major_lang if major_lang in languages else languages[0]
+        eds_config = app.config.get("EDUGAIN_SHIBBOLETH_EDS_CONFIG")
+        if not isinstance(eds_config, Mapping):  # not built (yet)
+            eds_config = {}
+        return cls(
+            lang=lang,
+            keywords=not eds_config.get("ignoreKeywords", False),
+            logo_width=eds_config.get("defaultLogoWidth", cls.logo_width),
+            logo_height=eds_config.get("defaultLogoHeight", cls.logo_height),
+            min_logo_width=eds_config.get("minWidth", cls.min_logo_width),
+            min_logo_height=eds_config.get("minHeight", cls.min_logo_height),
+            default_lang=eds_config.get("defaultLanguage", cls.default_lang),
+        )
+
+    @property
+    def languages(self) -> list[str | None]:
+        """Languages in order of preference, `None` for entries without language."""
+        major_lang = self.lang.split("-")[0]
+        return list(dict.fromkeys([self.lang, major_lang, None, self.default_lang]))
+
+    def localized(self, entries: list[dict[str, Any]] | None) -> list[dict[str, Any]]:
+        """Get the (at most one) entry of `entries` shown in this variant's language."""
+        for lang in self.languages:
+            for entry in entries or []:
+                if entry.get("lang") == lang:
+                    return [entry]
+        return []
+
+    def best_logos(self, logos: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Get the best-fitting logo and the square icon, of `logos`."""
+        fitting = []
+        for logo in logos:
+            size = _logo_size(logo)
+            if (
+                size is not None
+                and size[0] >= self.min_logo_width
+                and size[1] >= self.min_logo_height
+            ):
+                fitting.append((logo, size))
+        best_ratio = math.log(self.logo_width / self.logo_height)
+        # EDS prefers logos of exactly its language, before falling back to any
+        preferred = [
+            (logo, size) for logo, size in fitting if logo.get("lang") == self.lang
+        ]
+        best = min(
+            preferred or fitting,
+            # min keeps the first of equally good fits, as EDS does
+            key=lambda logo_size: abs(
+                best_ratio - math.log(logo_size[1][0] / logo_size[1][1]),
+            ),
+            default=(None, None),
+        )[0]
+        icon = next(
+            (
+                logo
+                for logo in logos
+                if logo["height"] == logo["width"]
+                and logo.get("lang") in self.languages
+            ),
+            None,
+        )
+        slimmed = [] if best is None else [best]
+        if icon is not None and icon is not best:
+            slimmed.append(icon)
+        return slimmed
+
+    def slim(self, entry: dict[str, Any]) -> dict[str, Any]:
+        """Slim down an entry of the disco feed to this variant."""
+        return {
+            "entityID": entry["entityID"],
+            "DisplayNames": self.localized(entry["DisplayNames"]),
+            "Keywords": self.localized(entry["Keywords"]) if self.keywords else [],
+            "Logos": self.best_logos(entry["Logos"]),
+        }
+
+
+def parse_saml_idp_cookie(value: str) -> list[str]:
+    """Parse entity-ids from shibboleth-EDS' `_saml_idp` cookie, most recently chosen first.
+
+    The cookie holds url-encoded, base64-encoded entity-ids, separated by (encoded) spaces.
+    Malformed parts are skipped, as the cookie is set client-side.
+    """
+    entity_ids = []
+    for part in reversed(value.replace("+", "%20").replace(" ", "%20").split("%20")):
+        encoded = unquote(part.strip())
+        if not encoded:
+            continue
+        try:
+            # EDS pads, but other discovery services sharing the cookie may not
+            decoded = base64.b64decode(
+                encoded + "=" * (-len(encoded) % 4),
+                validate=True,
+            )
+            entity_ids.append(decoded.decode("utf-8"))
+        except (binascii.Error, UnicodeDecodeError):
+            continue
+    return entity_ids
+
+
+def preferred_feed(
+    idp_ids: Iterable[str],
+    variant: FeedVariant,
+    max_idps: int = MAX_PREFERRED_IDPS,
+    feed: list[dict[str, Any]] | None = None,
+) -> list[dict[str, Any]]:
+    """Get feed entries of the first `max_idps` of `idp_ids`, slimmed down to `variant`.
+
+    This is what the discovery page needs to show its shortcut buttons, before the whole feed loaded.
+    IdPs that aren't in the feed are left out.
+    Entries are taken from `feed` if given, rather than built from db.
+    """
+    idp_ids = list(dict.fromkeys(idp_ids))[:max_idps]
+    if not idp_ids:
+        return []
+    if feed is None:
+        entries = build_feed(idp_ids=idp_ids)
+    else:
+        wanted = set(idp_ids)
+        entries = [entry for entry in feed if entry["entityID"] in wanted]
+    return [variant.slim(entry) for entry in entries]
+
+
+class FeedVariantCache:
+    """Holds serialized variants of the disco feed of one revision, builds anew when the revision changes."""
+
+    def __init__(self, max_size: int = MAX_CACHED_VARIANTS) -> None:
+        """Init."""
+        self._lock = Lock()
+        self._max_size = max_size
+        self._revision: int | None = None
+        self._variants: dict[tuple[FeedVariant, tuple[str, ...]], bytes] = {}
+
+    def get(self, variant: FeedVariant, federations: Collection[str] = ()) -> bytes:
+        """Get serialized `variant` of disco feed (of `federations` only, if given).
+
+        As variants are only built anew for a new revision,
+        changes must be recorded (see `record_feed_changes`) to show up here.
+        Revision and variants are read from the read replica, if configured.
+        """
+        revision = current_feed_revision(from_replica=True)
+        key = (variant, tuple(sorted(federations)))
+        with self._lock:
+            if self._revision != revision:
+                self._variants.clear()
+                self._revision = revision
+            content = self._variants.pop(key, None)
+            if content is not None:
+                # re-inserted as most recently used
+                self._variants[key] = content
+        if content is None:
+            feed = build_feed(federations=federations, from_replica=True)
+            content = serialize_feed([variant.slim(entry) for entry in feed])
+            with self._lock:
+                if self._revision == revision:
+                    store_evicting_lru(self._variants, key, content, self._max_size)
+        return content
+
+
+def store_evicting_lru[K, V](
+    cache: dict[K, V],
+    key: K,
+    value: V,
+    max_size: int,
+) -> None:
+    """Store `value` in `cache` (ordered by use, least recent first), evicting beyond `max_size`.
+
+    Callers hold the cache's lock.
+    """
+    cache.pop(key, None)
+    cache[key] = value
+    while len(cache) > max_size:
+        del cache[next(iter(cache))]
+
+
+def write_atomically(path: Path, content: bytes) -> None:
+    """Write `content` to `path`, s.t. readers never see a partially written file."""
+    with NamedTemporaryFile(dir=path.parent, prefix=".tmp-", delete=False) as file:
+        try:
+            file.write(content)
+        except BaseException:
+            Path(file.name).unlink()
+            raise
+    Path(file.name).chmod(0o644)
+    Path(file.name).replace(path)
+
+
+def _export_content(directory: Path, name: str, content: bytes) -> str:
+    """Export `content` (plus compressed variants) as `<name>.<hash>.json`, point `<name>.latest` to it."""
+    digest = hashlib.sha256(content).hexdigest()[:16]
+    filename = f"{name}.{digest}.json"
+    path = directory / filename
+    if path.exists():
+        # mark as latest for pruning
+        path.touch()
+    else:
+        # compressed variants first, s.t. they exist once the export is found
+        # mtime=0 keeps the gzip-file's bytes a function of the content
+        write_atomically(
+            path.with_name(f"{filename}.gz"),
+            gzip.compress(content, compresslevel=9, mtime=0),
+        )
+        if brotli is not None:
+            write_atomically(path.with_name(f"{filename}.br"), brotli.compress(content))
+        write_atomically(path, content)
+    write_atomically(directory / f"{name}.latest", filename.encode("utf-8"))
+    return filename
+
+
+def _prune_exports(directory: Path) -> None:
+    """Remove all but the latest `KEPT_EXPORTS` exports of each feed variant."""
+    exports_by_name = defaultdict(list)
+    for export in directory.glob(f"{FEED_FILENAME_PREFIX}*.json"):
+        # "<name>.<hash>.json"
+        exports_by_name[export.name.rsplit(".", 2)[0]].append(export)
+    for exports in exports_by_name.values():
+        exports.sort(key=lambda export: export.stat().st_mtime_ns, reverse=True)
+        for outdated in exports[KEPT_EXPORTS:]:
+            for variant in (outdated, *directory.glob(f"{outdated.name}.*")):
+                variant.unlink(missing_ok=True)
+
+
+def export_feed(directory: Path, variants: Iterable["FeedVariant"] = ()) -> str:
+    """Export disco feed (plus compressed variants) to `directory`, returns its filename.
+
+    Exports are named by a hash of their content, hence immutable.
+    The pointer-file is updated to name this export, all but the latest `KEPT_EXPORTS` get removed.
+    Each of `variants` is exported alongside, with its own pointer-file `discofeed.<lang>.latest`.
+    """
+    feed = build_feed()
+    directory.mkdir(parents=True, exist_ok=True)
+    filename = _export_content(directory, "discofeed", serialize_feed(feed))
+    for variant in variants:
+        _export_content(
+            directory,
+            f"discofeed.{variant.lang}",
+            serialize_feed([variant.slim(entry) for entry in feed]),
+        )
+    _prune_exports(directory)
+    return filename
+
+
+def export_feed_if_configured() -> str | None:
+    """Export disco feed to `EDUGAIN_FEED_EXPORT_DIR` (if configured), returns its filename.
+
+    Variants for the app's languages are exported alongside.
+    Failure to export is logged rather than raised,
+    as it's called after the changes to IdPs have been committed.
+    """
+    config = current_app.config
+    directory = config.get("EDUGAIN_FEED_EXPORT_DIR")
+    if directory is None:
+        return None
+    variants = [
+        FeedVariant.for_app(current_app, lang) for lang in app_languages(current_app)
+    ]
+    try:
+        return export_feed(Path(directory), variants)
+    except OSError as exception:
+        log_msg = f"couldn't export disco feed to {directory}: {exception!r}"
+        current_app.logger.warning(log_msg)
+        return None
+
+
+def exported_feed_url(app: Flask, lang: str | None = None) -> str | None:
+    """Get URL of latest exported disco feed, `None` if not configured or not exported yet.
+
+    With `lang`, get URL of that language's variant, or of the whole feed if there's none.
+    Re-reads pointer-files only when they changed, as this is called per discovery page.
+    """
+    directory = app.config.get("EDUGAIN_FEED_EXPORT_DIR")
+    base_url = app.config.get("EDUGAIN_FEED_EXPORT_URL")
+    if directory is None or base_url is None:
+        return None
+
+    pointers = [Path(directory) / LATEST_POINTER_FILENAME]
+    if lang is not None:
+        pointers.insert(0, Path(directory) / f"discofeed.{lang.lower()}.latest")
+    for pointer in pointers:
+        try:
+            stat = pointer.stat()
+            # pointer-file is replaced on export, hence also changes inode
+            signature = (stat.st_mtime_ns, stat.st_ino)
+            cached = _latest_export_by_pointer.get(pointer)
+            if cached is None or cached[0] != signature:
+                cached = (signature, pointer.read_text(encoding="utf-8").strip())
+                _latest_export_by_pointer[pointer] = cached
+        except OSError:
+            continue
+        return f"{base_url.rstrip('/')}/{cached[1]}"
+    return None
+
+
+def current_feed_revision(*, from_replica: bool = False) -> int:
+    """Get revision of the latest recorded change of the disco feed, 0 if none was recorded."""
+    query = db.select(func.coalesce(func.max(DiscoFeedEntry.revision), 0))
+    if from_replica:
+        return read_replica.scalars(query)[0]
+    return db.session.scalar(query)
+
+
+def _lock_feed_revision() -> DiscoFeedRevision:
+    """Lock the row holding the feed's latest revision until the end of the transaction.
+
+    Creates the row if it's missing (e.g. for tables created without migrations).
+    """
+    query = (
+        db.select(DiscoFeedRevision)
+        .where(DiscoFeedRevision.id == 1)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    counter = db.session.scalar(query)
+    if counter is None:
+        revision = current_feed_revision()
+        try:
+            with db.session.begin_nested():
+                db.session.add(DiscoFeedRevision(id=1, revision=revision))
+        except IntegrityError:
+            pass  # created concurrently
+        counter = db.session.scalar(query)
+    return counter
+
+
+def record_feed_changes(idp_ids: Collection[str] | None = None) -> int:
+    """Record changes of the disco feed since the last recording, as a new revision.
+
+    With `idp_ids`, only changes of those IdPs are looked for,
+    unless nothing was recorded yet (e.g. right after upgrading), which records the whole feed.
+    Concurrent recordings wait on each other (see `DiscoFeedRevision`).
+    Returns the (possibly unchanged) current revision. Doesn't commit.
+    """
+    counter = _lock_feed_revision()
+    if counter.revision == 0:
+        idp_ids = None
+
+    feed = {entry["entityID"]: entry for entry in build_feed(idp_ids=idp_ids)}
+    recorded_query = db.select(DiscoFeedEntry.entity_id, DiscoFeedEntry.entry)
+    if idp_ids is not None:
+        recorded_query = recorded_query.where(DiscoFeedEntry.entity_id.in_(idp_ids))
+    recorded = dict(db.session.execute(recorded_query).tuples().all())
+
+    # `None` marks IdPs that left the feed
+    changes: dict[str, dict[str, Any] | None] = {
+        entity_id: entry
+        for entity_id, entry in feed.items()
+        if recorded.get(entity_id) != entry
+    }
+    changes |= {
+        entity_id: None
+        for entity_id, entry in recorded.items()
+        if entry is not None and entity_id not in feed
+    }
+    if not changes:
+        return counter.revision
+
+    counter.revision += 1
+    revision = counter.revision
+    table = DiscoFeedEntry.__table__
+    for batch in batched(changes.items(), 500):
+        # delete-then-insert works the same on all dbs, unlike upserts
+        db.session.execute(
+            db.delete(table).where(
+                table.c.entity_id.in_([entity_id for entity_id, _entry in batch]),
+            ),
+        )
+        db.session.execute(
+            db.insert(table),
+            [
+                {"entity_id": entity_id, "revision": revision, "entry": entry}
+                for entity_id, entry in batch
+            ],
+        )
+    return revision
+
+
+def feed_deltas(
+    since: int | None,
+    variant: FeedVariant | None = None,
+) -> dict[str, Any]:
+    """Get changes of the disco feed since revision `since`, along with the current revision.
+
+    Changes are given as `changed` entries and `removed` entity-ids,
+    entries are slimmed down to `variant` if given.
+    When `since` isn't a revision to build upon (`None`, 0, or from the future, e.g. after a db-reset),
+    the whole `feed` is given instead.
+    """
+    revision = current_feed_revision()
+    if since is None or not 0 < since <= revision:
+        if revision == 0:
+            # nothing recorded yet (e.g. right after upgrading), until the next ingest/manage
+            feed = build_feed()
+        else:
+            feed = db.session.scalars(
+                db.select(DiscoFeedEntry.entry)
+                .where(DiscoFeedEntry.entry.is_not(None))
+                .order_by(DiscoFeedEntry.entity_id),
+            ).all()
+        if variant is not None:
+            feed = [variant.slim(entry) for entry in feed]
+        return {"revision": revision, "feed": feed}
+
+    rows = db.session.execute(
+        db.select(DiscoFeedEntry.entity_id, DiscoFeedEntry.entry)
+        .where(DiscoFeedEntry.revision > since)
+        .order_by(DiscoFeedEntry.entity_id),
+    ).all()
+    changed = [row.entry for row in rows if row.entry is not None]
+    if variant is not None:
+        changed = [variant.slim(entry) for entry in changed]
+    return {
+        "revision": revision,
+        "changed": changed,
+        "removed": [row.entity_id for row in rows if row.entry is None],
+    }
@@ -7,12 +7,28 @@
 
 """Module for importing idp-data."""
 
+from collections.abc import Collection, Sequence
 from dataclasses import dataclass, field
 
+from flask import current_app
 from invenio_db import db
 from saml2.mdstore import MetadataStore
 
+from .authn_request import idp_sso_location_cache
+from .certs import idp_certificate_cache
+from .extraction import (
+    extract_missing_columns,
+    extracted_columns,
+    hidden_from_discovery,
+    registration_authority,
+    replace_entity_attributes,
+)
+from .feed import export_feed_if_configured, record_feed_changes
+from .logos import cache_logos_if_configured
+from .manage import given_ids
 from .models import IdPData
+from .policy import IngestRule, evaluate_rules, load_ingest_rules
+from .revalidate import invalidate_metadata_snapshot
 
 
 @dataclass
@@ -22,33 +38,146 @@ class IdPDataImportItem:
     added_idp_ids: list[str] = field(default_factory=list)
     unchanged_idp_ids: list[str] = field(default_factory=list)
     updated_idp_ids: list[str] = field(default_factory=list)
+    # values of `enabled`/`discoverable` that ingest-rules changed, by IdP-id
+    rule_changes: dict[str, dict[str, bool]] = field(default_factory=dict)
 
 
-def from_mdstore(mds: MetadataStore) -> IdPDataImportItem:
-    """Ingest idp-data from a pysaml2 MetadataStore object."""
-    result_item = IdPDataImportItem()
+def _apply_rule_values(
+    idp_data: IdPData,
+    rule_values: dict[str, bool],
+    *,
+    hide: bool,
+) -> dict[str, bool]:
+    """Set values that rules evaluated to on `idp_data`, returns values that changed.
+
+    With `hide`, the IdP is made non-discoverable, whatever the rules say,
+    which isn't reported as a change made by rules.
+    """
+    if hide:
+        idp_data.discoverable = False
+        rule_values = {**rule_values, "discoverable": False}
+    changes = {
+        column: value
+        for column, value in rule_values.items()
+        if getattr(idp_data, column) != value
+    }
+    for column, value in changes.items():
+        setattr(idp_data, column, value)
+    return changes
+
 
+def _idps_to_ingest(
+    mds: MetadataStore,
+    federations: Collection[str] | None,
+) -> tuple[list[str], dict[str, IdPData]]:
+    """Get ids of IdPs in `mds` registered by `federations`, and already ingested rows of them.
+
+    `federations` default to `EDUGAIN_FEDERATIONS`, where `None` means all federations.
+    """
+    if federations is None:
+        federations = current_app.config["EDUGAIN_FEDERATIONS"]
     idp_ids: list[str] = sorted(mds.identity_providers())
-    existing_idp_data: dict[str, IdPData] = {
-        idp_data.id: idp_data for idp_data in db.session.scalars(db.select(IdPData))
+    existing_query = db.select(IdPData)
+    if federations is not None:
+        federations = set(federations)
+        idp_ids = [
+            idp_id
+            for idp_id in idp_ids
+            if registration_authority(mds[idp_id]) in federations
+        ]
+        # only load rows that might get updated, rather than the whole table
+        existing_query = existing_query.where(
+            IdPData.id.in_(db.select(given_ids(idp_ids).c.id)),
+        )
+    existing_idp_data = {
+        idp_data.id: idp_data for idp_data in db.session.scalars(existing_query)
     }
+    return idp_ids, existing_idp_data
+
+
+def from_mdstore(
+    mds: MetadataStore,
+    *,
+    rules: Sequence[IngestRule] | None = None,
+    reapply_rules: bool = False,
+    dry_run: bool = False,
+    federations: Collection[str] | None = None,
+) -> IdPDataImportItem:
+    """Ingest idp-data from a pysaml2 MetadataStore object.
+
+    Only IdPs registered by `federations` (registration authorities) get ingested,
+    defaulting to those configured in `EDUGAIN_FEDERATIONS` (`None` for all).
+    `rules` default to those configured in `EDUGAIN_INGEST_RULES`.
+    They apply to added IdPs, or with `reapply_rules` to all IdPs in `mds`,
+    overwriting what was set via `invenio edugain manage`.
+    IdPs of the hide-from-discovery entity-category are never made discoverable.
+    With `dry_run`, the work gets reported but rolled back.
+    Otherwise, logos are cached and the disco feed is exported to static files (both if configured).
+    """
+    if rules is None:
+        rules = load_ingest_rules(current_app.config["EDUGAIN_INGEST_RULES"])
+    result_item = IdPDataImportItem()
+
+    idp_ids, existing_idp_data = _idps_to_ingest(mds, federations)
+    # settings of added and updated IdPs, whose entity attributes get replaced
+    changed_settings: dict[str, dict] = {}
     for idp_id in idp_ids:
         settings = mds[idp_id]
-        if idp_id in existing_idp_data:
+        is_added = idp_id not in existing_idp_data
+        if not is_added:
             idp_data = existing_idp_data[idp_id]
             if idp_data.settings != settings:
                 idp_data.settings = settings
+                for column, value in extracted_columns(mds, idp_id).items():
+                    setattr(idp_data, column, value)
                 result_item.updated_idp_ids.append(idp_id)
+                changed_settings[idp_id] = settings
             else:
+                if idp_data.search_text is None or idp_data.display_names is None:
+                    # ingested before extracted columns existed
+                    for column, value in extracted_columns(mds, idp_id).items():
+                        setattr(idp_data, column, value)
                 result_item.unchanged_idp_ids.append(idp_id)
         else:
+            # set explicitly, as column-defaults only apply on INSERT
             idp_data = IdPData(
                 id=idp_id,
                 settings=settings,
+                enabled=False,
+                discoverable=True,
+                **extracted_columns(mds, idp_id),
             )
             result_item.added_idp_ids.append(idp_id)
+            changed_settings[idp_id] = settings
+
+        rule_values = (
+            evaluate_rules(rules, idp_id, settings) if is_added or reapply_rules else {}
+        )
+        # only when (re-)evaluated, s.t. manual `manage --show` persists
+        hide = bool(rule_values or idp_id in changed_settings)
+        hide = hide and hidden_from_discovery(settings)
+        if changes := _apply_rule_values(idp_data, rule_values, hide=hide):
+            result_item.rule_changes[idp_id] = changes
         db.session.add(idp_data)
 
+    # attribute-rows reference their IdPs, hence IdPs are flushed first
+    db.session.flush()
+    replace_entity_attributes(changed_settings)
+    if dry_run:
+        db.session.rollback()
+        return result_item
+
+    # backfill IdPs (no longer in metadata) that were ingested before their columns existed
+    extract_missing_columns()
+    db.session.commit()
+    idp_certificate_cache.invalidate(result_item.updated_idp_ids)
+    idp_sso_location_cache.invalidate(result_item.updated_idp_ids)
+    # fetching logos takes a while, hence happens after the ingest is committed,
+    # and the feed's changes (which include logos) are recorded in a short transaction of their own
+    cache_logos_if_configured()
+    record_feed_changes()
     db.session.commit()
+    invalidate_metadata_snapshot()
+    export_feed_if_configured()
 
     return result_item
@@ -14,8 +14,8 @@ from invenio_jobs.jobs import JobType
 from invenio_jobs.models import Job
 from marshmallow import Schema, fields
 
+from .sentinels import ABSENT, AbsentType
 from .tasks import ingest_idp_data
-from .utils import ABSENT, AbsentType
 
 
 class IngestIdPDataArgsSchema(Schema):
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Local cache of IdPs' logos, s.t. the discovery page doesn't load them from thousands of hosts.
+
+Logos in metadata point at their home-organizations' hosts, some of them slow or dead,
+and the browser rendering the discovery page stalls on connecting to each.
+When `EDUGAIN_LOGO_CACHE_DIR` is configured, logos of IdPs in the disco feed get fetched
+(a bounded number at once), validated, resized to what shibboleth-EDS shows (with `Pillow` installed),
+and stored under content-addressed filenames, which the feed then points to instead (see `CachedLogo`).
+"""
+
+import base64
+import hashlib
+import io
+import threading
+from collections.abc import Collection, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from itertools import batched
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from flask import current_app
+from invenio_db import db
+
+from .feed import write_atomically
+from .models import CachedLogo, IdPData
+
+if TYPE_CHECKING:
+    from requests import Session
+
+# twice shibboleth-EDS' default `maxWidth`/`maxHeight`, for high-density displays
+MAX_LOGO_WIDTH = 230
+MAX_LOGO_HEIGHT = 138
+# logos that failed to fetch or validate are fetched anew after this long
+RETRY_FAILED_AFTER = timedelta(days=1)
+
+# leading bytes -> (mimetype, file-extension)
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": ("image/png", "png"),
+    b"\xff\xd8\xff": ("image/jpeg", "jpg"),
+    b"GIF87a": ("image/gif", "gif"),
+    b"GIF89a": ("image/gif", "gif"),
+    b"\x00\x00\x01\x00": ("image/x-icon", "ico"),
+}
+SVG_MIMETYPE = "image/svg+xml"
+
+
+@dataclass(frozen=True)
+class PreparedLogo:
+    """Logo ready to be stored, with its size in pixels (`None` when not resized)."""
+
+    content: bytes
+    mimetype: str
+    extension: str
+    width: int | None = None
+    height: int | None = None
+
+    @property
+    def filename(self) -> str:
+        """Content-addressed filename."""
+        digest = hashlib.sha256(self.content).hexdigest()[:32]
+        return f"{digest}.{self.extension}"
+
+    @property
+    def data_uri(self) -> str:
+        """Logo as data-URI, for inlining."""
+        encoded = base64.b64encode(self.content).decode("ascii")
+        return f"data:{self.mimetype};base64,{encoded}"
+
+
+def sniff_image_type(content: bytes) -> tuple[str, str] | None:
+    """Get (mimetype, file-extension) of `content` from its leading bytes, `None` if no supported image."""
+    for signature, image_type in IMAGE_SIGNATURES.items():
+        if content.startswith(signature):
+            return image_type
+    if content[:4] == b"RIFF" and content[8:12] == b"WEBP":
+        return ("image/webp", "webp")
+    head = content[:1024].lstrip().lower()
+    if head.startswith((b"<svg", b"<?xml")) and b"<svg" in head:
+        return (SVG_MIMETYPE, "svg")
+    return None
+
+
+def prepare_logo(content: bytes) -> PreparedLogo:
+    """Validate logo, shrink it to fit `MAX_LOGO_WIDTH`x`MAX_LOGO_HEIGHT` (keeping its aspect ratio).
+
+    Without `Pillow` installed, logos are only validated by their leading bytes and kept as they are.
+    SVGs are kept as they are, as they scale anyway.
+    Raises `ValueError` for anything but a (decodable) image.
+    """
+    image_type = sniff_image_type(content)
+    if image_type is None:
+        msg = "not an image of a supported type"
+        raise ValueError(msg)
+    mimetype, extension = image_type
+
+    try:
+        from PIL import Image  # noqa: PLC0415  # slow to import, only needed on ingest
+    except ImportError:  # optional, logos don't get resized without
+        return PreparedLogo(content, mimetype, extension)
+    if mimetype == SVG_MIMETYPE:
+        return PreparedLogo(content, mimetype, extension)
+
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            # decodes fully, which raises on truncated images and on decompression bombs
+            image.load()
+            image.thumbnail((MAX_LOGO_WIDTH, MAX_LOGO_HEIGHT))
+            buffer = io.BytesIO()
+            if image.format == "JPEG":
+                image.save(buffer, format="JPEG", quality=90, optimize=True)
+            else:
+                # ico, gif, and webp are not as widely supported, also loses animations
+                if image.mode not in {"1", "L", "LA", "P", "RGB", "RGBA"}:
+                    image = image.convert("RGBA")  # noqa: PLW2901
+                image.save(buffer, format="PNG", optimize=True)
+                mimetype, extension = "image/png", "png"
+            width, height = image.size
+    except (OSError, ValueError, Image.DecompressionBombError) as exception:
+        msg = f"couldn't decode image: {exception!r}"
+        raise ValueError(msg) from exception
+    return PreparedLogo(buffer.getvalue(), mimetype, extension, width, height)
+
+
+def _read_limited(chunks: Iterable[bytes], max_bytes: int) -> bytes:
+    """Join `chunks`, raises `ValueError` once they exceed `max_bytes`."""
+    content = b""
+    for chunk in chunks:
+        content += chunk
+        if len(content) > max_bytes:
+            msg = f"logo exceeds {max_bytes} bytes"
+            raise ValueError(msg)
+    return content
+
+
+def fetch_logos(
+    urls: Iterable[str],
+    *,
+    concurrency: int,
+    timeout: float,
+    max_bytes: int,
+) -> dict[str, bytes | Exception]:
+    """Fetch logos from `urls`, at most `concurrency` at once, with the exception raised as result on failure."""
+    import requests  # noqa: PLC0415  # slow to import, only needed on ingest
+
+    sessions = threading.local()
+
+    def fetch(url: str) -> bytes | Exception:
+        # a session per thread, s.t. connections to the same host get reused
+        session: Session | None = getattr(sessions, "session", None)
+        if session is None:
+            session = sessions.session = requests.Session()
+        try:
+            with session.get(url, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                return _read_limited(response.iter_content(64 * 1024), max_bytes)
+        except (requests.RequestException, ValueError) as exception:
+            return exception
+
+    urls = list(urls)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        return dict(zip(urls, executor.map(fetch, urls), strict=True))
+
+
+def feed_logo_urls(idp_ids: Collection[str] | None = None) -> set[str]:
+    """Get URLs of logos of enabled, discoverable IdPs (of `idp_ids` only, if given)."""
+    query = db.select(IdPData.logos).where(
+        IdPData.discoverable == db.true(),
+        IdPData.enabled == db.true(),
+        IdPData.logos.is_not(None),
+    )
+    if idp_ids is not None:
+        query = query.where(IdPData.id.in_(idp_ids))
+    return {
+        logo["value"]
+        for logos in db.session.scalars(query)
+        for logo in logos
+        # logos given as data-URIs in metadata stay as they are
+        if logo["value"].startswith(("https://", "http://"))
+    }
+
+
+def _cached_logo_row(
+    url: str,
+    result: bytes | Exception,
+    directory: Path,
+    *,
+    fetched: datetime,
+    inline_max_bytes: int,
+) -> dict:
+    """Store fetched logo in `directory`, get its row of `CachedLogo` (with `filename=None` on failure)."""
+    row = {"url": url, "filename": None, "width": None, "height": None}
+    row |= {"data_uri": None, "fetched": fetched}
+    try:
+        logo = prepare_logo(result) if isinstance(result, bytes) else None
+    except ValueError as exception:
+        result = exception
+        logo = None
+    if logo is None:
+        log_msg = f"couldn't cache logo {url}: {result!r}"
+        current_app.logger.info(log_msg)
+        return row
+
+    if not (directory / logo.filename).exists():
+        write_atomically(directory / logo.filename, logo.content)
+    row |= {"filename": logo.filename, "width": logo.width, "height": logo.height}
+    if len(logo.content) <= inline_max_bytes:
+        # for inlining, should the feed use this as icon
+        row["data_uri"] = logo.data_uri
+    return row
+
+
+def cache_logos(directory: Path, idp_ids: Collection[str] | None = None) -> int:
+    """Fetch, validate, resize, and store logos of IdPs in the disco feed that aren't cached yet.
+
+    With `idp_ids`, only logos of those IdPs are looked at.
+    Logos that failed before are retried after `RETRY_FAILED_AFTER`.
+    Returns the number of newly stored logos. Doesn't commit.
+    """
+    config = current_app.config
+    now = datetime.now(UTC).replace(tzinfo=None)
+    cached = {
+        row.url: row
+        for row in db.session.execute(
+            db.select(CachedLogo.url, CachedLogo.filename, CachedLogo.fetched),
+        )
+    }
+    urls = sorted(
+        url
+        for url in feed_logo_urls(idp_ids)
+        if url not in cached
+        or (
+            cached[url].filename is None
+            and cached[url].fetched < now - RETRY_FAILED_AFTER
+        )
+    )
+    if not urls:
+        return 0
+
+    fetched = fetch_logos(
+        urls,
+        concurrency=config["EDUGAIN_LOGO_FETCH_CONCURRENCY"],
+        timeout=config["EDUGAIN_LOGO_FETCH_TIMEOUT"],
+        max_bytes=config["EDUGAIN_LOGO_MAX_BYTES"],
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+    rows = [
+        _cached_logo_row(
+            url,
+            result,
+            directory,
+            fetched=now,
+            inline_max_bytes=config["EDUGAIN_LOGO_INLINE_MAX_BYTES"],
+        )
+        for url, result in fetched.items()
+    ]
+
+    table = CachedLogo.__table__
+    for batch in batched(rows, 500):
+        # delete-then-insert works the same on all dbs, unlike upserts
+        db.session.execute(
+            db.delete(table).where(table.c.url.in_([row["url"] for row in batch])),
+        )
+        db.session.execute(db.insert(table), batch)
+    return sum(row["filename"] is not None for row in rows)
+
+
+def cache_logos_if_configured(idp_ids: Collection[str] | None = None) -> int:
+    """Cache logos (see `cache_logos`) to `EDUGAIN_LOGO_CACHE_DIR`, if configured.
+
+    Failure to store is logged rather than raised, the affected logos are retried on the next call.
+    Doesn't commit.
+    """
+    directory = current_app.config.get("EDUGAIN_LOGO_CACHE_DIR")
+    if directory is None:
+        return 0
+    try:
+        return cache_logos(Path(directory), idp_ids)
+    except OSError as exception:
+        log_msg = f"couldn't cache logos to {directory}: {exception!r}"
+        current_app.logger.warning(log_msg)
+        return 0
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Set-based management of ingested IdPs (enable/disable, show/hide).
+
+IdPs are selected by given entity-ids and/or by an `IdPSelector`,
+both of which get evaluated in db, so that managing thousands of IdPs
+takes a single UPDATE rather than one per IdP.
+"""
+
+from collections.abc import Collection, Iterable
+from dataclasses import dataclass
+
+from invenio_db import db
+from sqlalchemy import (
+    ColumnElement,
+    FromClause,
+    String,
+    bindparam,
+    column,
+    false,
+    func,
+    or_,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from .extraction import has_entity_category
+from .models import IdPData
+
+
+@dataclass(frozen=True)
+class IdPSelector:
+    """Selects IdPs that match all given criteria."""
+
+    id_regex: str | None = None
+    registration_authority: str | None = None
+    entity_category: str | None = None
+
+    def __bool__(self) -> bool:
+        """Whether any criterion is given."""
+        return any(
+            [self.id_regex, self.registration_authority, self.entity_category],
+        )
+
+    def where(self) -> ColumnElement[bool]:
+        """Get SQL-expression that's true for rows of selected IdPs."""
+        clauses = []
+        if self.id_regex is not None:
+            clauses.append(IdPData.id.regexp_match(self.id_regex))
+        if self.registration_authority is not None:
+            clauses.append(
+                IdPData.registration_authority == self.registration_authority,
+            )
+        if self.entity_category is not None:
+            clauses.append(has_entity_category(self.entity_category))
+        return db.and_(*clauses)
+
+
+def given_ids(idp_ids: Collection[str], name: str = "given_ids") -> FromClause:
+    """Get one-column table (column `id`) of `idp_ids`, to join against in SQL."""
+    if db.session.get_bind().dialect.name == "postgresql":
+        # a single array-parameter, no matter how many ids
+        return (
+            func.unnest(
+                bindparam(name, list(idp_ids), type_=ARRAY(String), unique=True),
+            )
+            .table_valued("id")
+            .render_derived(name)
+        )
+    # as CTE, since not all dbs support column-lists on aliased VALUES
+    return (
+        values(column("id", String), name=name)
+        .data([(idp_id,) for idp_id in idp_ids] or [(None,)])
+        .cte(name)
+    )
+
+
+def unknown_ids(idp_ids: Collection[str]) -> list[str]:
+    """Get those of `idp_ids` that weren't ingested, via a single anti-join."""
+    if not idp_ids:
+        return []
+    given = given_ids(idp_ids)
+    query = (
+        db.select(given.c.id)
+        .outerjoin(IdPData, IdPData.id == given.c.id)
+        .where(IdPData.id.is_(None))
+        .order_by(given.c.id)
+    )
+    return list(db.session.scalars(query))
+
+
+def selection(
+    idp_ids: Collection[str] = (),
+    selector: IdPSelector | None = None,
+) -> ColumnElement[bool]:
+    """Get SQL-expression that's true for given IdPs and for IdPs selected by `selector`."""
+    clauses = []
+    if idp_ids:
+        clauses.append(IdPData.id.in_(db.select(given_ids(idp_ids).c.id)))
+    if selector:
+        clauses.append(selector.where())
+    return or_(*clauses) if clauses else false()
+
+
+def update_idps(
+    where: ColumnElement[bool],
+    *,
+    enabled: bool | None = None,
+    discoverable: bool | None = None,
+) -> list[str]:
+    """Set flags of IdPs `where` true, in a single UPDATE. Doesn't commit.
+
+    Returns ids of IdPs that actually changed, sorted.
+    """
+    new_values: dict[str, bool] = {}
+    changes: list[ColumnElement[bool]] = []
+    if enabled is not None:
+        new_values["enabled"] = enabled
+        changes.append(IdPData.enabled.is_not(enabled))
+    if discoverable is not None:
+        new_values["discoverable"] = discoverable
+        changes.append(IdPData.discoverable.is_not(discoverable))
+    if not new_values:
+        return []
+
+    statement = (
+        db.update(IdPData)
+        # only touch rows that change, s.t. RETURNING yields changed ids only
+        .where(where, or_(*changes))
+        .values(new_values)
+        .returning(IdPData.id)
+        .execution_options(synchronize_session="fetch")
+    )
+    return sorted(db.session.scalars(statement))
+
+
+def read_ids(lines: Iterable[str]) -> list[str]:
+    """Read entity-ids, one per line; skips blank lines and `#`-comments."""
+    return [
+        stripped
+        for line in lines
+        if (stripped := line.strip()) and not stripped.startswith("#")
+    ]
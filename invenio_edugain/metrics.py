@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Timing instrumentation of invenio-edugain's login pipeline.
+
+Views wrapped with `instrumented` time themselves and their stages (see `timed_stage`).
+At the end of a request, all timings are reported to the configured `EDUGAIN_METRICS_SINK`,
+labelled with pipeline, stage, IdP entityID, and outcome.
+With no sink configured, instrumentation is skipped altogether.
+"""
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from threading import Lock
+from time import perf_counter
+from typing import Protocol
+
+from flask import current_app, g
+from werkzeug.exceptions import HTTPException
+from werkzeug.utils import import_string
+
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+"""Upper bounds of histogram buckets in seconds, the same as prometheus-client's defaults."""
+
+TOTAL_STAGE = "total"
+"""Stage-label for the duration of the whole pipeline (i.e. view)."""
+
+
+class MetricsSink(Protocol):
+    """Receives timings of login-pipeline stages."""
+
+    def observe(self, stage: str, seconds: float, labels: Mapping[str, str]) -> None:
+        """Observe that `stage` took `seconds`; `labels` hold pipeline, idp, and outcome."""
+
+
+class CallbackSink:
+    """Passes timings on to a callback, e.g. to feed an existing metrics-library."""
+
+    def __init__(
+        self,
+        callback: Callable[[str, float, Mapping[str, str]], None],
+    ) -> None:
+        """Init."""
+        self.callback = callback
+
+    def observe(self, stage: str, seconds: float, labels: Mapping[str, str]) -> None:
+        """Observe."""
+        self.callback(stage, seconds, labels)
+
+
+class PrometheusSink:
+    """Aggregates timings into histograms, renders them in Prometheus text-format.
+
+    Histograms are kept in-process, so with multiple worker-processes each has its own.
+    """
+
+    metric_name = "invenio_edugain_stage_duration_seconds"
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        """Init."""
+        self.buckets = buckets
+        self._lock = Lock()
+        # maps sorted label-items to (non-cumulative bucket-counts, sum)
+        self._histograms: dict[tuple[tuple[str, str], ...], tuple[list[int], float]] = (
+            {}
+        )
+
+    def observe(self, stage: str, seconds: float, labels: Mapping[str, str]) -> None:
+        """Observe."""
+        key = tuple(sorted({**labels, "stage": stage}.items()))
+        # index len(buckets) is the implicit +Inf bucket
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts, total = self._histograms.get(key) or (
+                [0] * (len(self.buckets) + 1),
+                0.0,
+            )
+            counts[index] += 1
+            self._histograms[key] = (counts, total + seconds)
+
+    def exposition(self) -> str:
+        """Render histograms in Prometheus text-format."""
+        with self._lock:
+            histograms = {
+                key: (list(counts), total)
+                for key, (counts, total) in self._histograms.items()
+            }
+
+        name = self.metric_name
+        lines = [
+            f"# HELP {name} Duration of invenio-edugain login-pipeline stages.",
+            f"# TYPE {name} histogram",
+        ]
+        for key, (counts, total) in sorted(histograms.items()):
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in key)
+            cumulative = 0
+            for bound, count in zip([*self.buckets, "+Inf"], counts, strict=True):
+                cumulative += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {total}")
+            lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(label_value: str) -> str:
+    return label_value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def load_metrics_sink(
+    value: str | MetricsSink | Callable[[str, float, Mapping[str, str]], None] | None,
+) -> MetricsSink | None:
+    """Load sink from value of `EDUGAIN_METRICS_SINK`."""
+    if value is None:
+        return None
+    if value == "prometheus":
+        return PrometheusSink()
+    if isinstance(value, str):
+        value = import_string(value)
+    if hasattr(value, "observe"):
+        return value
+    if callable(value):
+        return CallbackSink(value)
+    msg = f"EDUGAIN_METRICS_SINK must be None, 'prometheus', a sink, or a callable, got {value!r}"
+    raise TypeError(msg)
+
+
+@dataclass
+class _PipelineTimings:
+    labels: dict[str, str]
+    stages: list[tuple[str, float]] = field(default_factory=list)
+
+
+def _current_timings() -> _PipelineTimings | None:
+    return g.get("_edugain_pipeline_timings")
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Time the enclosed block as `stage` of the current request's pipeline (if instrumented)."""
+    timings = _current_timings()
+    if timings is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.stages.append((stage, perf_counter() - start))
+
+
+def set_metrics_label(key: str, value: str) -> None:
+    """Set label for all timings of the current request's pipeline (if instrumented)."""
+    timings = _current_timings()
+    if timings is not None:
+        timings.labels[key] = value
+
+
+def instrumented[**P, R](pipeline: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorate view s.t. it's timed as a whole, and its `timed_stage`s are reported."""
+
+    def decorator(view: Callable[P, R]) -> Callable[P, R]:
+        @wraps(view)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            sink = current_app.extensions["invenio-edugain"].metrics_sink
+            if sink is None:
+                return view(*args, **kwargs)
+
+            timings = _PipelineTimings(labels={"pipeline": pipeline, "idp": ""})
+            g._edugain_pipeline_timings = timings  # noqa: SLF001
+            outcome = "success"
+            start = perf_counter()
+            try:
+                response = view(*args, **kwargs)
+                status = getattr(response, "status_code", 200)
+                if status >= 400:  # noqa: PLR2004
+                    outcome = f"http_{status}"
+            except HTTPException as error:
+                outcome = f"http_{error.code}"
+                raise
+            except Exception as error:
+                outcome = type(error).__name__
+                raise
+            finally:
+                timings.stages.append((TOTAL_STAGE, perf_counter() - start))
+                g.pop("_edugain_pipeline_timings", None)
+                labels = {**timings.labels, "outcome": outcome}
+                try:
+                    for stage, seconds in timings.stages:
+                        sink.observe(stage, seconds, labels)
+                except Exception:
+                    # never fail logins because of instrumentation
+                    current_app.logger.exception("metrics-sink failed to observe")
+            return response
+
+        return wrapper
+
+    return decorator
@@ -7,7 +7,10 @@
 
 """SQL-table definitions for invenio-edugain."""
 
+from datetime import datetime
+
 from invenio_db import db
+from sqlalchemy import DDL, event
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -24,6 +27,43 @@ class IdPData(db.Model):
     settings: Mapped[dict] = mapped_column(
         db.JSON().with_variant(JSONB(), "postgresql"),
     )
+    # entity-id, names, and keywords, one per line; extracted from settings on ingest
+    # NULL for rows ingested before this column existed (see `invenio_edugain.search`)
+    search_text: Mapped[str | None] = mapped_column(db.Text())
+
+    # discovery data, extracted from settings on ingest (see `invenio_edugain.extraction`)
+    # NULL for rows ingested before these columns existed
+    # lists of {"lang": ..., "value": ...}, display-names hold the most relevant name per language
+    display_names: Mapped[list | None] = mapped_column(
+        db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql"),
+    )
+    keywords: Mapped[list | None] = mapped_column(
+        db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql"),
+    )
+    # list of {"value": url, "height": ..., "width": ...}, optionally with "lang"
+    logos: Mapped[list | None] = mapped_column(
+        db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql"),
+    )
+    organization_names: Mapped[list | None] = mapped_column(
+        db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql"),
+    )
+    organization_urls: Mapped[list | None] = mapped_column(
+        db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql"),
+    )
+    # federation that registered the IdP, as per its <mdrpi:RegistrationInfo>
+    registration_authority: Mapped[str | None] = mapped_column(index=True)
+
+    __table_args__ = (
+        # discovery-feed queries enabled and discoverable IdPs
+        db.Index("ix_edugain_idp_data_enabled_discoverable", "enabled", "discoverable"),
+        # speeds up ILIKE/regex-matching on PostgreSQL, plain index on other dbs
+        db.Index(
+            "ix_edugain_idp_data_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
 
     def __repr__(self) -> str:
         """Repr."""
@@ -34,3 +74,117 @@ class IdPData(db.Model):
             f"enabled={self.enabled!r}, "
             "settings=...)"
         )
+
+
+class IdPEntityAttribute(db.Model):
+    """Flask-SQLAlchemy model for "edugain_idp_entity_attributes" SQL-table.
+
+    Holds IdPs' entity attributes (entity categories, assurance certifications, ...),
+    extracted from settings on ingest (see `invenio_edugain.extraction`).
+    """
+
+    __tablename__ = "edugain_idp_entity_attributes"
+
+    idp_id: Mapped[str] = mapped_column(
+        db.ForeignKey(IdPData.id, ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # e.g. "http://macedir.org/entity-category"
+    name: Mapped[str] = mapped_column(primary_key=True)
+    # e.g. "http://refeds.org/category/research-and-scholarship"
+    value: Mapped[str] = mapped_column(primary_key=True)
+
+    __table_args__ = (
+        # finds IdPs by attribute, e.g. all IdPs of some entity category
+        db.Index("ix_edugain_idp_entity_attributes_name_value", "name", "value"),
+    )
+
+    def __repr__(self) -> str:
+        """Repr."""
+        return (
+            f"{type(self).__qualname__}("
+            f"idp_id={self.idp_id!r}, "
+            f"name={self.name!r}, "
+            f"value={self.value!r})"
+        )
+
+
+class DiscoFeedEntry(db.Model):
+    """Flask-SQLAlchemy model for "edugain_disco_feed_entries" SQL-table.
+
+    Holds each IdP's latest entry of the disco feed and the feed-revision it last changed at,
+    with `entry` being `None` once the IdP left the feed.
+    Lets browsers fetch only what changed since their revision (see `invenio_edugain.feed`).
+    """
+
+    __tablename__ = "edugain_disco_feed_entries"
+
+    # no foreign key, as removals outlive deleted IdPs
+    entity_id: Mapped[str] = mapped_column(primary_key=True)
+    revision: Mapped[int] = mapped_column(index=True)
+    entry: Mapped[dict | None] = mapped_column(
+        db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql"),
+    )
+
+    def __repr__(self) -> str:
+        """Repr."""
+        return (
+            f"{type(self).__qualname__}("
+            f"entity_id={self.entity_id!r}, "
+            f"revision={self.revision!r}, "
+            "entry=...)"
+        )
+
+
+class DiscoFeedRevision(db.Model):
+    """Flask-SQLAlchemy model for "edugain_disco_feed_revision" SQL-table.
+
+    Holds a single row, the latest revision of the disco feed.
+    Recording changes locks it (`SELECT ... FOR UPDATE`) first,
+    s.t. concurrent recordings (ingest, manage, ...) are serialized and never share a revision.
+    """
+
+    __tablename__ = "edugain_disco_feed_revision"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=False)
+    revision: Mapped[int]
+
+    def __repr__(self) -> str:
+        """Repr."""
+        return f"{type(self).__qualname__}(id={self.id!r}, revision={self.revision!r})"
+
+
+class CachedLogo(db.Model):
+    """Flask-SQLAlchemy model for "edugain_cached_logos" SQL-table.
+
+    Holds where each logo-URL of the disco feed was stored locally after fetching, validating, and resizing,
+    with `filename` being `None` when that failed (see `invenio_edugain.logos`).
+    """
+
+    __tablename__ = "edugain_cached_logos"
+
+    url: Mapped[str] = mapped_column(primary_key=True)
+    # content-addressed, within `EDUGAIN_LOGO_CACHE_DIR`
+    filename: Mapped[str | None] = mapped_column()
+    width: Mapped[int | None] = mapped_column()
+    height: Mapped[int | None] = mapped_column()
+    # small icons get inlined into the feed instead
+    data_uri: Mapped[str | None] = mapped_column(db.Text())
+    fetched: Mapped[datetime] = mapped_column()
+
+    def __repr__(self) -> str:
+        """Repr."""
+        return (
+            f"{type(self).__qualname__}("
+            f"url={self.url!r}, "
+            f"filename={self.filename!r}, "
+            f"fetched={self.fetched!r})"
+        )
+
+
+# trigram-index needs pg_trgm, also when creating tables without alembic
+event.listen(
+    IdPData.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Rules that enable/disable and show/hide IdPs while they're ingested.
+
+Rules are configured via `EDUGAIN_INGEST_RULES` and get evaluated in Python
+against the IdPs' metadata, s.t. their outcome is part of ingest's single write,
+instead of needing one `invenio edugain manage` per IdP afterwards.
+"""
+
+import re
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from .extraction import entity_categories, registration_authority
+from .manage import IdPSelector, read_ids
+
+RULE_KEYS = frozenset(
+    {
+        "discoverable",
+        "enabled",
+        "entity_category",
+        "id_regex",
+        "ids_file",
+        "registration_authority",
+    },
+)
+
+
+@dataclass(frozen=True)
+class IngestRule:
+    """Sets `enabled`/`discoverable` of ingested IdPs that match all given criteria.
+
+    A rule without criteria matches every IdP.
+    """
+
+    selector: IdPSelector = field(default_factory=IdPSelector)
+    # as read from an allow/deny list file, `None` for no restriction
+    idp_ids: frozenset[str] | None = None
+    enabled: bool | None = None
+    discoverable: bool | None = None
+
+    def matches(self, idp_id: str, settings: dict[str, Any]) -> bool:
+        """Whether IdP of `idp_id` with `settings` matches all of the rule's criteria."""
+        if self.idp_ids is not None and idp_id not in self.idp_ids:
+            return False
+        selector = self.selector
+        # same semantics as db's regexp_match, which searches rather than matches
+        if selector.id_regex is not None and not re.search(selector.id_regex, idp_id):
+            return False
+        if (
+            selector.registration_authority is not None
+            and registration_authority(settings) != selector.registration_authority
+        ):
+            return False
+        return (
+            selector.entity_category is None
+            or selector.entity_category in entity_categories(settings)
+        )
+
+
+def load_ingest_rules(rule_configs: Iterable[Mapping[str, Any]]) -> list[IngestRule]:
+    """Load rules from their configuration (see `EDUGAIN_INGEST_RULES`)."""
+    rules = []
+    for index, rule_config in enumerate(rule_configs):
+        name = f"EDUGAIN_INGEST_RULES[{index}]"
+        if unknown_keys := set(rule_config) - RULE_KEYS:
+            msg = f"{name} has unknown keys {sorted(unknown_keys)!r}"
+            raise ValueError(msg)
+        if (
+            rule_config.get("enabled") is None
+            and rule_config.get("discoverable") is None
+        ):
+            msg = f"{name} would have no effect, set `enabled` and/or `discoverable`"
+            raise ValueError(msg)
+        if (id_regex := rule_config.get("id_regex")) is not None:
+            try:
+                re.compile(id_regex)
+            except re.error as error:
+                msg = f"{name} has invalid id_regex {id_regex!r}: {error}"
+                raise ValueError(msg) from error
+
+        idp_ids = None
+        if (ids_file := rule_config.get("ids_file")) is not None:
+            with Path(ids_file).open(encoding="utf-8") as file:
+                idp_ids = frozenset(read_ids(file))
+
+        rules.append(
+            IngestRule(
+                selector=IdPSelector(
+                    id_regex=id_regex,
+                    registration_authority=rule_config.get("registration_authority"),
+                    entity_category=rule_config.get("entity_category"),
+                ),
+                idp_ids=idp_ids,
+                enabled=rule_config.get("enabled"),
+                discoverable=rule_config.get("discoverable"),
+            ),
+        )
+    return rules
+
+
+def evaluate_rules(
+    rules: Iterable[IngestRule],
+    idp_id: str,
+    settings: dict[str, Any],
+) -> dict[str, bool]:
+    """Get values of `enabled`/`discoverable` that `rules` set for IdP; later rules win."""
+    values: dict[str, bool] = {}
+    for rule in rules:
+        if not rule.matches(idp_id, settings):
+            continue
+        if rule.enabled is not None:
+            values["enabled"] = rule.enabled
+        if rule.discoverable is not None:
+            values["discoverable"] = rule.discoverable
+    return values
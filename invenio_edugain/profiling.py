@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Opt-in profiling of invenio-edugain's CLI commands and views.
+
+Each profile is written to `EDUGAIN_PROFILE_DIR` as two files:
+- `<name>-<time>-<pid>.prof`: cProfile-stats, for `python -m pstats` or e.g. snakeviz
+- `<name>-<time>-<pid>.txt`: wall-time, tracemalloc's peak memory, and most expensive calls
+
+Only one profile is recorded at a time per process,
+as both cProfile and tracemalloc are process-wide tools on current Pythons.
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import tracemalloc
+from datetime import UTC, datetime
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+
+from flask import Flask, current_app, g, request
+
+PROFILE_HEADER = "X-Edugain-Profile"
+"""Request header that triggers profiling, when sending `EDUGAIN_PROFILE_REQUEST_TOKEN`."""
+
+_lock = Lock()
+
+
+def profile_dir(app: Flask) -> Path:
+    """Get directory to write profiles to."""
+    directory = app.config.get("EDUGAIN_PROFILE_DIR")
+    if directory is None:
+        return Path(app.instance_path) / "edugain-profiles"
+    return Path(directory)
+
+
+class Profiler:
+    """Records cProfile-stats and peak memory between `start` and `stop`."""
+
+    def __init__(self, name: str, directory: Path) -> None:
+        """Init."""
+        self.name = name
+        self.directory = directory
+        self._profile = cProfile.Profile()
+        self._started_tracemalloc = False
+        self._start = 0.0
+
+    def start(self) -> bool:
+        """Start profiling, returns `False` (and doesn't profile) while another profile is recorded."""
+        if not _lock.acquire(blocking=False):
+            return False
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start = perf_counter()
+        self._profile.enable()
+        return True
+
+    def stop(self) -> Path:
+        """Stop profiling, write profile to disk, returns path of its summary."""
+        try:
+            self._profile.disable()
+            wall_time = perf_counter() - self._start
+            _, peak = tracemalloc.get_traced_memory()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        finally:
+            _lock.release()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{self.name}-{datetime.now(UTC):%Y%m%dT%H%M%S%f}-{os.getpid()}"
+        self._profile.dump_stats(self.directory / f"{stem}.prof")
+
+        stats_buffer = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stats_buffer)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(30)
+        summary_path = self.directory / f"{stem}.txt"
+        summary_path.write_text(
+            f"name: {self.name}\n"
+            f"wall-time: {wall_time:.6f}s\n"
+            f"peak memory (tracemalloc): {peak / 1024 / 1024:.2f} MiB\n"
+            f"{stats_buffer.getvalue()}",
+            encoding="utf-8",
+        )
+        return summary_path
+
+
+def _wants_profile() -> bool:
+    config = current_app.config
+    token = config.get("EDUGAIN_PROFILE_REQUEST_TOKEN")
+    if token and hmac.compare_digest(
+        request.headers.get(PROFILE_HEADER, "").encode(),
+        token.encode(),
+    ):
+        return True
+    sample_rate = config.get("EDUGAIN_PROFILE_SAMPLE_RATE", 0.0)
+    return bool(sample_rate) and random.random() < sample_rate  # noqa: S311
+
+
+def start_request_profile() -> None:
+    """Start profiling the current request, if requested by header or sampled."""
+    if not _wants_profile():
+        return
+    profiler = Profiler(
+        (request.endpoint or "request").replace(".", "-"),
+        profile_dir(current_app),
+    )
+    if profiler.start():
+        g._edugain_profiler = profiler  # noqa: SLF001
+
+
+def stop_request_profile(_exception: BaseException | None = None) -> None:
+    """Stop profiling the current request (if profiled), write profile to disk."""
+    profiler: Profiler | None = g.pop("_edugain_profiler", None)
+    if profiler is None:
+        return
+    try:
+        summary_path = profiler.stop()
+    except OSError:
+        # never fail requests because of profiling
+        current_app.logger.exception("couldn't write profile")
+        return
+    log_msg = f"wrote profile of {request.path} to {summary_path}"
+    current_app.logger.info(log_msg)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Routing of read-only queries of IdPs' metadata to a read replica.
+
+Loading enabled IdPs (on each login), building the disco feed, and searching read many large rows,
+which compete with Invenio's record writes on the primary db.
+When `EDUGAIN_READ_REPLICA_BIND` names a bind of `SQLALCHEMY_BINDS`, those reads are executed there instead,
+in a session of their own, s.t. they never join the primary's transaction.
+Should the replica fail, reads fall back to the primary, and the replica is retried after `RETRY_REPLICA_AFTER`.
+Writes (ingest, `manage`, provisioning users on login) always go to the primary.
+"""
+
+from collections.abc import Sequence
+from math import inf
+from time import monotonic
+from typing import Any
+
+from flask import current_app
+from invenio_db import db
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Executable
+
+# seconds after a failure of the replica during which reads go to the primary right away
+RETRY_REPLICA_AFTER = 30.0
+
+
+class ReadReplica:
+    """Executes read-only statements on the configured read replica, falling back to the primary."""
+
+    def __init__(self) -> None:
+        """Init."""
+        # maps bind-key to monotonic time until which that bind isn't tried
+        self._failed_until: dict[str, float] = {}
+
+    def execute(self, statement: Executable) -> Sequence[Row]:
+        """Execute read-only `statement`, get all its rows."""
+        bind_key = current_app.config.get("EDUGAIN_READ_REPLICA_BIND")
+        if bind_key is None or self._failed_until.get(bind_key, -inf) > monotonic():
+            return db.session.execute(statement).all()
+
+        engine = db.engines.get(bind_key)
+        if engine is None:
+            log_msg = f"EDUGAIN_READ_REPLICA_BIND {bind_key!r} isn't in SQLALCHEMY_BINDS, reading from primary"
+            current_app.logger.warning(log_msg)
+            self._failed_until[bind_key] = monotonic() + RETRY_REPLICA_AFTER
+            return db.session.execute(statement).all()
+
+        # only failures of the replica itself fall back, errors of the statement (e.g. invalid regexes) are raised
+        try:
+            with Session(engine) as session:
+                return session.execute(statement).all()
+        except (InterfaceError, OperationalError) as exception:
+            log_msg = f"couldn't read from replica {bind_key!r}, reading from primary for {RETRY_REPLICA_AFTER}s: {exception!r}"
+            current_app.logger.warning(log_msg)
+            self._failed_until[bind_key] = monotonic() + RETRY_REPLICA_AFTER
+            return db.session.execute(statement).all()
+
+    def scalars(self, statement: Executable) -> Sequence[Any]:
+        """Execute read-only `statement`, get the first column of all its rows."""
+        return [row[0] for row in self.execute(statement)]
+
+    def reset(self) -> None:
+        """Forget failures, s.t. the replica is tried again on the next read."""
+        self._failed_until.clear()
+
+
+read_replica = ReadReplica()
+"""Module-level instance, s.t. failures are remembered between requests."""
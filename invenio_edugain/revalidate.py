@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Serving metadata-dependent views from an in-memory snapshot, revalidated in the background.
+
+The disco feed, sending AuthnRequests, and the ACS each query enabled IdPs from db on every request,
+hence all of them fail (or stall) while the db does.
+When `EDUGAIN_METADATA_SNAPSHOT_TTL` is configured, each process instead holds a snapshot of
+enabled IdPs' settings and of the disco feed, which requests are served from without waiting on the db.
+Once older than that TTL, the snapshot is still served while a single background thread loads anew;
+once older than `EDUGAIN_METADATA_SNAPSHOT_MAX_STALENESS`, requests load anew themselves.
+"""
+
+from collections.abc import Callable, Collection
+from dataclasses import dataclass, field
+from functools import partial
+from logging import Logger
+from math import inf
+from threading import Lock, Thread
+from time import monotonic
+from typing import Any
+
+from flask import Flask, current_app
+from invenio_db import db
+
+from .feed import (
+    MAX_CACHED_VARIANTS,
+    FeedVariant,
+    build_feed,
+    serialize_feed,
+    store_evicting_lru,
+)
+from .models import IdPData
+from .replica import read_replica
+
+
+class StaleWhileRevalidate[T]:
+    """Holds the last result of `load`, serving it while loading anew in the background.
+
+    Results younger than `fresh_for` seconds are served as they are.
+    Older ones are still served, while a single background thread loads anew;
+    should that fail, the older result is kept and retried on the next call.
+    Results older than `max_stale` seconds aren't served anymore, but loaded anew on the calling thread,
+    which raises what `load` raises.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[], T],
+        *,
+        fresh_for: float,
+        max_stale: float,
+        logger: Logger,
+    ) -> None:
+        """Init."""
+        self._load = load
+        self.fresh_for = fresh_for
+        self.max_stale = max(max_stale, fresh_for)
+        self._logger = logger
+        self._lock = Lock()
+        # held while loading on a calling thread, s.t. concurrent callers don't all load at once
+        self._load_lock = Lock()
+        self._value: T | None = None
+        self._loaded_at = -inf
+        self._refreshing = False
+
+    def get(self) -> T:
+        """Get held result, see class docstring."""
+        with self._lock:
+            value, age = self._value, monotonic() - self._loaded_at
+            refresh = (
+                value is not None
+                and self.fresh_for < age <= self.max_stale
+                and not self._refreshing
+            )
+            if refresh:
+                self._refreshing = True
+
+        if value is None or age > self.max_stale:
+            return self._load_synchronously()
+        if refresh:
+            Thread(target=self._refresh, name="edugain-revalidate", daemon=True).start()
+        return value
+
+    def invalidate(self) -> None:
+        """Make the held result stale, s.t. the next call loads anew (while still serving it)."""
+        with self._lock:
+            if self._value is not None:
+                self._loaded_at = min(self._loaded_at, monotonic() - self.fresh_for)
+
+    def _store(self, value: T) -> None:
+        with self._lock:
+            self._value, self._loaded_at = value, monotonic()
+
+    def _load_synchronously(self) -> T:
+        with self._load_lock:
+            # another caller may have loaded while this one waited
+            with self._lock:
+                value, age = self._value, monotonic() - self._loaded_at
+            if value is not None and age <= self.max_stale:
+                return value
+            value = self._load()
+            self._store(value)
+            return value
+
+    def _refresh(self) -> None:
+        try:
+            self._store(self._load())
+        except Exception as exception:  # noqa: BLE001
+            log_msg = (
+                f"couldn't revalidate, serving stale result meanwhile: {exception!r}"
+            )
+            self._logger.warning(log_msg)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+
+@dataclass
+class MetadataSnapshot:
+    """Enabled IdPs' settings and the disco feed, as of one load from db."""
+
+    settings_by_id: dict[str, dict[str, Any]]
+    registration_authority_by_id: dict[str, str | None]
+    feed: list[dict[str, Any]]
+    # (variant, sorted federations) -> serialized feed, least recently used first
+    _serialized: dict[tuple[FeedVariant | None, tuple[str, ...]], bytes] = field(
+        default_factory=dict,
+        repr=False,
+    )
+    _lock: Lock = field(default_factory=Lock, repr=False)
+
+    def feed_content(
+        self,
+        variant: FeedVariant | None = None,
+        federations: Collection[str] = (),
+    ) -> bytes:
+        """Get serialized disco feed (slimmed down to `variant`, of `federations` only, if given)."""
+        key = (variant, tuple(sorted(federations)))
+        with self._lock:
+            content = self._serialized.pop(key, None)
+            if content is not None:
+                # re-inserted as most recently used
+                self._serialized[key] = content
+        if content is not None:
+            return content
+
+        feed = self.feed
+        if federations:
+            feed = [
+                entry
+                for entry in feed
+                if self.registration_authority_by_id.get(entry["entityID"])
+                in federations
+            ]
+        if variant is not None:
+            feed = [variant.slim(entry) for entry in feed]
+        content = serialize_feed(feed)
+        with self._lock:
+            store_evicting_lru(self._serialized, key, content, MAX_CACHED_VARIANTS)
+        return content
+
+
+def load_metadata_snapshot(app: Flask) -> MetadataSnapshot:
+    """Load snapshot from db, in an app-context (and hence a db-session) of its own."""
+    with app.app_context():
+        settings_by_id = {}
+        registration_authority_by_id = {}
+        for row in read_replica.execute(
+            db.select(
+                IdPData.id,
+                IdPData.settings,
+                IdPData.registration_authority,
+            ).where(IdPData.enabled == db.true()),
+        ):
+            settings_by_id[row.id] = row.settings
+            registration_authority_by_id[row.id] = row.registration_authority
+        return MetadataSnapshot(
+            settings_by_id=settings_by_id,
+            registration_authority_by_id=registration_authority_by_id,
+            feed=build_feed(from_replica=True),
+        )
+
+
+def current_metadata_snapshot() -> MetadataSnapshot | None:
+    """Get this process's snapshot, `None` unless configured via `EDUGAIN_METADATA_SNAPSHOT_TTL`."""
+    config = current_app.config
+    fresh_for = config.get("EDUGAIN_METADATA_SNAPSHOT_TTL")
+    if fresh_for is None:
+        return None
+    extension = current_app.extensions["invenio-edugain"]
+    holder = extension.metadata_snapshot_holder
+    if holder is None:
+        app = current_app._get_current_object()  # noqa: SLF001
+        holder = StaleWhileRevalidate(
+            partial(load_metadata_snapshot, app),
+            fresh_for=fresh_for,
+            max_stale=config["EDUGAIN_METADATA_SNAPSHOT_MAX_STALENESS"],
+            logger=app.logger,
+        )
+        extension.metadata_snapshot_holder = holder
+    return holder.get()
+
+
+def invalidate_metadata_snapshot() -> None:
+    """Make this process's snapshot stale (if any), s.t. changes show up after the next revalidation."""
+    extension = current_app.extensions["invenio-edugain"]
+    if extension.metadata_snapshot_holder is not None:
+        extension.metadata_snapshot_holder.invalidate()
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Search through ingested IdPs by entity-id, names, and keywords.
+
+Searchable text is extracted from IdPs' settings on ingest, into `IdPData.search_text` (see `invenio_edugain.extraction`).
+On PostgreSQL, matching happens in db (accelerated by a pg_trgm index), ranked by trigram word-similarity to the regex's literal words.
+On other dbs, matching happens in Python, on the extracted text only.
+"""
+
+import re
+from collections.abc import Collection
+from typing import NamedTuple
+
+from invenio_db import db
+from sqlalchemy import func
+from sqlalchemy.exc import DataError
+
+from .extraction import extract_missing_columns
+from .models import IdPData
+from .replica import read_replica
+
+
+class InvalidRegexError(ValueError):
+    """Raised when the searched regex is invalid (in the db's regex-dialect)."""
+
+
+class IdPSearchResult(NamedTuple):
+    """IdP matching a search."""
+
+    id: str
+    enabled: bool
+    discoverable: bool
+    terms: list[str]  # names and keywords
+
+
+def _literal_words(regex: str) -> str:
+    """Get the words spelled out literally in `regex`, dropping escapes and operators.
+
+    Ranking by similarity to the regex's raw text would reward IdPs whose names contain e.g. `.*`.
+    """
+    return " ".join(re.sub(r"\\.|\W", " ", regex).split())
+
+
+def search_idps(
+    regex: str,
+    limit: int | None = None,
+    federations: Collection[str] | None = None,
+) -> list[IdPSearchResult]:
+    """Search IdPs whose entity-id, names, or keywords match `regex`, case-insensitively.
+
+    `^` and `$` match at start and end of each of entity-id, names, keywords.
+    With `federations`, only IdPs registered by one of these registration authorities are searched.
+    On PostgreSQL, `regex` is a POSIX regex and results are ranked by similarity to its literal words,
+    on other dbs `regex` is a Python regex and results are ordered by entity-id.
+    IdPs are read from the read replica, if configured (see `invenio_edugain.replica`).
+    Raises `InvalidRegexError` for regexes the db (or Python) rejects.
+    """
+    if extract_missing_columns():
+        db.session.commit()
+
+    columns = (
+        IdPData.id,
+        IdPData.enabled,
+        IdPData.discoverable,
+        IdPData.search_text,
+    )
+    clauses = []
+    if federations is not None:
+        clauses.append(IdPData.registration_authority.in_(list(federations)))
+    if db.session.get_bind().dialect.name == "postgresql":
+        query = (
+            db.select(*columns)
+            # embedded option n: newline-sensitive, s.t. matches don't span multiple terms
+            .where(
+                *clauses,
+                IdPData.search_text.regexp_match(f"(?n){regex}", flags="i"),
+            )
+            .order_by(
+                func.word_similarity(_literal_words(regex), IdPData.search_text).desc(),
+                IdPData.id,
+            )
+            .limit(limit)
+        )
+        try:
+            rows = read_replica.execute(query)
+        except DataError as error:
+            # POSIX regexes lack some of Python's syntax, e.g. `(?P<name>...)`, lookbehind, `\Z`
+            db.session.rollback()
+            msg = f"invalid regex {regex!r}: {error.orig}"
+            raise InvalidRegexError(msg) from error
+    else:
+        try:
+            pattern = re.compile(regex, flags=re.IGNORECASE | re.MULTILINE)
+        except re.error as error:
+            msg = f"invalid regex {regex!r}: {error}"
+            raise InvalidRegexError(msg) from error
+        rows = [
+            row
+            for row in read_replica.execute(
+                db.select(*columns).where(*clauses).order_by(IdPData.id),
+            )
+            if pattern.search(row.search_text)
+        ][:limit]
+
+    return [
+        IdPSearchResult(
+            id=row.id,
+            enabled=row.enabled,
+            discoverable=row.discoverable,
+            terms=row.search_text.split("\n")[1:],
+        )
+        for row in rows
+    ]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Sentinel values.
+
+Kept apart from `invenio_edugain.utils`, as `invenio_edugain.config` needs them
+and must stay cheap to import.
+"""
+
+import enum
+from typing import Literal
+
+
+class _ABSENT(enum.Enum):
+    """Sentinel distinguishable from `None`."""
+
+    ABSENT = enum.auto()
+
+    def __repr__(self) -> str:
+        return "ABSENT"
+
+    def __str__(self) -> str:
+        return "ABSENT"
+
+    def __bool__(self) -> Literal[False]:
+        return False
+
+
+ABSENT = _ABSENT.ABSENT
+type AbsentType = Literal[_ABSENT.ABSENT]
+
+
+class _NOT_CONFIGURED(enum.Enum):  # noqa: N801
+    """Sentinel for unconfigured vars."""
+
+    NOT_CONFIGURED = enum.auto()
+
+    def __repr__(self) -> str:
+        return "NOT_CONFIGURED"
+
+    def __str__(self) -> str:
+        return "NOT_CONFIGURED"
+
+    def __bool__(self) -> bool:
+        return False
+
+
+NOT_CONFIGURED = _NOT_CONFIGURED.NOT_CONFIGURED
+type NotConfiguredType = Literal[_NOT_CONFIGURED.NOT_CONFIGURED]
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Snapshots of ingested IdPs, for bootstrapping nodes without ingesting remote metadata.
+
+A snapshot is gzip-compressed JSON Lines:
+a header line, then one line per row of `edugain_idp_data` (flags and settings included).
+Both exporting and importing stream rows in batches, so memory stays bounded.
+"""
+
+import gzip
+import json
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from itertools import batched
+from typing import IO, Any
+
+from flask import current_app
+from invenio_db import db
+
+from .authn_request import idp_sso_location_cache
+from .certs import idp_certificate_cache
+from .extraction import extract_missing_columns, replace_entity_attributes
+from .feed import export_feed_if_configured, record_feed_changes
+from .logos import cache_logos_if_configured
+from .models import IdPData, IdPEntityAttribute
+from .revalidate import invalidate_metadata_snapshot
+
+SNAPSHOT_FORMAT = "invenio-edugain-idp-snapshot"
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot can't be imported."""
+
+
+def export_snapshot(fileobj: IO[bytes], *, batch_size: int = 500) -> int:
+    """Write snapshot of all ingested IdPs to `fileobj`. Returns number of IdPs written."""
+    table = IdPData.__table__
+    count = 0
+    with gzip.open(fileobj, "wt", encoding="utf-8") as file:
+        header = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "exported_at": datetime.now(UTC).isoformat(),
+            "columns": [column.name for column in table.columns],
+        }
+        file.write(json.dumps(header) + "\n")
+
+        rows = db.session.execute(
+            db.select(table).order_by(table.c.id),
+            execution_options={"yield_per": batch_size},
+        )
+        for row in rows.mappings():
+            file.write(json.dumps(dict(row), separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+def _read_rows(file: IO[str]) -> Iterator[dict[str, Any]]:
+    header_line = file.readline()
+    try:
+        header = json.loads(header_line)
+    except json.JSONDecodeError as error:
+        msg = "not a snapshot: header isn't JSON"
+        raise SnapshotError(msg) from error
+    if not isinstance(header, dict) or header.get("format") != SNAPSHOT_FORMAT:
+        msg = "not a snapshot: header lacks snapshot-format"
+        raise SnapshotError(msg)
+    if header.get("version") != SNAPSHOT_VERSION:
+        msg = f"unsupported snapshot-version {header.get('version')!r}, expected {SNAPSHOT_VERSION}"
+        raise SnapshotError(msg)
+
+    columns = {column.name for column in IdPData.__table__.columns}
+    if "id" not in header.get("columns", []):
+        msg = "snapshot lacks column 'id'"
+        raise SnapshotError(msg)
+    if unknown_columns := set(header["columns"]) - columns:
+        msg = f"snapshot has unknown columns {sorted(unknown_columns)!r}, upgrade invenio-edugain first"
+        raise SnapshotError(msg)
+
+    for line_number, line in enumerate(file, start=2):
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as error:
+            msg = f"line {line_number} of snapshot isn't JSON"
+            raise SnapshotError(msg) from error
+        # columns added after export are left to their defaults
+        yield {column: row.get(column) for column in header["columns"]}
+
+
+def import_snapshot(
+    fileobj: IO[bytes],
+    *,
+    replace: bool = False,
+    batch_size: int = 500,
+) -> int:
+    """Load snapshot from `fileobj` into db, in one transaction. Returns number of IdPs loaded.
+
+    IdPs in the snapshot overwrite already ingested IdPs of the same id.
+    With `replace`, ingested IdPs that aren't in the snapshot are deleted.
+    Afterwards, the disco feed is exported to static files (if configured).
+    """
+    table = IdPData.__table__
+    count = 0
+    try:
+        if replace:
+            db.session.execute(db.delete(IdPEntityAttribute.__table__))
+            db.session.execute(db.delete(table))
+        with gzip.open(fileobj, "rt", encoding="utf-8") as file:
+            for batch in batched(_read_rows(file), batch_size):
+                # delete-then-insert works the same on all dbs, unlike upserts
+                db.session.execute(
+                    db.delete(table).where(
+                        table.c.id.in_([row["id"] for row in batch]),
+                    ),
+                )
+                db.session.execute(db.insert(table), list(batch))
+                # not part of snapshots, as they're derived from settings
+                replace_entity_attributes(
+                    {row["id"]: row.get("settings") or {} for row in batch},
+                )
+                count += len(batch)
+        # snapshots of earlier versions lack columns added since
+        current_app.extensions["invenio-edugain"].missing_columns_extracted = False
+        extract_missing_columns()
+    except (OSError, EOFError) as error:
+        db.session.rollback()
+        msg = f"couldn't read snapshot: {error}"
+        raise SnapshotError(msg) from error
+    except Exception:
+        db.session.rollback()
+        raise
+
+    db.session.commit()
+    idp_certificate_cache.invalidate()
+    idp_sso_location_cache.invalidate()
+    # fetching logos takes a while, hence happens after the import is committed
+    cache_logos_if_configured()
+    record_feed_changes()
+    db.session.commit()
+    invalidate_metadata_snapshot()
+    export_feed_if_configured()
+    return count
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Pre-rendered SAML metadata of this SP.
+
+Federation operators and metadata aggregators poll the SP's metadata constantly.
+Rather than building (and potentially signing) it per request,
+it's rendered once per config and served from cache,
+until half of its validity (as given by `validUntil`) has elapsed.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from threading import Lock
+from typing import Any
+from xml.etree import ElementTree as ET
+
+from saml2.config import Config
+from saml2.metadata import entity_descriptor
+from saml2.s_utils import sid
+from saml2.sigver import pre_signature_part
+from saml2.time_util import TIME_FORMAT
+from saml2.xmldsig import DIGEST_SHA256, SIG_RSA_SHA256
+
+from .crypto import create_security_context, load_pysaml2_config
+from .utils import NS_PREFIX
+
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+
+
+@dataclass(frozen=True)
+class RenderedSPMetadata:
+    """Rendered SP metadata, with what's needed for conditional GETs."""
+
+    xml: bytes
+    etag: str
+    rendered_at: datetime
+    valid_until: datetime | None
+
+    def is_stale(self, now: datetime) -> bool:
+        """Whether half of the validity has elapsed, i.e. whether to render anew."""
+        if self.valid_until is None:
+            return False
+        return now >= self.rendered_at + (self.valid_until - self.rendered_at) / 2
+
+
+def render_sp_metadata(
+    config_dict: dict[str, Any],
+    *,
+    valid_for: timedelta | None = None,
+    cache_duration: timedelta | None = None,
+    sign: bool = False,
+) -> RenderedSPMetadata:
+    """Render SP metadata, signed with the SP's signing key if `sign`."""
+    # IdPs' settings aren't part of the SP's metadata, don't load them
+    config = load_pysaml2_config(
+        {key: value for key, value in config_dict.items() if key != "metadata"},
+        Config,
+    )
+    ed = entity_descriptor(config)
+
+    rendered_at = datetime.now(UTC).replace(microsecond=0)
+    valid_until = None
+    if valid_for is not None:
+        valid_until = rendered_at + valid_for
+        ed.valid_until = valid_until.strftime(TIME_FORMAT)
+    if cache_duration is not None:
+        ed.cache_duration = f"PT{int(cache_duration.total_seconds())}S"
+
+    if sign:
+        sec = create_security_context(config)
+        ed.id = sid()
+        ed.signature = pre_signature_part(
+            ed.id,
+            sec.my_cert,
+            1,
+            sign_alg=SIG_RSA_SHA256,
+            digest_alg=DIGEST_SHA256,
+        )
+
+    # clean up xml-representation
+    ed_etree = ET.XML(ed.to_string(NS_PREFIX))
+    ET.indent(ed_etree)
+    xml_bytes = ET.tostring(ed_etree, xml_declaration=True, encoding="utf-8")
+
+    if sign:
+        # sign after indenting, as indenting afterwards would invalidate the signature
+        signed_xml = sec.sign_statement(
+            xml_bytes,
+            f"{ed.c_namespace}:{ed.c_tag}",
+            node_id=ed.id,
+        )
+        if isinstance(signed_xml, bytes):
+            signed_xml = signed_xml.decode("utf-8")
+        if not signed_xml.startswith("<?xml"):
+            signed_xml = XML_DECLARATION + signed_xml
+        xml_bytes = signed_xml.encode("utf-8")
+
+    return RenderedSPMetadata(
+        xml=xml_bytes,
+        etag=hashlib.sha256(xml_bytes).hexdigest(),
+        rendered_at=rendered_at,
+        valid_until=valid_until,
+    )
+
+
+class SPMetadataCache:
+    """Holds rendered SP metadata of one config, renders anew when config changes or when stale."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self._lock = Lock()
+        self._config_dict: dict[str, Any] | None = None
+        self._options: dict[str, Any] | None = None
+        self._rendered: RenderedSPMetadata | None = None
+
+    def get(
+        self,
+        config_dict: dict[str, Any],
+        *,
+        valid_for: timedelta | None = None,
+        cache_duration: timedelta | None = None,
+        sign: bool = False,
+    ) -> RenderedSPMetadata:
+        """Get rendered SP metadata, rendering only if not cached (see `render_sp_metadata`)."""
+        options = {
+            "valid_for": valid_for,
+            "cache_duration": cache_duration,
+            "sign": sign,
+        }
+        with self._lock:
+            rendered = self._rendered
+            if (
+                rendered is None
+                # config is set once on app-finalization, so its identity identifies its revision
+                or self._config_dict is not config_dict
+                or self._options != options
+                or rendered.is_stale(datetime.now(UTC))
+            ):
+                rendered = render_sp_metadata(config_dict, **options)
+                self._config_dict = config_dict
+                self._options = options
+                self._rendered = rendered
+            return rendered
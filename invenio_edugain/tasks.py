@@ -10,8 +10,7 @@
 from celery import shared_task
 from flask import current_app
 
-from . import ingest
-from .utils import load_mdstore
+from .bookkeeping import process_queued_login_records
 
 
 @shared_task
@@ -21,6 +20,10 @@ def ingest_idp_data(
     fingerprint_sha256: str | None = None,
 ) -> None:
     """Ingest idp-data from given SAML metadata XML into db."""
+    # imported on first run, as workers import tasks on boot and pysaml2 is slow to import
+    from . import ingest  # noqa: PLC0415
+    from .utils import load_mdstore  # noqa: PLC0415
+
     mds = load_mdstore(metadata_xml_location, cert_location, fingerprint_sha256)
     item = ingest.from_mdstore(mds)
 
@@ -28,6 +31,17 @@ def ingest_idp_data(
         f"succesfully ingested IdP data from {metadata_xml_location!r}:\n"
         f"{len(item.added_idp_ids)} added: {item.added_idp_ids!r},\n"
         f"{len(item.updated_idp_ids)} updated: {item.updated_idp_ids!r},\n"
-        f"{len(item.unchanged_idp_ids)} unchanged: [...]"  # list of unchanged omitted for log brevity
+        f"{len(item.unchanged_idp_ids)} unchanged: [...],\n"  # list of unchanged omitted for log brevity
+        f"{len(item.rule_changes)} changed by ingest-rules: {item.rule_changes!r}"
+    )
+    current_app.logger.info(log_msg)
+
+
+@shared_task(ignore_result=True)
+def process_login_bookkeeping() -> None:
+    """Write login-records queued by deferred login-bookkeeping into db, in batches."""
+    count = process_queued_login_records(
+        batch_size=current_app.config["EDUGAIN_LOGIN_BOOKKEEPING_BATCH_SIZE"],
     )
+    log_msg = f"wrote {count} queued login-records"
     current_app.logger.info(log_msg)
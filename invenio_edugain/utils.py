@@ -7,73 +7,43 @@
 
 """Utils for invenio-edugain."""
 
-import enum
 import string
 from dataclasses import dataclass
 from datetime import UTC, datetime
 from os import PathLike
 from secrets import token_hex
 from tempfile import NamedTemporaryFile
-from typing import Any, Literal, Self, TypedDict, TypeGuard
+from typing import Any, Self, TypedDict, TypeGuard
 
 import requests
 import validators
-from flask import current_app, redirect
-from flask_security import login_user
+from email_validator import EmailNotValidError, validate_email
+from flask import current_app, redirect, request
+from flask_login import login_user as flask_login_user
+from flask_principal import Identity, identity_changed
 from flask_security.registerable import register_user
+from flask_security.signals import user_registered
+from flask_security.utils import config_value, send_mail
 from invenio_accounts.models import User, UserIdentity
+from invenio_accounts.utils import validate_domain
 from invenio_db import db
 from invenio_oauthclient.utils import create_csrf_disabled_registrationform, fill_form
 from OpenSSL.crypto import FILETYPE_PEM, load_certificate
 from saml2 import BINDING_HTTP_POST
-from saml2.client import Saml2Client
-from saml2.config import Config, SPConfig
+from saml2.config import Config
 from saml2.mdstore import InMemoryMetaData, MetadataStore
 from saml2.response import AuthnResponse
-from sqlalchemy import true
+from sqlalchemy import func, or_, true
 from uritools import uricompose, urisplit
 from werkzeug.wrappers import Response as BaseResponse
 
+from .bookkeeping import LoginRecord, apply_login_records, queue_login_records
+from .certs import CachedCertificate, idp_certificate_cache
+from .crypto import create_saml2_client, load_pysaml2_config
+from .metrics import set_metrics_label, timed_stage
 from .models import IdPData
-
-
-class _ABSENT(enum.Enum):
-    """Sentinel distinguishable from `None`."""
-
-    ABSENT = enum.auto()
-
-    def __repr__(self) -> str:
-        return "ABSENT"
-
-    def __str__(self) -> str:
-        return "ABSENT"
-
-    def __bool__(self) -> Literal[False]:
-        return False
-
-
-ABSENT = _ABSENT.ABSENT
-type AbsentType = Literal[_ABSENT.ABSENT]
-
-
-class _NOT_CONFIGURED(enum.Enum):  # noqa: N801
-    """Sentinel for unconfigured vars."""
-
-    NOT_CONFIGURED = enum.auto()
-
-    def __repr__(self) -> str:
-        return "NOT_CONFIGURED"
-
-    def __str__(self) -> str:
-        return "NOT_CONFIGURED"
-
-    def __bool__(self) -> bool:
-        return False
-
-
-NOT_CONFIGURED = _NOT_CONFIGURED.NOT_CONFIGURED
-type NotConfiguredType = Literal[_NOT_CONFIGURED.NOT_CONFIGURED]
-
+from .replica import read_replica
+from .revalidate import current_metadata_snapshot
 
 NS_PREFIX = {
     "alg": "urn:oasis:names:tc:SAML:metadata:algsupport",
@@ -172,11 +142,36 @@ class MetaDataFlaskSQL(InMemoryMetaData):
         super().__init__(attrc, **kwargs)
 
     def load(self, *args: Any, **kwargs: Any) -> None:  # noqa: ANN401, ARG002
-        """Load."""
-        for idp in db.session.scalars(
-            db.select(IdPData).where(IdPData.enabled == true()),
+        """Load, from this process's snapshot or the read replica if configured (see `invenio_edugain.revalidate`, `invenio_edugain.replica`)."""
+        snapshot = current_metadata_snapshot()
+        if snapshot is not None:
+            self.entity.update(snapshot.settings_by_id)
+            return
+        for row in read_replica.execute(
+            db.select(IdPData.id, IdPData.settings).where(IdPData.enabled == true()),
         ):
-            self.entity[idp.id] = idp.settings
+            self.entity[row.id] = row.settings
+
+    def certs(
+        self,
+        entity_id: str,
+        descriptor: str,
+        use: str = "signing",
+    ) -> list[tuple[str | None, CachedCertificate]]:
+        """Get certificates of given IdP, parsed only once per version of its settings.
+
+        Raises `KeyError` for IdPs that aren't enabled, before parsing anything.
+        """
+        settings = self.entity[entity_id]
+        return [
+            (cert.key_name, cert)
+            for cert in idp_certificate_cache.certs(
+                entity_id,
+                settings,
+                descriptor,
+                use,
+            )
+        ]
 
 
 class AuthnResponseError(Exception):
@@ -215,18 +210,21 @@ class AuthnInfo:
         next_: str | None = None,
     ) -> Self:
         """Create authentication info from a saml xml."""
-        config_dict = current_app.config["EDUGAIN_PYSAML2_CONFIG"]
-        config = SPConfig()
-        config.load(config_dict)
-        client = Saml2Client(config)
-
-        authn_response: AuthnResponse | None = client.parse_authn_request_response(
-            saml_xml_response,
-            BINDING_HTTP_POST,
-        )
+        with timed_stage("load_config"):
+            config_dict = current_app.config["EDUGAIN_PYSAML2_CONFIG"]
+            config = load_pysaml2_config(config_dict)
+            client = create_saml2_client(config)
+
+        # includes signature-verification and decryption
+        with timed_stage("parse_response"):
+            authn_response: AuthnResponse | None = client.parse_authn_request_response(
+                saml_xml_response,
+                BINDING_HTTP_POST,
+            )
         if authn_response is None:
             msg = "error when parsing SAML <Response>"
             raise AuthnResponseError(msg)
+        set_metrics_label("idp", authn_response.issuer() or "")
 
         # ava (attribute value assertions) is dict: friendlyName->list[str]
         ava = authn_response.get_identity()
@@ -291,14 +289,15 @@ class AuthnInfo:
             username = "X" * (MIN_USERNAME_LEN - len(username)) + username
 
         first_found_user = None
-        for method, id_ in id_by_method.items():
-            if found_user := UserIdentity.get_user(method, id_):
-                if first_found_user is None:
-                    first_found_user = found_user
-                elif first_found_user != found_user:
-                    # muliple methods given, linking to different users
-                    msg = "SAML <Response> identifies multiple different users"
-                    raise AuthnResponseError(msg)
+        with timed_stage("identity_lookup"):
+            for method, id_ in id_by_method.items():
+                if found_user := UserIdentity.get_user(method, id_):
+                    if first_found_user is None:
+                        first_found_user = found_user
+                    elif first_found_user != found_user:
+                        # muliple methods given, linking to different users
+                        msg = "SAML <Response> identifies multiple different users"
+                        raise AuthnResponseError(msg)
 
         return cls(
             id_by_method=id_by_method,  # type: ignore[arg-type]  # has correct keys, even if mypy can't tell
@@ -369,6 +368,93 @@ def create_user(authn_info: AuthnInfo) -> User:
     return user
 
 
+def provision_user(authn_info: AuthnInfo) -> User:
+    """Add user with profile, linked with first method in authn_info.id_by_method, to db-session.
+
+    Validates like the registration form used by `create_user`:
+    email must be given, well-formed, not yet registered, and not of a blocked domain.
+    Unlike `create_user`, neither builds a form nor commits:
+    the caller commits once, e.g. together with login-bookkeeping,
+    then calls `announce_user_registration`.
+    """
+    if authn_info.user is not None:
+        msg = "Tried to create a user when they already exist"
+        raise ValueError(msg)
+
+    if not authn_info.emails:
+        msg = "Cannot create user when no email was given"
+        raise ValueError(msg)
+
+    email = authn_info.emails[0]
+    try:
+        # same check as the registration form's email-field
+        validate_email(email, check_deliverability=False)
+    except EmailNotValidError as error:
+        msg = f"IdP sent an invalid email address: {email!r}"
+        raise AuthnResponseError(msg) from error
+
+    username = authn_info.suggested_username
+    existing = db.session.scalars(
+        db.select(User).where(
+            or_(
+                func.lower(User.email) == email.lower(),
+                User.username == username,
+            ),
+        ),
+    ).first()
+    if existing is not None and existing.email.lower() == email.lower():
+        msg = "email address is already associated with another account"
+        raise AuthnResponseError(msg)
+    if existing is not None:
+        msg = f"username {username!r} is already taken"
+        raise AuthnResponseError(msg)
+
+    if not validate_domain(email):
+        msg = "email domain is blocked"
+        raise AuthnResponseError(msg)
+
+    method, external_id = next(
+        (meth, id_) for meth, id_ in authn_info.id_by_method.items() if id_ is not None
+    )
+    try:
+        user = current_app.extensions["security"].datastore.create_user(
+            email=email,
+            password=None,
+            active=True,
+            confirmed_at=datetime.now(UTC),
+            username=username,  # validated by `User.username` setter
+            user_profile={
+                "affiliations": ";".join(authn_info.affiliations),
+                "full_name": authn_info.full_name,
+            },
+        )
+    except ValueError as error:
+        msg = f"invalid username {username!r}"
+        raise AuthnResponseError(msg) from error
+    db.session.add(UserIdentity(id=external_id, method=method, user=user))
+    # flush to assign `user.id`, which starting a session needs
+    db.session.flush()
+
+    return user
+
+
+def announce_user_registration(user: User) -> None:
+    """Send the signal and email that flask-security's `register_user` would send."""
+    user_registered.send(
+        current_app._get_current_object(),  # noqa: SLF001
+        user=user,
+        confirm_token=None,
+    )
+    if config_value("SEND_REGISTER_EMAIL"):
+        send_mail(
+            config_value("EMAIL_SUBJECT_REGISTER"),
+            user.email,
+            "welcome",
+            user=user,
+            confirmation_link=None,
+        )
+
+
 def secure_redirect_url(unsafe_url: str) -> str:
     """Create safe (local) redirect URL from potentially unsafe (remote) URL.
 
@@ -393,23 +479,70 @@ def secure_redirect_url(unsafe_url: str) -> str:
     return "/"
 
 
+def start_session(user: User) -> bool:
+    """Log in `user` for the current session, without writing to db.
+
+    This is flask-security's `login_user` minus login-tracking,
+    which `invenio_edugain.bookkeeping` takes care of.
+    Returns False if the user is inactive (hence wasn't logged in).
+    """
+    if not flask_login_user(user):
+        return False
+    identity_changed.send(
+        current_app._get_current_object(),  # noqa: SLF001
+        identity=Identity(user.id),
+    )
+    return True
+
+
+def login_record(authn_info: AuthnInfo, user: User) -> LoginRecord:
+    """Record current login of `user`, for post-login bookkeeping."""
+    return {
+        "user_id": user.id,
+        "login_at": current_app.extensions["security"].datetime_factory().isoformat(),
+        "remote_addr": request.remote_addr or None,
+        "full_name": authn_info.full_name,
+        "affiliations": authn_info.affiliations,
+        "identities": [
+            (method, id_) for method, id_ in authn_info.id_by_method.items() if id_
+        ],
+    }
+
+
 def default_authn_response_handler(
     authn_info: AuthnInfo,
     next_url: str,
 ) -> BaseResponse:
     """Handle authn-response by creating uncreated accounts and then logging them in."""
-    if authn_info.user is None:
+    is_new_user = authn_info.user is None
+    if is_new_user:
         # no user found in db, create one
         # to prevent name collisions of users with same name, use random username instead
         # we never show username to other users anyway...
         # 16 bytes means chance of collisions is virtually 0 up to about 10**15 users
         authn_info.suggested_username = "user-" + token_hex(nbytes=16)
-        authn_info.user = create_user(authn_info)
+        authn_info.user = provision_user(authn_info)
 
-    if not login_user(authn_info.user):
+    if not start_session(authn_info.user):
         # user.active is False, hence wasn't logged in
         msg = "User was blocked/deactivated"
         raise AuthnResponseError(msg)
+
+    record = login_record(authn_info, authn_info.user)
+    deferred = current_app.config["EDUGAIN_DEFER_LOGIN_BOOKKEEPING"]
+    if deferred:
+        try:
+            queue_login_records([record])
+        except Exception:
+            # don't fail logins because of non-critical bookkeeping, write it right away instead
+            current_app.logger.exception("could not queue login-record")
+            deferred = False
+    if not deferred:
+        apply_login_records([record])
+
+    # commits user-creation (if any) and non-deferred bookkeeping in one transaction
     current_app.extensions["security"].datastore.commit()
+    if is_new_user:
+        announce_user_registration(authn_info.user)
 
     return redirect(next_url or current_app.config["SECURITY_POST_LOGIN_VIEW"])
@@ -7,8 +7,8 @@
 
 """invenio-edugain views."""
 
-from collections import defaultdict
-from xml.etree import ElementTree as ET
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
 
 from flask import (
     Blueprint,
@@ -19,109 +19,128 @@ from flask import (
     redirect,
     render_template,
     request,
+    send_from_directory,
+    url_for,
 )
 from invenio_base.utils import load_or_import_from_config
-from invenio_db import db
 from invenio_i18n.proxies import current_i18n
 from invenio_oauthclient.utils import get_safe_redirect_target
-from saml2.client import Saml2Client
-from saml2.config import Config, SPConfig
-from saml2.mdstore import MetadataStore
-from saml2.metadata import entity_descriptor
 from werkzeug.wrappers import Response as BaseResponse
 
-from .models import IdPData
-from .utils import (
-    NS_PREFIX,
-    AuthnInfo,
-    AuthnResponseError,
-    secure_redirect_url,
+from .feed import (
+    MAX_PREFERRED_IDPS,
+    SAML_IDP_COOKIE,
+    FeedVariant,
+    build_feed,
+    exported_feed_url,
+    feed_deltas,
+    parse_saml_idp_cookie,
+    preferred_feed,
 )
+from .metrics import PrometheusSink, instrumented, set_metrics_label, timed_stage
+from .profiling import start_request_profile, stop_request_profile
+from .revalidate import current_metadata_snapshot
+
+# logos are stored under content-addressed filenames, hence never change under their URL
+LOGO_MAX_AGE = 365 * 24 * 60 * 60
 
 
 def login_discover() -> str:
     """Discovery page for choosing an IdP."""
-    shibboleth_eds_config = current_app.config["EDUGAIN_SHIBBOLETH_EDS_CONFIG"]
-    shibboleth_eds_config["selectedLanguage"] = current_i18n.language
+    shibboleth_eds_config = {
+        **current_app.config["EDUGAIN_SHIBBOLETH_EDS_CONFIG"],
+        "selectedLanguage": current_i18n.language,
+    }
+    shibboleth_kwargs = current_app.config["EDUGAIN_SHIBBOLETH_EDS_CONFIG_KWARGS"] or {}
+    # the page only shows its language's entries, hence loads the feed slimmed down to those
+    variant_args = {"lang": current_i18n.language}
+    # feed gets re-exported under a new name on changes, after the config was built
+    feed_url = exported_feed_url(current_app, lang=current_i18n.language)
+    if "dataSource" not in shibboleth_kwargs:
+        shibboleth_eds_config["dataSource"] = feed_url or url_for(
+            "invenio_edugain.disco_feed",
+            **variant_args,
+        )
+
+    # browsers cache the feed and fetch only its changes, unless it's served as static files
+    feed_deltas_url = None
+    if (
+        feed_url is None
+        and "invenio_edugain.disco_feed_deltas" in current_app.view_functions
+    ):
+        feed_deltas_url = url_for("invenio_edugain.disco_feed_deltas", **variant_args)
+
+    # inlined s.t. shortcuts to preferred and recently chosen IdPs show before the feed loaded
+    snapshot = current_metadata_snapshot()
+    inlined_feed = preferred_feed(
+        [
+            *(shibboleth_eds_config.get("preferredIdP") or []),
+            *parse_saml_idp_cookie(request.cookies.get(SAML_IDP_COOKIE, "")),
+        ],
+        FeedVariant.for_app(current_app, current_i18n.language),
+        max_idps=shibboleth_eds_config.get("maxPreferredIdPs", MAX_PREFERRED_IDPS),
+        feed=snapshot.feed if snapshot is not None else None,
+    )
 
     return render_template(
         current_app.config["EDUGAIN_DISCOVERY_TEMPLATE"],
         shibboleth_eds_config=shibboleth_eds_config,
+        feed_deltas_url=feed_deltas_url,
+        preferred_feed=inlined_feed,
     )
 
 
-def disco_feed() -> list:
-    """Return disco feed for use with shibboleth EDS."""
-    config_dict = current_app.config["EDUGAIN_PYSAML2_CONFIG"]
-    config = Config()
-    config.load(config_dict)
-    mds: MetadataStore = config.metadata
-
-    discoverable_query = db.select(
-        IdPData.id,
-    ).where(
-        IdPData.discoverable == db.true(),
-        IdPData.enabled == db.true(),
-    )
-    discoverable_idp_ids: set[str] = set(db.session.scalars(discoverable_query))
-
-    feed = []
-    available_idp_ids = sorted(set(mds.identity_providers()) & discoverable_idp_ids)
-    for idp_id in available_idp_ids:
-        # entry is one item in the feed
-        entry: dict[str, list | str] = {"entityID": idp_id}
-
-        names_by_lang = defaultdict(list)  # names ordered by relevance
-        uiinfos = list(mds.mdui_uiinfo(idp_id))
-        for uiinfo in uiinfos:
-            for dn in uiinfo.get("display_name", []):
-                names_by_lang[dn["lang"]].append(dn["text"])
-        org = mds[idp_id].get("organization", {})
-        for name_key in [
-            "organization_display_name",
-            "organization_name",
-            "organization_url",
-        ]:
-            for name_dict in org.get(name_key, []):
-                names_by_lang[name_dict["lang"]].append(name_dict["text"])
-
-        entry["DisplayNames"] = [
-            {"lang": lang, "value": names[0]} for lang, names in names_by_lang.items()
-        ]
-
-        entry["Keywords"] = [
-            {"lang": kw["lang"], "value": kw["text"]}
-            for uiinfo in uiinfos
-            for kw in uiinfo.get("keywords", [])
-        ]
-
-        logo_entries = []
-        for uiinfo in uiinfos:
-            for logo in uiinfo.get("logo", []):
-                logo_entry = {
-                    "value": logo["text"],
-                    "height": logo["height"],
-                    "width": logo["width"],
-                }
-                if "lang" in logo:
-                    logo_entry["lang"] = logo["lang"]
-                logo_entries.append(logo_entry)
-        if not any(le["height"] == le["width"] for le in logo_entries):
-            # add fallback for small icon showing next to dropdown choices
-            logo_entries.append(
-                {
-                    "value": "/static/transparent-16x16.png",
-                    "height": 16,
-                    "width": 16,
-                },
-            )
-        entry["Logos"] = logo_entries
-
-        feed.append(entry)
+def requested_feed_variant() -> FeedVariant | None:
+    """Get variant of disco feed requested via `?lang=<language>`, `None` for the whole feed.
 
-    return feed
+    `?keywords=0` additionally drops keywords, e.g. for pages ignoring them anyway.
+    """
+    lang = request.args.get("lang")
+    if not lang:
+        return None
+    variant = FeedVariant.for_app(current_app, lang)
+    if request.args.get("keywords") == "0":
+        variant = replace(variant, keywords=False)
+    return variant
+
+
+@instrumented("disco_feed")
+def disco_feed() -> list | BaseResponse:
+    """Return disco feed for use with shibboleth EDS.
+
+    Restricted to IdPs of given federations via `?federation=<registration-authority>`,
+    which may be given multiple times.
+    Slimmed down to what a page in one language shows via `?lang=<language>`,
+    see `requested_feed_variant`.
+    """
+    federations = request.args.getlist("federation")
+    variant = requested_feed_variant()
+    snapshot = current_metadata_snapshot()
+    if snapshot is not None:
+        content = snapshot.feed_content(variant, federations=federations)
+        return Response(content, mimetype="application/json")
+    if variant is None:
+        return build_feed(federations=federations, from_replica=True)
+    feed_variant_cache = current_app.extensions["invenio-edugain"].feed_variant_cache
+    content = feed_variant_cache.get(variant, federations=federations)
+    return Response(content, mimetype="application/json")
+
+
+@instrumented("disco_feed_deltas")
+def disco_feed_deltas() -> dict:
+    """Return changes of disco feed since revision `?since=<revision>`, for the discovery page's cache.
+
+    Without (a usable) `since`, the whole feed is returned instead.
+    Entries are slimmed down as for the disco feed, see `requested_feed_variant`.
+    """
+    with timed_stage("query"):
+        return feed_deltas(
+            since=request.args.get("since", type=int),
+            variant=requested_feed_variant(),
+        )
 
 
+@instrumented("authn_request")
 def authn_request() -> BaseResponse:
     """Send an authorization-request to IdP depending on `request.args`.
 
@@ -132,6 +151,8 @@ def authn_request() -> BaseResponse:
     entityid = request.args.get("entityID")
     if entityid is None:
         abort(400, description="Missing required parameter: id")
+    # `entityID` is unauthenticated, label by it only once it resolved to an enabled IdP
+    set_metrics_label("idp", "unknown")
 
     # "relay state" is SAML's name for "URL to redirect to after succesful login"
     relay_state: str = (
@@ -140,29 +161,28 @@ def authn_request() -> BaseResponse:
         or "/"
     )
 
-    # pysaml2: create authn-request
-    config_dict = current_app.config["EDUGAIN_PYSAML2_CONFIG"]
-    config = SPConfig()
-    config.load(config_dict)
-    client = Saml2Client(config)
-
-    # multiple ACS URLs may be configured for `client` (e.g. test-, prod-server)
-    # find the ACS URL corresponding to the request's host
-    host_url = request.host_url
-    assertion_consumer_service_url = None
-    for url in client.service_urls():
-        if url.startswith(host_url):
-            assertion_consumer_service_url = url
-            break
-    else:
-        abort(400, description="No ACS configured for this host")
-
-    _request_id, http_args = client.prepare_for_authenticate(
-        entityid=entityid,
-        relay_state=relay_state,
-        nsprefix=NS_PREFIX,
-        assertion_consumer_service_url=assertion_consumer_service_url,
-    )
+    # create authn-request, with output as from pysaml2's `prepare_for_authenticate`
+    with timed_stage("prepare_request"):
+        config_dict = current_app.config["EDUGAIN_PYSAML2_CONFIG"]
+        templates = current_app.extensions["invenio-edugain"].authn_request_templates(
+            config_dict,
+        )
+
+        # multiple ACS URLs may be configured (e.g. test-, prod-server)
+        # find the ACS URL corresponding to the request's host
+        assertion_consumer_service_url = templates.acs_url_by_host_url.get(
+            request.host_url,
+        )
+        if assertion_consumer_service_url is None:
+            abort(400, description="No ACS configured for this host")
+
+        _request_id, http_args = templates.prepare_for_authenticate(
+            entity_id=entityid,
+            relay_state=relay_state,
+            acs_url=assertion_consumer_service_url,
+            sso_location_ttl=current_app.config["EDUGAIN_AUTHN_REQUEST_CACHE_TTL"],
+        )
+    set_metrics_label("idp", entityid)
 
     # create flask redirect from pysaml2
     redirect_urls = [
@@ -188,25 +208,45 @@ def authn_request() -> BaseResponse:
 
 def sp_xml() -> Response:
     """Show SAML xml-metadata of this service provider."""
-    config_dict = current_app.config["EDUGAIN_PYSAML2_CONFIG"]
-    config = Config()
-    config.load(config_dict)
-    ed = entity_descriptor(config)
-
-    # clean up xml-representation
-    ed_etree = ET.XML(ed.to_string(NS_PREFIX))
-    ET.indent(ed_etree)
-    xml_bytes = ET.tostring(ed_etree, xml_declaration=True, encoding="utf-8")
+    config = current_app.config
+    cache_duration: timedelta | None = config["EDUGAIN_SP_METADATA_CACHE_DURATION"]
+    rendered = current_app.extensions["invenio-edugain"].sp_metadata_cache.get(
+        config["EDUGAIN_PYSAML2_CONFIG"],
+        valid_for=config["EDUGAIN_SP_METADATA_VALID_FOR"],
+        cache_duration=cache_duration,
+        sign=config["EDUGAIN_SP_METADATA_SIGNED"],
+    )
 
-    return Response(
-        xml_bytes,
+    response = Response(
+        rendered.xml,
         content_type="application/xml; charset=utf-8",
         mimetype="application/xml",
     )
+    response.set_etag(rendered.etag)
+    response.last_modified = rendered.rendered_at
+    response.cache_control.public = True
+    if cache_duration is None:
+        # may be cached, but needs revalidation (cheap thanks to ETag)
+        response.cache_control.no_cache = True
+    else:
+        max_age = cache_duration
+        if rendered.valid_until is not None:
+            max_age = min(max_age, rendered.valid_until - datetime.now(UTC))
+        response.cache_control.max_age = max(int(max_age.total_seconds()), 0)
+
+    return response.make_conditional(request)
 
 
+@instrumented("acs")
 def acs() -> BaseResponse:
     """Assertion consumer service."""  # noqa:D401
+    # imported on first login, as pysaml2 is slow to import
+    from .utils import (  # noqa: PLC0415
+        AuthnInfo,
+        AuthnResponseError,
+        secure_redirect_url,
+    )
+
     next_url = secure_redirect_url(request.form.get("RelayState", ""))
     saml_response = request.form.get("SAMLResponse")
     if saml_response is None:
@@ -216,7 +256,31 @@ def acs() -> BaseResponse:
     authn_info = AuthnInfo.from_saml_response(saml_response)
 
     response_handler = load_or_import_from_config("EDUGAIN_AUTHN_RESPONSE_HANDLER")
-    return response_handler(authn_info, next_url)
+    with timed_stage("response_handler"):
+        return response_handler(authn_info, next_url)
+
+
+def logo(filename: str) -> BaseResponse:
+    """Serve logo stored in `EDUGAIN_LOGO_CACHE_DIR`, immutable as its filename is content-addressed."""
+    directory = current_app.config.get("EDUGAIN_LOGO_CACHE_DIR")
+    if directory is None:
+        abort(404)
+
+    response = send_from_directory(directory, filename, max_age=LOGO_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
+
+
+def metrics() -> Response:
+    """Show aggregated timings in Prometheus text-format (if configured)."""
+    sink = current_app.extensions["invenio-edugain"].metrics_sink
+    if not isinstance(sink, PrometheusSink):
+        abort(404)
+
+    return Response(
+        sink.exposition(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
 
 
 def create_blueprint(app: Flask) -> Blueprint:
@@ -238,8 +302,18 @@ def create_blueprint(app: Flask) -> Blueprint:
     allow_imgsrc_csp = talisman(
         content_security_policy=default_csp | {"img-src": "*"},
     )
+    # cached logos come from this origin or are inlined, see `EDUGAIN_LOGO_CACHE_DIR`
+    self_imgsrc_csp = talisman(
+        content_security_policy=default_csp | {"img-src": "'self' data:"},
+    )
+    # the feed points to cached logos only when they're served via the "logos" route, see `feed._cached_logos`
+    logos_cached = (
+        app.config.get("EDUGAIN_LOGO_CACHE_DIR") is not None and "logos" in routes
+    )
     # apply decorator (note that @decorator syntax is just syntactic sugar for calling the func)
     match app.config.get("EDUGAIN_ALLOW_IMGSRC_CSP"):
+        case True | None if logos_cached:
+            discover_view = self_imgsrc_csp(login_discover)
         case True:
             discover_view = allow_imgsrc_csp(login_discover)
         case False:
@@ -254,7 +328,24 @@ def create_blueprint(app: Flask) -> Blueprint:
     blueprint.add_url_rule(routes["acs"], methods=["POST"], view_func=acs)
     blueprint.add_url_rule(routes["authn-request"], view_func=authn_request)
     blueprint.add_url_rule(routes["discofeed"], view_func=disco_feed)
+    if "discofeed-deltas" in routes:
+        blueprint.add_url_rule(routes["discofeed-deltas"], view_func=disco_feed_deltas)
     blueprint.add_url_rule(routes["login-discover"], view_func=discover_view)
+    if "logos" in routes:
+        # SVGs may hold scripts, which mustn't run when a logo is opened directly
+        sandbox_csp = talisman(
+            content_security_policy={
+                "default-src": "'none'",
+                "style-src": "'unsafe-inline'",
+            },
+        )
+        blueprint.add_url_rule(routes["logos"], view_func=sandbox_csp(logo))
+    if "metrics" in routes:
+        blueprint.add_url_rule(routes["metrics"], view_func=metrics)
     blueprint.add_url_rule(routes["sp-xml"], view_func=sp_xml)
 
+    # opt-in per config, see `EDUGAIN_PROFILE_REQUEST_TOKEN`, `EDUGAIN_PROFILE_SAMPLE_RATE`
+    blueprint.before_request(start_request_profile)
+    blueprint.teardown_request(stop_request_profile)
+
     return blueprint
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test on-disk caching of automatically built configurations."""
+
+import os
+import shutil
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+
+import pytest
+from flask import Flask
+
+from invenio_edugain import build_config
+from invenio_edugain.build_config.cache import (
+    CREDENTIAL_CONFIG_KEYS,
+    RELEVANT_CONFIG_KEYS,
+    ConfigCache,
+)
+from invenio_edugain.build_config.pysaml2_core import Pysaml2ConfigCore
+from invenio_edugain.crypto import IN_PROCESS_CRYPTO_BACKEND
+from invenio_edugain.ext import setup_configuration
+
+from .saml_config import sample_flask_config
+
+
+def flask_config_keys(dataclass_type: type) -> set[str]:
+    """Get config-vars a (nested) config-core dataclass reads from flask config."""
+    keys = set()
+    for field in fields(dataclass_type):
+        if "flask_config_key" in field.metadata:
+            keys.add(field.metadata["flask_config_key"])
+        elif is_dataclass(field.type):
+            keys |= flask_config_keys(field.type)
+    return keys
+
+
+def test_relevant_keys_cover_config_core():
+    """Every config-var the config-core is built from invalidates the cache."""
+    assert flask_config_keys(Pysaml2ConfigCore) <= set(RELEVANT_CONFIG_KEYS)
+    assert set(CREDENTIAL_CONFIG_KEYS) <= set(RELEVANT_CONFIG_KEYS)
+
+
+@pytest.fixture
+def cached_app(
+    base_app: Flask,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Flask:
+    """App with a buildable pysaml2 config, credentials in `tmp_path`, and a cache-dir."""
+    for key, value in sample_flask_config.items():
+        monkeypatch.setitem(base_app.config, key, value)
+    for key in CREDENTIAL_CONFIG_KEYS:
+        filepath = tmp_path / Path(sample_flask_config[key]).name
+        shutil.copy(sample_flask_config[key], filepath)
+        monkeypatch.setitem(base_app.config, key, str(filepath))
+    monkeypatch.setitem(
+        base_app.config,
+        "EDUGAIN_CRYPTO_BACKEND",
+        IN_PROCESS_CRYPTO_BACKEND,
+    )
+    monkeypatch.setitem(
+        base_app.config,
+        "EDUGAIN_PYSAML2_CONFIG_BUILDING_ENABLED",
+        True,  # noqa: FBT003
+    )
+    monkeypatch.setitem(
+        base_app.config,
+        "EDUGAIN_CONFIG_CACHE_DIR",
+        str(tmp_path / "cache"),
+    )
+    return base_app
+
+
+def test_cache_reused_until_inputs_change(
+    cached_app: Flask,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Configs are built once, then loaded from cache, until config or credentials change."""
+    builds = []
+    build_pysaml2_config = build_config.build_pysaml2_config
+
+    def counting_build(*args, **kwargs):  # noqa: ANN002, ANN003, ANN202
+        builds.append(kwargs["crypto_backend"])
+        return build_pysaml2_config(*args, **kwargs)
+
+    monkeypatch.setattr(build_config, "build_pysaml2_config", counting_build)
+
+    setup_configuration(cached_app)
+    built_config = cached_app.config["EDUGAIN_PYSAML2_CONFIG"]
+    assert isinstance(built_config, dict)
+    setup_configuration(cached_app)
+    assert len(builds) == 1
+    # tuples survive the round-trip through JSON
+    assert cached_app.config["EDUGAIN_PYSAML2_CONFIG"] == built_config
+    assert isinstance(cached_app.config["EDUGAIN_PYSAML2_CONFIG"]["description"], tuple)
+    assert (
+        cached_app.config["EDUGAIN_SHIBBOLETH_EDS_CONFIG"]["dataSource"]
+        == "/saml/discofeed"
+    )
+
+    signing_cert = Path(cached_app.config["EDUGAIN_SIGNING_CERT"])
+    mtime_ns = signing_cert.stat().st_mtime_ns + 1_000_000_000
+    os.utime(signing_cert, ns=(mtime_ns, mtime_ns))
+    setup_configuration(cached_app)
+    assert len(builds) == 2  # noqa: PLR2004
+
+    monkeypatch.setitem(cached_app.config, "EDUGAIN_SERVICE_NAME_EN", "Bar Repository")
+    setup_configuration(cached_app)
+    assert len(builds) == 3  # noqa: PLR2004
+    assert cached_app.config["EDUGAIN_PYSAML2_CONFIG"]["name"] == "Bar Repository"
+
+
+def test_failed_builds_not_cached(cached_app: Flask, monkeypatch: pytest.MonkeyPatch):
+    """Failed builds don't get cached, and caching can be turned off."""
+    monkeypatch.setitem(cached_app.config, "EDUGAIN_SIGNING_KEY", "/nonexistent.key")
+    setup_configuration(cached_app)
+    cache = ConfigCache.for_app(cached_app)
+    assert "EDUGAIN_PYSAML2_CONFIG" not in cache.load()
+    assert "EDUGAIN_SHIBBOLETH_EDS_CONFIG" in cache.load()
+
+    monkeypatch.setitem(cached_app.config, "EDUGAIN_CONFIG_CACHE_DIR", None)
+    assert ConfigCache.for_app(cached_app) is None
@@ -7,8 +7,18 @@
 
 """Pytest configuration."""
 
+from collections.abc import Callable, Mapping, Sequence
+
 import pytest
 from invenio_app.factory import create_app as invenio_create_app
+from invenio_db.shared import SQLAlchemy
+from saml2.config import Config
+from saml2.mdstore import MetadataStore
+
+from invenio_edugain import ingest
+from invenio_edugain.crypto import IN_PROCESS_CRYPTO_BACKEND, load_pysaml2_config
+from invenio_edugain.extraction import ENTITY_CATEGORY_ATTRIBUTE
+from invenio_edugain.ingest import IdPDataImportItem
 
 
 @pytest.fixture(scope="module")
@@ -25,6 +35,9 @@ def app_config(app_config: dict):
     # shibboleth-eds config is simpler and should be buildable anyway...
     app_config["EDUGAIN_SHIBBOLETH_EDS_CONFIG_BUILDING_ENABLED"] = True
 
+    # queue deferred login-bookkeeping in-memory rather than via a message-broker
+    app_config["QUEUES_BROKER_URL"] = "memory://"
+
     return app_config
 
 
@@ -32,3 +45,94 @@ def app_config(app_config: dict):
 def create_app():
     """Flask app fixture for invenio_edugain."""
     return invenio_create_app
+
+
+def build_idp_xml(
+    idp_id: str,
+    *,
+    registration_authority: str | None = None,
+    entity_categories: Sequence[str] = (),
+    entity_attributes: Mapping[str, Sequence[str]] | None = None,
+    display_names: Mapping[str, str] | None = None,
+    keywords: Mapping[str, str] | None = None,
+    logos: Sequence[tuple[str, int, int]] = (),
+) -> str:
+    """Build metadata of an IdP with an HTTP-Redirect SSO at `{idp_id}/sso`.
+
+    Optionally with registration-info, entity-categories, further entity-attributes (name -> values),
+    and mdui-info: display-names and keywords (lang -> text), logos (url, width, height).
+    """
+    extensions = ""
+    if registration_authority is not None:
+        extensions += f'<mdrpi:RegistrationInfo registrationAuthority="{registration_authority}"/>'
+    entity_attributes = dict(entity_attributes or {})
+    if entity_categories:
+        entity_attributes[ENTITY_CATEGORY_ATTRIBUTE] = entity_categories
+    if entity_attributes:
+        extensions += "<mdattr:EntityAttributes>"
+        for name, values in entity_attributes.items():
+            extensions += f'<saml:Attribute Name="{name}">'
+            extensions += "".join(
+                f"<saml:AttributeValue>{value}</saml:AttributeValue>"
+                for value in values
+            )
+            extensions += "</saml:Attribute>"
+        extensions += "</mdattr:EntityAttributes>"
+
+    ui_info = "".join(
+        f'<mdui:DisplayName xml:lang="{lang}">{name}</mdui:DisplayName>'
+        for lang, name in (display_names or {}).items()
+    )
+    ui_info += "".join(
+        f'<mdui:Keywords xml:lang="{lang}">{words}</mdui:Keywords>'
+        for lang, words in (keywords or {}).items()
+    )
+    ui_info += "".join(
+        f'<mdui:Logo height="{height}" width="{width}">{url}</mdui:Logo>'
+        for url, width, height in logos
+    )
+
+    return f"""<md:EntityDescriptor
+    xmlns:md="urn:oasis:names:tc:SAML:2.0:metadata"
+    xmlns:mdattr="urn:oasis:names:tc:SAML:metadata:attribute"
+    xmlns:mdrpi="urn:oasis:names:tc:SAML:metadata:rpi"
+    xmlns:mdui="urn:oasis:names:tc:SAML:metadata:ui"
+    xmlns:saml="urn:oasis:names:tc:SAML:2.0:assertion"
+    entityID="{idp_id}">
+{f"<md:Extensions>{extensions}</md:Extensions>" if extensions else ""}
+<md:IDPSSODescriptor protocolSupportEnumeration="urn:oasis:names:tc:SAML:2.0:protocol">
+{f"<md:Extensions><mdui:UIInfo>{ui_info}</mdui:UIInfo></md:Extensions>" if ui_info else ""}
+<md:SingleSignOnService Binding="urn:oasis:names:tc:SAML:2.0:bindings:HTTP-Redirect" Location="{idp_id}/sso"/>
+</md:IDPSSODescriptor>
+</md:EntityDescriptor>"""
+
+
+def inline_mdstore(*xmls: str) -> MetadataStore:
+    """Get metadata-store of inline metadata."""
+    config = load_pysaml2_config(
+        {"crypto_backend": IN_PROCESS_CRYPTO_BACKEND, "metadata": {"inline": xmls}},
+        Config,
+    )
+    return config.metadata
+
+
+@pytest.fixture(scope="session")
+def idp_xml() -> Callable[..., str]:
+    """Get builder of IdPs' metadata, see `build_idp_xml`."""
+    return build_idp_xml
+
+
+@pytest.fixture(scope="session")
+def inline_metadata() -> Callable[..., MetadataStore]:
+    """Get builder of metadata-stores of inline metadata."""
+    return inline_mdstore
+
+
+@pytest.fixture
+def ingest_idps(db: SQLAlchemy) -> Callable[..., IdPDataImportItem]:  # noqa: ARG001
+    """Get function that ingests IdPs from inline metadata, passing kwargs on to `from_mdstore`."""
+
+    def ingest_inline(*xmls: str, **kwargs: object) -> IdPDataImportItem:
+        return ingest.from_mdstore(inline_mdstore(*xmls), **kwargs)
+
+    return ingest_inline
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test precomputed AuthnRequests against pysaml2's."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+from saml2 import BINDING_HTTP_POST
+from saml2.client_base import IdpUnspecified
+
+from invenio_edugain.authn_request import AuthnRequestTemplates, idp_sso_location_cache
+from invenio_edugain.crypto import (
+    IN_PROCESS_CRYPTO_BACKEND,
+    create_saml2_client,
+    load_pysaml2_config,
+)
+from invenio_edugain.metrics import load_metrics_sink
+from invenio_edugain.models import IdPData
+from invenio_edugain.utils import NS_PREFIX
+
+PKI = Path(__file__).parent / "build_config" / "pki"
+IDP_ID = "https://idp.foo.org/idp"
+IDP_XML = f"""<md:EntityDescriptor xmlns:md="urn:oasis:names:tc:SAML:2.0:metadata" entityID="{IDP_ID}">
+<md:IDPSSODescriptor protocolSupportEnumeration="urn:oasis:names:tc:SAML:2.0:protocol">
+<md:SingleSignOnService Binding="urn:oasis:names:tc:SAML:2.0:bindings:HTTP-POST" Location="https://idp.foo.org/sso/post"/>
+<md:SingleSignOnService Binding="urn:oasis:names:tc:SAML:2.0:bindings:HTTP-Redirect" Location="https://idp.foo.org/sso/redirect?a=b"/>
+</md:IDPSSODescriptor>
+</md:EntityDescriptor>"""
+ACS_URLS = [
+    "https://repository.foo.org/saml/acs",
+    "https://demo.repository.foo.org/saml/acs",
+]
+SP_CONFIG = {
+    "crypto_backend": IN_PROCESS_CRYPTO_BACKEND,
+    "entityid": "https://repository.foo.org/saml/sp/xml",
+    "name": "Foo Repository",
+    "cert_file": str(PKI / "signing.crt"),
+    "key_file": str(PKI / "signing.key"),
+    "metadata": [
+        {
+            "class": "invenio_edugain.utils.MetaDataFlaskSQL",
+            "metadata": [(None,)],
+        },
+    ],
+    "service": {
+        "sp": {
+            "authn_requests_signed": False,
+            "endpoints": {
+                "assertion_consumer_service": [
+                    (url, BINDING_HTTP_POST) for url in ACS_URLS
+                ],
+            },
+            "force_authn": False,
+            "name_id_format_allow_create": True,
+        },
+    },
+}
+
+
+@pytest.fixture
+def idp(db: SQLAlchemy, ingest_idps: Callable[..., object]) -> str:
+    """Ingest and enable an IdP."""
+    ingest_idps(IDP_XML)
+    db.session.get(IdPData, IDP_ID).enabled = True
+    db.session.commit()
+    idp_sso_location_cache.invalidate()
+    return IDP_ID
+
+
+def test_byte_compatible_with_pysaml2(
+    base_app: Flask,
+    idp: str,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """The view redirects to the very same URL pysaml2 would redirect to."""
+    monkeypatch.setattr("saml2.entity.sid", lambda: "id-fixed")
+    monkeypatch.setattr("saml2.entity.instant", lambda: "2026-10-01T12:00:00Z")
+    monkeypatch.setattr("invenio_edugain.authn_request.sid", lambda: "id-fixed")
+    monkeypatch.setattr(
+        "invenio_edugain.authn_request.instant",
+        lambda: "2026-10-01T12:00:00Z",
+    )
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PYSAML2_CONFIG", SP_CONFIG)
+    relay_state = "/next?q=a&c=d"
+
+    for acs_url in ACS_URLS:
+        host_url = acs_url.removesuffix("saml/acs")
+        with base_app.test_request_context(base_url=host_url):
+            client = create_saml2_client(load_pysaml2_config(SP_CONFIG))
+            _, expected = client.prepare_for_authenticate(
+                entityid=idp,
+                relay_state=relay_state,
+                nsprefix=NS_PREFIX,
+                assertion_consumer_service_url=acs_url,
+            )
+
+        response = base_app.test_client().get(
+            "/saml/login/authn-request",
+            query_string={"entityID": idp, "next": relay_state},
+            base_url=host_url,
+        )
+        assert response.status_code == expected["status"]
+        assert response.location == dict(expected["headers"])["Location"]
+
+
+def test_unknown_hosts_and_idps(base_app: Flask, idp: str, db: SQLAlchemy):
+    """Unconfigured hosts get no ACS, disabled IdPs get no AuthnRequest."""
+    templates = AuthnRequestTemplates(SP_CONFIG, NS_PREFIX)
+    assert templates.acs_url_by_host_url == {
+        "https://repository.foo.org/": ACS_URLS[0],
+        "https://demo.repository.foo.org/": ACS_URLS[1],
+    }
+
+    db.session.get(IdPData, idp).enabled = False
+    db.session.commit()
+    with base_app.app_context(), pytest.raises(IdpUnspecified):
+        templates.prepare_for_authenticate(
+            entity_id=idp,
+            relay_state="/",
+            acs_url=ACS_URLS[0],
+            sso_location_ttl=300,
+        )
+
+
+def test_metrics_label_only_enabled_idps(
+    base_app: Flask,
+    idp: str,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Timings are labelled by IdP only once it resolved to an enabled one."""
+    observed: list[dict[str, str]] = []
+    extension = base_app.extensions["invenio-edugain"]
+    monkeypatch.setattr(
+        extension,
+        "metrics_sink",
+        load_metrics_sink(lambda _stage, _seconds, labels: observed.append(labels)),
+    )
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PYSAML2_CONFIG", SP_CONFIG)
+    client = base_app.test_client()
+    host_url = ACS_URLS[0].removesuffix("saml/acs")
+
+    response = client.get(
+        "/saml/login/authn-request",
+        query_string={"entityID": idp},
+        base_url=host_url,
+    )
+    assert response.location.startswith("https://idp.foo.org/sso/redirect")
+    assert {labels["idp"] for labels in observed} == {idp}
+
+    observed.clear()
+    with pytest.raises(IdpUnspecified):
+        client.get(
+            "/saml/login/authn-request",
+            query_string={"entityID": "https://attacker.org/random-1234"},
+            base_url=host_url,
+        )
+    assert {labels["idp"] for labels in observed} == {"unknown"}
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test `invenio edugain benchmark`."""
+
+import json
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+from saml2 import BINDING_HTTP_POST
+from sqlalchemy import create_engine
+
+from invenio_edugain.benchmark import (
+    BENCHMARK_IDP_ID,
+    SCENARIOS,
+    percentile,
+    run_scenario,
+)
+from invenio_edugain.cli import benchmark
+from invenio_edugain.crypto import IN_PROCESS_CRYPTO_BACKEND
+from invenio_edugain.models import IdPData
+from invenio_edugain.revalidate import current_metadata_snapshot
+
+PKI = Path(__file__).parent / "build_config" / "pki"
+SP_CONFIG = {
+    "crypto_backend": IN_PROCESS_CRYPTO_BACKEND,
+    "allow_unknown_attributes": True,
+    "entityid": "https://repository.foo.org/saml/sp/xml",
+    "cert_file": str(PKI / "signing.crt"),
+    "key_file": str(PKI / "signing.key"),
+    "metadata": [
+        {
+            "class": "invenio_edugain.utils.MetaDataFlaskSQL",
+            "metadata": [(None,)],
+        },
+    ],
+    "service": {
+        "sp": {
+            "allow_unsolicited": True,
+            "endpoints": {
+                "assertion_consumer_service": [
+                    ("https://repository.foo.org/saml/acs", BINDING_HTTP_POST),
+                ],
+            },
+            "want_assertions_signed": False,
+            "want_assertions_or_response_signed": True,
+            "want_response_signed": False,
+        },
+    },
+}
+
+
+def test_percentiles():
+    """Percentiles are by nearest rank."""
+    timings = [float(i) for i in range(1, 101)]
+    assert percentile(timings, 0.5) == timings[49]
+    assert percentile(timings, 0.99) == timings[98]
+    assert percentile([1.0], 0.95) == 1.0
+
+    result = run_scenario("noop", lambda: None, iterations=3, warmup=1)
+    assert result.iterations == len([1, 2, 3])
+    assert result.p50 <= result.p95 <= result.p99
+
+
+def test_cli(base_app: Flask, db: SQLAlchemy, monkeypatch: pytest.MonkeyPatch):
+    """All scenarios run against the app's config, the throw-away IdP is rolled back."""
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PYSAML2_CONFIG", SP_CONFIG)
+    runner = base_app.test_cli_runner()
+
+    result = runner.invoke(
+        benchmark,
+        ["--iterations", "2", "--warmup", "1", "--format", "json"],
+    )
+    assert result.exit_code == 0, result.output
+    results = json.loads(result.output)
+    assert [r["scenario"] for r in results] == list(SCENARIOS)
+    assert all(r["p50"] > 0 for r in results)
+    assert db.session.get(IdPData, BENCHMARK_IDP_ID) is None
+
+    result = runner.invoke(benchmark, ["--scenario", "parse-response"])
+    assert result.exit_code == 0, result.output
+    assert "parse-response" in result.output
+    assert "disco-feed" not in result.output
+
+
+def test_bypasses_snapshot(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Scenarios see the throw-away IdP, which a snapshot loaded beforehand doesn't hold."""
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PYSAML2_CONFIG", SP_CONFIG)
+    monkeypatch.setitem(base_app.config, "EDUGAIN_METADATA_SNAPSHOT_TTL", 3600)
+    extension = base_app.extensions["invenio-edugain"]
+    monkeypatch.setattr(extension, "metadata_snapshot_holder", None)
+    assert BENCHMARK_IDP_ID not in current_metadata_snapshot().settings_by_id
+
+    result = base_app.test_cli_runner().invoke(
+        benchmark,
+        ["--scenario", "authn-request", "--scenario", "parse-response"],
+    )
+    assert result.exit_code == 0, result.output
+    assert base_app.config["EDUGAIN_METADATA_SNAPSHOT_TTL"] == 3600  # noqa: PLR2004
+    assert db.session.get(IdPData, BENCHMARK_IDP_ID) is None
+
+
+def test_bypasses_replica(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Scenarios see the throw-away IdP, which a replica (i.e. another connection) doesn't."""
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PYSAML2_CONFIG", SP_CONFIG)
+    # the replica of this test is the primary's db-file, opened via a separate engine
+    monkeypatch.setitem(db.engines, "replica", create_engine(str(db.engine.url)))
+    monkeypatch.setitem(base_app.config, "EDUGAIN_READ_REPLICA_BIND", "replica")
+
+    result = base_app.test_cli_runner().invoke(
+        benchmark,
+        ["--scenario", "metadata-load", "--scenario", "parse-response"],
+    )
+    assert result.exit_code == 0, result.output
+    assert base_app.config["EDUGAIN_READ_REPLICA_BIND"] == "replica"
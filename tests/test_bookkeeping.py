@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test post-login bookkeeping."""
+
+from datetime import UTC, datetime
+
+import pytest
+from flask import Flask
+from invenio_accounts.models import User, UserIdentity
+from invenio_db.shared import SQLAlchemy
+from invenio_queues.proxies import current_queues
+
+from invenio_edugain.bookkeeping import (
+    LOGIN_BOOKKEEPING_QUEUE,
+    LoginRecord,
+    apply_login_records,
+    process_queued_login_records,
+    queue_login_records,
+)
+
+
+def create_user(db: SQLAlchemy, email: str) -> User:
+    """Create a user with a subject-id identity."""
+    user = User(email=email, active=True, user_profile={"full_name": "Old Name"})
+    db.session.add(user)
+    db.session.add(UserIdentity(id=f"{email}!subject", method="subject-id", user=user))
+    db.session.commit()
+    return user
+
+
+def record(user: User, minute: int, **kwargs: object) -> LoginRecord:
+    """Build a login-record."""
+    return {
+        "user_id": user.id,
+        "login_at": datetime(2026, 10, 1, 12, minute, tzinfo=UTC).isoformat(),
+        "remote_addr": f"10.0.0.{minute}",
+        "full_name": "New Name",
+        "affiliations": ["member@foo.org"],
+        "identities": [("subject-id", f"{user.email}!subject")],
+        **kwargs,
+    }
+
+
+def test_batch_equals_one_by_one(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """A batch of (unordered) records leaves the same state as applying each on login."""
+    base_app.config["SECURITY_TRACKABLE"] = True
+    monkeypatch.setitem(base_app.config, "EDUGAIN_REFRESH_PROFILE_ON_LOGIN", value=True)
+    batched_user = create_user(db, "batched@foo.org")
+    single_user = create_user(db, "single@foo.org")
+
+    minutes = [3, 1, 2]
+    apply_login_records([record(batched_user, minute) for minute in minutes])
+    for minute in sorted(minutes):
+        apply_login_records([record(single_user, minute)])
+    db.session.commit()
+
+    for user in [batched_user, single_user]:
+        assert user.login_count == len(minutes)
+        assert user.current_login_at == datetime(2026, 10, 1, 12, 3, tzinfo=UTC)
+        assert user.last_login_at == datetime(2026, 10, 1, 12, 2, tzinfo=UTC)
+        assert str(user.current_login_ip) == "10.0.0.3"
+        assert str(user.last_login_ip) == "10.0.0.2"
+        assert user.user_profile["full_name"] == "New Name"
+        assert user.user_profile["affiliations"] == "member@foo.org"
+
+
+def test_profile_kept_by_default(db: SQLAlchemy):
+    """Unless opted in, users' profiles aren't overwritten by what their IdP sends."""
+    user = create_user(db, "kept@foo.org")
+    apply_login_records([record(user, 1)])
+    db.session.commit()
+    assert user.user_profile == {"full_name": "Old Name"}
+
+
+def test_links_additional_identities(db: SQLAlchemy):
+    """New id-methods get linked, but existing methods are never re-linked."""
+    user = create_user(db, "linking@foo.org")
+    apply_login_records(
+        [
+            record(
+                user,
+                1,
+                identities=[
+                    ("subject-id", "another-subject"),
+                    ("eduPersonPrincipalName", "linking@foo.org"),
+                ],
+            ),
+        ],
+    )
+    db.session.commit()
+
+    identities = db.session.scalars(
+        db.select(UserIdentity).where(UserIdentity.id_user == user.id),
+    ).all()
+    assert sorted((identity.method, identity.id) for identity in identities) == [
+        ("eduPersonPrincipalName", "linking@foo.org"),
+        ("subject-id", "linking@foo.org!subject"),
+    ]
+
+
+def test_deferred_records_are_written_by_task(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Deferred records get queued, then written by the celery-task in batches."""
+    monkeypatch.setitem(base_app.config, "EDUGAIN_REFRESH_PROFILE_ON_LOGIN", value=True)
+    user = create_user(db, "deferred@foo.org")
+    queue = current_queues.queues[LOGIN_BOOKKEEPING_QUEUE]
+    queue.queue.declare()
+    records = [record(user, minute) for minute in range(5)]
+    queue_login_records(records)
+    assert user.user_profile["full_name"] == "Old Name"
+
+    assert process_queued_login_records(batch_size=2) == len(records)
+    assert user.user_profile["full_name"] == "New Name"
+    assert process_queued_login_records(batch_size=2) == 0
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test cache of IdPs' parsed certificates."""
+
+import base64
+from pathlib import Path
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+from OpenSSL.crypto import FILETYPE_PEM, load_certificate
+from saml2 import BINDING_HTTP_POST, saml, samlp
+from saml2.sigver import make_temp, pre_signature_part
+from saml2.time_util import in_a_while, instant
+from saml2.xmldsig import DIGEST_SHA256, SIG_RSA_SHA256
+
+from invenio_edugain.certs import IdPCertificateCache, idp_certificate_cache
+from invenio_edugain.crypto import (
+    IN_PROCESS_CRYPTO_BACKEND,
+    create_saml2_client,
+    in_process_crypto_backend,
+    load_pysaml2_config,
+)
+from invenio_edugain.models import IdPData
+from invenio_edugain.utils import MetaDataFlaskSQL
+
+PKI = Path(__file__).parent / "build_config" / "pki"
+IDP_ID = "https://idp.foo.org/idp"
+
+
+def cert_b64(filename: str) -> str:
+    """Base64-encoded DER of a test-PKI cert, as found in SAML metadata."""
+    pem = (PKI / filename).read_bytes()
+    return "".join(pem.decode().splitlines()[1:-1])
+
+
+def idp_settings(idp_id: str = IDP_ID, signing_cert: str = "signing.crt") -> dict:
+    """Build (pysaml2-internal) idp-settings with a signing and an encryption cert."""
+    return {
+        "entity_id": idp_id,
+        "idpsso_descriptor": [
+            {
+                "key_descriptor": [
+                    {
+                        "use": use,
+                        "key_info": {
+                            "x509_data": [
+                                {"x509_certificate": {"text": cert_b64(filename)}},
+                            ],
+                        },
+                    }
+                    for use, filename in [
+                        ("signing", signing_cert),
+                        ("encryption", "encryption.crt"),
+                    ]
+                ],
+            },
+        ],
+    }
+
+
+def test_parses_lazily_once():
+    """Certs are parsed on first use, then served from cache."""
+    cache = IdPCertificateCache()
+    certs = cache.certs(IDP_ID, idp_settings())
+    assert len(certs) == 1
+    assert cache.certs(IDP_ID, idp_settings()) is certs
+
+    cert = certs[0]
+    pem = Path(cert.name).read_bytes()
+    assert pem == (PKI / "signing.crt").read_bytes()
+    assert cert.certificate == x509.load_pem_x509_certificate(pem)
+    assert (
+        cert.fingerprint_sha256
+        == load_certificate(FILETYPE_PEM, pem).digest("SHA256").decode()
+    )
+    assert cert.not_valid_after == cert.certificate.not_valid_after_utc
+
+    encryption_certs = cache.certs(IDP_ID, idp_settings(), use="encryption")
+    assert [c.name for c in encryption_certs] != [c.name for c in certs]
+
+
+def test_changed_settings_arent_served_stale():
+    """Settings digest is part of the key, so re-ingested settings get re-parsed."""
+    cache = IdPCertificateCache()
+    certs = cache.certs(IDP_ID, idp_settings())
+    changed_certs = cache.certs(IDP_ID, idp_settings(signing_cert="encryption.crt"))
+    assert changed_certs[0].fingerprint_sha256 != certs[0].fingerprint_sha256
+
+
+def test_invalidate():
+    """Invalidated entries get re-parsed."""
+    cache = IdPCertificateCache()
+    certs = cache.certs(IDP_ID, idp_settings())
+    cache.invalidate(["https://other.idp.org"])
+    assert cache.certs(IDP_ID, idp_settings()) is certs
+    cache.invalidate([IDP_ID])
+    assert cache.certs(IDP_ID, idp_settings()) is not certs
+
+
+def test_skips_malformed_certs(base_app: Flask):
+    """Malformed certs are left out, rather than failing verification with all certs."""
+    settings = idp_settings()
+    key_descriptor = settings["idpsso_descriptor"][0]["key_descriptor"][0]
+    key_descriptor["key_info"]["x509_data"].insert(
+        0,
+        {"x509_certificate": {"text": "bm90IGEgY2VydA=="}},
+    )
+    with base_app.app_context():
+        certs = IdPCertificateCache().certs(IDP_ID, settings)
+    assert len(certs) == 1
+
+
+def test_metadata_serves_cached_certs():
+    """`MetaDataFlaskSQL` hands out cached certs to pysaml2, refuses unknown IdPs."""
+    metadata = MetaDataFlaskSQL(None, "load-id")
+    metadata.entity[IDP_ID] = idp_settings()
+
+    [(_, cert)] = metadata.certs(IDP_ID, "any", "signing")
+    public_key = cert.certificate.public_key()
+    assert public_key.public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ) == x509.load_pem_x509_certificate(
+        (PKI / "signing.crt").read_bytes(),
+    ).public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+
+    with pytest.raises(KeyError):
+        metadata.certs("https://unknown.idp.org", "any", "signing")
+
+
+def signed_response(idp_id: str, sp_id: str, acs_url: str) -> str:
+    """Build an unsolicited SAML response of `idp_id`, signed with the test-PKI's signing key."""
+    not_on_or_after = in_a_while(minutes=5)
+    assertion = saml.Assertion(
+        id="id-assertion",
+        version="2.0",
+        issue_instant=instant(),
+        issuer=saml.Issuer(text=idp_id),
+        subject=saml.Subject(
+            name_id=saml.NameID(text="some-user"),
+            subject_confirmation=[
+                saml.SubjectConfirmation(
+                    method=saml.SCM_BEARER,
+                    subject_confirmation_data=saml.SubjectConfirmationData(
+                        recipient=acs_url,
+                        not_on_or_after=not_on_or_after,
+                    ),
+                ),
+            ],
+        ),
+        conditions=saml.Conditions(
+            not_on_or_after=not_on_or_after,
+            audience_restriction=[
+                saml.AudienceRestriction(audience=[saml.Audience(text=sp_id)]),
+            ],
+        ),
+        authn_statement=[
+            saml.AuthnStatement(
+                authn_instant=instant(),
+                authn_context=saml.AuthnContext(
+                    authn_context_class_ref=saml.AuthnContextClassRef(
+                        text=saml.AUTHN_PASSWORD_PROTECTED,
+                    ),
+                ),
+            ),
+        ],
+    )
+    response = samlp.Response(
+        id="id-response",
+        version="2.0",
+        issue_instant=instant(),
+        destination=acs_url,
+        issuer=saml.Issuer(text=idp_id),
+        status=samlp.Status(status_code=samlp.StatusCode(value=samlp.STATUS_SUCCESS)),
+        assertion=[assertion],
+        signature=pre_signature_part(
+            "id-response",
+            sign_alg=SIG_RSA_SHA256,
+            digest_alg=DIGEST_SHA256,
+        ),
+    )
+    signed = in_process_crypto_backend.sign_statement(
+        str(response),
+        f"{samlp.NAMESPACE}:Response",
+        str(PKI / "signing.key"),
+        "id-response",
+    )
+    return base64.b64encode(signed.encode()).decode()
+
+
+def test_login_uses_cached_certs(
+    base_app: Flask,  # noqa: ARG001
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Verifying a response's signature gets the IdP's certs from cache, writing no temporary files."""
+    idp_id = "https://certs.foo.org/idp"
+    sp_id = "https://repository.foo.org/saml/sp/xml"
+    acs_url = "https://repository.foo.org/saml/acs"
+    db.session.add(IdPData(id=idp_id, enabled=True, settings=idp_settings(idp_id)))
+    db.session.commit()
+
+    cached_entity_ids = []
+    original_certs = idp_certificate_cache.certs
+
+    def spied_certs(entity_id: str, *args: object, **kwargs: object) -> list:
+        cached_entity_ids.append(entity_id)
+        return original_certs(entity_id, *args, **kwargs)
+
+    def no_temp_certs(content: str, suffix: str = "", **kwargs: object) -> object:
+        assert suffix != ".pem", "certificate written to a temporary file"
+        return make_temp(content, suffix, **kwargs)
+
+    monkeypatch.setattr(idp_certificate_cache, "certs", spied_certs)
+    monkeypatch.setattr("saml2.sigver.make_temp", no_temp_certs)
+
+    config = load_pysaml2_config(
+        {
+            "crypto_backend": IN_PROCESS_CRYPTO_BACKEND,
+            "entityid": sp_id,
+            "metadata": [
+                {
+                    "class": "invenio_edugain.utils.MetaDataFlaskSQL",
+                    "metadata": [(None,)],
+                },
+            ],
+            "service": {
+                "sp": {
+                    "allow_unsolicited": True,
+                    "endpoints": {
+                        "assertion_consumer_service": [(acs_url, BINDING_HTTP_POST)],
+                    },
+                },
+            },
+        },
+    )
+    client = create_saml2_client(config)
+    response = client.parse_authn_request_response(
+        signed_response(idp_id, sp_id, acs_url),
+        BINDING_HTTP_POST,
+    )
+    assert response is not None
+    assert response.issuer() == idp_id
+    assert cached_entity_ids == [idp_id]
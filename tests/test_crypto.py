@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Differential tests of the in-process crypto backend against xmlsec1.
+
+Every case asserts the expected outcome for each available backend,
+hence both backends accept/reject the same inputs.
+xmlsec1-cases are skipped when no `xmlsec1` binary is installed.
+"""
+
+import base64
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from lxml import etree
+from saml2 import saml, samlp
+from saml2.sigver import (
+    CryptoBackend,
+    CryptoBackendXmlSec1,
+    DecryptError,
+    SigverError,
+    XmlsecError,
+    get_xmlsec_binary,
+    pre_signature_part,
+)
+from saml2.xmldsig import DIGEST_SHA256, SIG_RSA_SHA256
+
+from invenio_edugain.crypto import (
+    IN_PROCESS_CRYPTO_BACKEND,
+    create_saml2_client,
+    in_process_crypto_backend,
+    load_certificate_public_key,
+    load_pysaml2_config,
+)
+
+PKI = Path(__file__).parent / "build_config" / "pki"
+ASSERTION = f"{saml.NAMESPACE}:Assertion"
+RESPONSE = f"{samlp.NAMESPACE}:Response"
+XENC_NS = "http://www.w3.org/2001/04/xmlenc#"
+DS_NS = "http://www.w3.org/2000/09/xmldsig#"
+
+
+def find_xmlsec1_backend() -> CryptoBackendXmlSec1 | None:
+    """Return an xmlsec1 backend if an `xmlsec1` binary is installed."""
+    try:
+        return CryptoBackendXmlSec1(
+            get_xmlsec_binary(["/opt/local/bin", "/usr/local/bin"]),
+        )
+    except SigverError:
+        return None
+
+
+xmlsec1_backend = find_xmlsec1_backend()
+backends = pytest.mark.parametrize(
+    "backend",
+    [
+        pytest.param(in_process_crypto_backend, id="in-process"),
+        pytest.param(
+            xmlsec1_backend,
+            id="xmlsec1",
+            marks=pytest.mark.skipif(
+                xmlsec1_backend is None,
+                reason="no xmlsec1 binary installed",
+            ),
+        ),
+    ],
+)
+
+
+def build_response(*, sign_response: bool = False) -> str:
+    """Build an unsigned SAML response containing an assertion with a signature-template."""
+    assertion = saml.Assertion(
+        id="id-assertion",
+        version="2.0",
+        issue_instant="2026-01-01T00:00:00Z",
+        issuer=saml.Issuer(text="https://idp.foo.org/idp"),
+        subject=saml.Subject(name_id=saml.NameID(text="some-user")),
+        attribute_statement=saml.AttributeStatement(
+            attribute=[
+                saml.Attribute(
+                    name="urn:oid:0.9.2342.19200300.100.1.3",
+                    friendly_name="mail",
+                    attribute_value=[saml.AttributeValue(text="user@foo.org")],
+                ),
+            ],
+        ),
+    )
+    assertion.signature = pre_signature_part(
+        "id-assertion",
+        sign_alg=SIG_RSA_SHA256,
+        digest_alg=DIGEST_SHA256,
+    )
+    response = samlp.Response(
+        id="id-response",
+        version="2.0",
+        issue_instant="2026-01-01T00:00:00Z",
+        issuer=saml.Issuer(text="https://idp.foo.org/idp"),
+        status=samlp.Status(status_code=samlp.StatusCode(value=samlp.STATUS_SUCCESS)),
+        assertion=[assertion],
+    )
+    if sign_response:
+        response.signature = pre_signature_part(
+            "id-response",
+            sign_alg=SIG_RSA_SHA256,
+            digest_alg=DIGEST_SHA256,
+        )
+    return str(response)
+
+
+def sign(backend: CryptoBackend, xml: str, node_name: str, node_id: str) -> str:
+    """Sign with the test-PKI's signing key."""
+    return backend.sign_statement(xml, node_name, str(PKI / "signing.key"), node_id)
+
+
+def verifies(
+    backend: CryptoBackend,
+    xml: str,
+    cert: str,
+    node_name: str = ASSERTION,
+    node_id: str = "id-assertion",
+) -> bool:
+    """Whether `backend` accepts the signature (pysaml2 treats XmlsecError as rejection)."""
+    try:
+        return backend.validate_signature(
+            xml,
+            str(PKI / cert),
+            "pem",
+            node_name,
+            node_id,
+        )
+    except XmlsecError:
+        return False
+
+
+def encrypt_assertion(xml: str) -> str:
+    """Encrypt the assertion with AES-GCM, transport the session key via RSA-OAEP to the test-PKI's encryption cert."""
+    root = etree.fromstring(xml.encode())
+    assertion = root.find(f"{{{saml.NAMESPACE}}}Assertion")
+    plaintext = etree.tostring(assertion)
+
+    session_key = AESGCM.generate_key(bit_length=256)
+    iv = os.urandom(12)
+    ciphertext = iv + AESGCM(session_key).encrypt(iv, plaintext, None)
+    public_key = load_certificate_public_key((PKI / "encryption.crt").read_bytes())
+    encrypted_key = public_key.encrypt(
+        session_key,
+        padding.OAEP(
+            mgf=padding.MGF1(algorithm=hashes.SHA1()),  # noqa: S303
+            algorithm=hashes.SHA1(),  # noqa: S303
+            label=None,
+        ),
+    )
+
+    encrypted_assertion = etree.fromstring(
+        f"""<saml:EncryptedAssertion xmlns:saml="{saml.NAMESPACE}">
+  <xenc:EncryptedData xmlns:xenc="{XENC_NS}" Type="{XENC_NS}Element">
+    <xenc:EncryptionMethod Algorithm="http://www.w3.org/2009/xmlenc11#aes256-gcm"/>
+    <ds:KeyInfo xmlns:ds="{DS_NS}">
+      <xenc:EncryptedKey>
+        <xenc:EncryptionMethod Algorithm="{XENC_NS}rsa-oaep-mgf1p"/>
+        <xenc:CipherData>
+          <xenc:CipherValue>{base64.b64encode(encrypted_key).decode()}</xenc:CipherValue>
+        </xenc:CipherData>
+      </xenc:EncryptedKey>
+    </ds:KeyInfo>
+    <xenc:CipherData>
+      <xenc:CipherValue>{base64.b64encode(ciphertext).decode()}</xenc:CipherValue>
+    </xenc:CipherData>
+  </xenc:EncryptedData>
+</saml:EncryptedAssertion>""".encode(),
+    )
+    assertion.addnext(encrypted_assertion)
+    root.remove(assertion)
+    return etree.tostring(root).decode()
+
+
+@backends
+def test_accepts_valid_signature(backend: CryptoBackend):
+    """Signatures made by either backend verify."""
+    unsigned = build_response()
+    assert verifies(
+        backend,
+        sign(in_process_crypto_backend, unsigned, ASSERTION, "id-assertion"),
+        "signing.crt",
+    )
+    if xmlsec1_backend is not None:
+        assert verifies(
+            backend,
+            sign(xmlsec1_backend, unsigned, ASSERTION, "id-assertion"),
+            "signing.crt",
+        )
+
+
+@backends
+def test_accepts_nested_signatures(backend: CryptoBackend):
+    """Signed response containing signed assertion: both signatures verify."""
+    signed = sign(
+        in_process_crypto_backend,
+        build_response(sign_response=True),
+        ASSERTION,
+        "id-assertion",
+    )
+    signed = sign(in_process_crypto_backend, signed, RESPONSE, "id-response")
+    assert verifies(backend, signed, "signing.crt", RESPONSE, "id-response")
+    assert verifies(backend, signed, "signing.crt", ASSERTION, "id-assertion")
+
+
+@backends
+def test_rejects_wrong_cert(backend: CryptoBackend):
+    """Signatures don't verify against a cert of a different key."""
+    signed = sign(
+        in_process_crypto_backend,
+        build_response(),
+        ASSERTION,
+        "id-assertion",
+    )
+    assert not verifies(backend, signed, "encryption.crt")
+
+
+@backends
+def test_rejects_tampered_content(backend: CryptoBackend):
+    """Changing signed content invalidates the signature."""
+    signed = sign(
+        in_process_crypto_backend,
+        build_response(),
+        ASSERTION,
+        "id-assertion",
+    )
+    assert not verifies(
+        backend,
+        signed.replace("user@foo.org", "admin@foo.org"),
+        "signing.crt",
+    )
+
+
+@backends
+def test_rejects_tampered_signed_info(backend: CryptoBackend):
+    """Changing the signed digest invalidates the signature."""
+    signed = sign(
+        in_process_crypto_backend,
+        build_response(),
+        ASSERTION,
+        "id-assertion",
+    )
+    root = etree.fromstring(signed.encode())
+    digest_value = root.find(f".//{{{DS_NS}}}DigestValue")
+    digest_value.text = base64.b64encode(b"\0" * 32).decode()
+    assert not verifies(backend, etree.tostring(root).decode(), "signing.crt")
+
+
+@backends
+@pytest.mark.parametrize("element", ["DigestValue", "SignatureValue"])
+def test_rejects_malformed_base64(backend: CryptoBackend, element: str):
+    """Malformed base64 in the signature is a rejection, rather than an unexpected error."""
+    signed = sign(
+        in_process_crypto_backend,
+        build_response(),
+        ASSERTION,
+        "id-assertion",
+    )
+    root = etree.fromstring(signed.encode())
+    root.find(f".//{{{DS_NS}}}{element}").text = "abc"
+    assert not verifies(backend, etree.tostring(root).decode(), "signing.crt")
+
+
+@backends
+def test_rejects_duplicate_ids(backend: CryptoBackend):
+    """A second element with the signed ID (as in signature-wrapping attacks) is refused."""
+    signed = sign(
+        in_process_crypto_backend,
+        build_response(),
+        ASSERTION,
+        "id-assertion",
+    )
+    root = etree.fromstring(signed.encode())
+    evil_assertion = etree.fromstring(
+        etree.tostring(root.find(f"{{{saml.NAMESPACE}}}Assertion")).replace(
+            b"user@foo.org",
+            b"admin@foo.org",
+        ),
+    )
+    root.insert(0, evil_assertion)
+    assert not verifies(backend, etree.tostring(root).decode(), "signing.crt")
+
+
+@backends
+def test_rejects_unsigned(backend: CryptoBackend):
+    """A document without signature doesn't verify."""
+    unsigned = samlp.Response(
+        id="id-response",
+        version="2.0",
+        issue_instant="2026-01-01T00:00:00Z",
+    )
+    assert not verifies(backend, str(unsigned), "signing.crt", RESPONSE, "id-response")
+
+
+@backends
+def test_decrypts_with_right_key(backend: CryptoBackend):
+    """Decryption restores the signed assertion, whose signature still verifies."""
+    signed = sign(
+        in_process_crypto_backend,
+        build_response(),
+        ASSERTION,
+        "id-assertion",
+    )
+    encrypted = encrypt_assertion(signed)
+    assert "user@foo.org" not in encrypted
+
+    decrypted = backend.decrypt(encrypted, str(PKI / "encryption.key"))
+    assert "user@foo.org" in decrypted
+    assert (
+        etree.fromstring(decrypted.encode()).find(f".//{{{XENC_NS}}}EncryptedData")
+        is None
+    )
+    assert verifies(in_process_crypto_backend, decrypted, "signing.crt")
+    if xmlsec1_backend is not None:
+        assert verifies(xmlsec1_backend, decrypted, "signing.crt")
+
+
+@backends
+def test_refuses_decryption_with_wrong_key(backend: CryptoBackend):
+    """Decryption with a key the session key wasn't encrypted to fails."""
+    signed = sign(
+        in_process_crypto_backend,
+        build_response(),
+        ASSERTION,
+        "id-assertion",
+    )
+    with pytest.raises(DecryptError):
+        backend.decrypt(encrypt_assertion(signed), str(PKI / "signing.key"))
+
+
+def test_loads_config_selecting_in_process_backend(idp_xml: Callable[..., str]):
+    """pysaml2 configs with metadata load, and clients get the in-process backend."""
+    config = load_pysaml2_config(
+        {
+            "crypto_backend": IN_PROCESS_CRYPTO_BACKEND,
+            "entityid": "https://repository.foo.org/saml/sp/xml",
+            "key_file": str(PKI / "signing.key"),
+            "cert_file": str(PKI / "signing.crt"),
+            "metadata": {"inline": [idp_xml("https://idp.foo.org/idp")]},
+            "service": {"sp": {}},
+        },
+    )
+    assert config.crypto_backend == IN_PROCESS_CRYPTO_BACKEND
+    assert config.metadata.single_sign_on_service("https://idp.foo.org/idp")
+    assert create_saml2_client(config).sec.crypto is in_process_crypto_backend
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test extraction of entity attributes, and hide-from-discovery handling."""
+
+from collections.abc import Callable
+
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+
+from invenio_edugain.extraction import (
+    ASSURANCE_CERTIFICATION_ATTRIBUTE,
+    ENTITY_CATEGORY_ATTRIBUTE,
+    HIDE_FROM_DISCOVERY_CATEGORY,
+)
+from invenio_edugain.manage import IdPSelector, selection, update_idps
+from invenio_edugain.models import IdPData, IdPEntityAttribute
+
+RS_CATEGORY = "http://refeds.org/category/research-and-scholarship"
+SIRTFI = "https://refeds.org/sirtfi"
+
+
+# further attributes of all IdPs of this module
+SUPPORT_AND_SIRTFI = {
+    "http://macedir.org/entity-category-support": [RS_CATEGORY],
+    ASSURANCE_CERTIFICATION_ATTRIBUTE: [SIRTFI],
+}
+
+
+def attributes(db: SQLAlchemy, idp_id: str) -> set[tuple[str, str]]:
+    """Get (name, value)-pairs stored for IdP."""
+    return set(
+        db.session.execute(
+            db.select(IdPEntityAttribute.name, IdPEntityAttribute.value).where(
+                IdPEntityAttribute.idp_id == idp_id,
+            ),
+        ).tuples(),
+    )
+
+
+def test_attributes_replaced_on_update(
+    db: SQLAlchemy,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """Ingest stores all entity attributes, and replaces them when settings change."""
+    idp_id = "https://attrs.org/idp"
+    ingest_idps(
+        idp_xml(
+            idp_id,
+            entity_attributes=SUPPORT_AND_SIRTFI,
+            entity_categories=[RS_CATEGORY],
+        ),
+    )
+    assert attributes(db, idp_id) == {
+        ("http://macedir.org/entity-category-support", RS_CATEGORY),
+        (ASSURANCE_CERTIFICATION_ATTRIBUTE, SIRTFI),
+        (ENTITY_CATEGORY_ATTRIBUTE, RS_CATEGORY),
+    }
+
+    ingest_idps(
+        idp_xml(
+            idp_id,
+            entity_attributes=SUPPORT_AND_SIRTFI,
+            entity_categories=["http://other/cat"],
+        ),
+    )
+    assert (ENTITY_CATEGORY_ATTRIBUTE, RS_CATEGORY) not in attributes(db, idp_id)
+    assert (ENTITY_CATEGORY_ATTRIBUTE, "http://other/cat") in attributes(db, idp_id)
+
+    selector = IdPSelector(id_regex="^https://attrs", entity_category=RS_CATEGORY)
+    assert update_idps(selection(selector=selector), enabled=True) == []
+    selector = IdPSelector(
+        id_regex="^https://attrs",
+        entity_category="http://other/cat",
+    )
+    assert update_idps(selection(selector=selector), enabled=True) == [idp_id]
+
+
+def test_hide_from_discovery(
+    base_app: Flask,
+    db: SQLAlchemy,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """IdPs of hide-from-discovery category are never in the discovery feed."""
+    hidden_id = "https://hidden.org/idp"
+    shown_id = "https://shown.org/idp"
+    ingest_idps(
+        idp_xml(
+            hidden_id,
+            entity_attributes=SUPPORT_AND_SIRTFI,
+            entity_categories=[RS_CATEGORY, HIDE_FROM_DISCOVERY_CATEGORY],
+        ),
+        idp_xml(
+            shown_id,
+            entity_attributes=SUPPORT_AND_SIRTFI,
+            entity_categories=[RS_CATEGORY],
+        ),
+    )
+    assert db.session.get(IdPData, hidden_id).discoverable is False
+    assert db.session.get(IdPData, shown_id).discoverable is True
+
+    # hidden, even if made discoverable by hand
+    update_idps(selection([hidden_id, shown_id]), enabled=True, discoverable=True)
+    feed = base_app.test_client().get("/saml/discofeed").json
+    feed_ids = {entry["entityID"] for entry in feed}
+    assert shown_id in feed_ids
+    assert hidden_id not in feed_ids
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test extraction of discovery columns, and the discovery feed built from them."""
+
+from collections.abc import Callable
+
+import pytest
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+
+from invenio_edugain import cli
+from invenio_edugain.extraction import extract_missing_columns
+from invenio_edugain.models import IdPData
+
+IDP_ID = "https://idp.extract.org/idp"
+IDP_XML = f"""<md:EntityDescriptor
+    xmlns:md="urn:oasis:names:tc:SAML:2.0:metadata"
+    xmlns:mdui="urn:oasis:names:tc:SAML:metadata:ui"
+    xmlns:mdrpi="urn:oasis:names:tc:SAML:metadata:rpi"
+    entityID="{IDP_ID}">
+<md:Extensions>
+<mdrpi:RegistrationInfo registrationAuthority="http://www.eduid.at/"/>
+</md:Extensions>
+<md:IDPSSODescriptor protocolSupportEnumeration="urn:oasis:names:tc:SAML:2.0:protocol">
+<md:Extensions>
+<mdui:UIInfo>
+<mdui:DisplayName xml:lang="en">Extract University</mdui:DisplayName>
+<mdui:DisplayName xml:lang="de">Extrakt-Universität</mdui:DisplayName>
+<mdui:Keywords xml:lang="en">extract university</mdui:Keywords>
+<mdui:Logo height="80" width="200">https://extract.org/logo.png</mdui:Logo>
+</mdui:UIInfo>
+</md:Extensions>
+<md:SingleSignOnService Binding="urn:oasis:names:tc:SAML:2.0:bindings:HTTP-Redirect" Location="https://extract.org/sso"/>
+</md:IDPSSODescriptor>
+<md:Organization>
+<md:OrganizationName xml:lang="fr">Université d'Extraction</md:OrganizationName>
+<md:OrganizationDisplayName xml:lang="en">Extract Uni</md:OrganizationDisplayName>
+<md:OrganizationURL xml:lang="en">https://extract.org</md:OrganizationURL>
+</md:Organization>
+</md:EntityDescriptor>"""
+
+
+def test_extraction_and_feed(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+    ingest_idps: Callable[..., object],
+):
+    """Ingest extracts columns, feed is built from them, also for rows ingested earlier."""
+    ingest_idps(IDP_XML)
+
+    idp = db.session.get(IdPData, IDP_ID)
+    assert idp.registration_authority == "http://www.eduid.at/"
+    assert idp.display_names == [
+        {"lang": "en", "value": "Extract University"},
+        {"lang": "de", "value": "Extrakt-Universität"},
+        # organization's as fallback
+        {"lang": "fr", "value": "Université d'Extraction"},
+    ]
+    assert idp.keywords == [{"lang": "en", "value": "extract university"}]
+    assert idp.logos == [
+        {"value": "https://extract.org/logo.png", "height": "80", "width": "200"},
+    ]
+    assert idp.organization_names == [
+        {"lang": "en", "value": "Extract Uni"},
+        {"lang": "fr", "value": "Université d'Extraction"},
+    ]
+    assert idp.organization_urls == [{"lang": "en", "value": "https://extract.org"}]
+
+    # as if ingested before columns existed, i.e. right after upgrading
+    idp.enabled = True
+    idp.display_names = None
+    db.session.commit()
+    extension = base_app.extensions["invenio-edugain"]
+    monkeypatch.setattr(extension, "missing_columns_extracted", False)
+
+    # the feed extracts in memory, without writing
+    client = base_app.test_client()
+    feed = client.get("/saml/discofeed").json
+    [entry] = [entry for entry in feed if entry["entityID"] == IDP_ID]
+    assert entry == {
+        "entityID": IDP_ID,
+        "DisplayNames": [
+            {"lang": "en", "value": "Extract University"},
+            {"lang": "de", "value": "Extrakt-Universität"},
+            {"lang": "fr", "value": "Université d'Extraction"},
+        ],
+        "Keywords": [{"lang": "en", "value": "extract university"}],
+        "Logos": [
+            {"value": "https://extract.org/logo.png", "height": "80", "width": "200"},
+            # fallback, as there's no square logo
+            {"value": "/static/transparent-16x16.png", "height": 16, "width": 16},
+        ],
+    }
+    db.session.expire_all()
+    assert db.session.get(IdPData, IDP_ID).display_names is None
+
+    # `manage` backfills
+    result = base_app.test_cli_runner().invoke(cli.manage, ["--show", IDP_ID])
+    assert result.exit_code == 0, result.output
+    db.session.expire_all()
+    assert db.session.get(IdPData, IDP_ID).display_names is not None
+    assert client.get("/saml/discofeed").json == feed
+
+    # once none are missing, this process doesn't look for missing columns anymore
+    assert extract_missing_columns() == 0
+    assert extension.missing_columns_extracted
+    db.session.get(IdPData, IDP_ID).display_names = None
+    db.session.commit()
+    assert extract_missing_columns() == 0
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test partitioning of IdPs by their registration authority (i.e. federation)."""
+
+from collections.abc import Callable
+
+import pytest
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+
+from invenio_edugain.cli import federations
+from invenio_edugain.ingest import IdPDataImportItem
+from invenio_edugain.manage import selection, update_idps
+from invenio_edugain.models import IdPData
+from invenio_edugain.search import search_idps
+
+EDUID_AT = "http://www.eduid.at/"
+DFN_DE = "https://www.aai.dfn.de"
+AT_ID = "https://fed.at/idp"
+DE_ID = "https://fed.de/idp"
+
+
+def test_ingest_chosen_federations(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., IdPDataImportItem],
+):
+    """Only IdPs of chosen federations get ingested, all get filtered by federation."""
+    # an aggregate of two federations' IdPs
+    aggregate = [
+        idp_xml(AT_ID, registration_authority=EDUID_AT),
+        idp_xml(DE_ID, registration_authority=DFN_DE),
+    ]
+    monkeypatch.setitem(base_app.config, "EDUGAIN_FEDERATIONS", [EDUID_AT])
+    item = ingest_idps(*aggregate)
+    assert item.added_idp_ids == [AT_ID]
+    assert db.session.get(IdPData, DE_ID) is None
+
+    item = ingest_idps(*aggregate, federations=[EDUID_AT, DFN_DE])
+    assert item.added_idp_ids == [DE_ID]
+    assert item.unchanged_idp_ids == [AT_ID]
+    assert db.session.get(IdPData, DE_ID).registration_authority == DFN_DE
+
+    assert [result.id for result in search_idps("^https://fed\\.")] == [AT_ID, DE_ID]
+    assert [
+        result.id for result in search_idps("^https://fed\\.", federations=[DFN_DE])
+    ] == [DE_ID]
+
+    update_idps(selection([AT_ID, DE_ID]), enabled=True)
+    db.session.commit()
+    client = base_app.test_client()
+    feed_ids = {entry["entityID"] for entry in client.get("/saml/discofeed").json}
+    assert {AT_ID, DE_ID} <= feed_ids
+    feed = client.get("/saml/discofeed", query_string={"federation": EDUID_AT}).json
+    assert [entry["entityID"] for entry in feed] == [AT_ID]
+
+    result = base_app.test_cli_runner().invoke(federations)
+    assert result.exit_code == 0, result.output
+    assert f"     1       1 {EDUID_AT}" in result.output
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test the revisioned change log of the disco feed, and fetching deltas from it."""
+
+from collections.abc import Callable
+
+from flask import Flask
+from flask.testing import FlaskClient
+from invenio_db.shared import SQLAlchemy
+
+from invenio_edugain import cli
+from invenio_edugain.feed import current_feed_revision
+from invenio_edugain.models import DiscoFeedEntry, DiscoFeedRevision
+
+FIRST_ID = "https://delta-1.org/idp"
+SECOND_ID = "https://delta-2.org/idp"
+UPGRADED_IDS = ["https://upgraded-1.org/idp", "https://upgraded-2.org/idp"]
+
+
+def deltas(client: FlaskClient, since: int | None = None) -> dict:
+    """Get deltas of disco feed since revision."""
+    query_string = {} if since is None else {"since": since}
+    return client.get("/saml/discofeed/deltas", query_string=query_string).json
+
+
+def test_nothing_recorded_yet(
+    base_app: Flask,
+    db: SQLAlchemy,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """Until the first recording, deltas serve the whole feed without recording it."""
+    ingest_idps(idp_xml(UPGRADED_IDS[0]), idp_xml(UPGRADED_IDS[1]))
+    runner = base_app.test_cli_runner()
+    result = runner.invoke(cli.manage, ["--enable", *UPGRADED_IDS])
+    assert result.exit_code == 0, result.output
+    # as right after upgrading
+    db.session.execute(db.delete(DiscoFeedEntry))
+    db.session.execute(db.delete(DiscoFeedRevision))
+    db.session.commit()
+
+    full = deltas(base_app.test_client(), since=3)
+    assert full["revision"] == 0
+    assert set(UPGRADED_IDS) <= {entry["entityID"] for entry in full["feed"]}
+    assert current_feed_revision() == 0
+
+    # the first recording records the whole feed, not just the managed IdP
+    result = runner.invoke(cli.manage, ["--hide", UPGRADED_IDS[0]])
+    assert result.exit_code == 0, result.output
+    assert current_feed_revision() == 1
+    assert db.session.get(DiscoFeedRevision, 1).revision == 1
+    recorded_ids = db.session.scalars(db.select(DiscoFeedEntry.entity_id)).all()
+    assert UPGRADED_IDS[1] in recorded_ids
+    assert UPGRADED_IDS[0] not in recorded_ids
+
+
+def test_deltas_since_revision(
+    base_app: Flask,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """Ingest and manage record changes, deltas hold only what changed since."""
+    client = base_app.test_client()
+    ingest_idps(
+        idp_xml(FIRST_ID, display_names={"en": "First"}),
+        idp_xml(SECOND_ID, display_names={"en": "Second"}),
+    )
+    runner = base_app.test_cli_runner()
+    result = runner.invoke(cli.manage, ["--enable", FIRST_ID, SECOND_ID])
+    assert result.exit_code == 0, result.output
+
+    full = deltas(client)
+    revision = full["revision"]
+    assert revision == current_feed_revision()
+    assert {FIRST_ID, SECOND_ID} <= {entry["entityID"] for entry in full["feed"]}
+    assert full["feed"] == [
+        entry
+        for entry in client.get("/saml/discofeed").json
+        if entry["entityID"] in {e["entityID"] for e in full["feed"]}
+    ]
+    assert deltas(client, since=revision) == {
+        "revision": revision,
+        "changed": [],
+        "removed": [],
+    }
+
+    ingest_idps(
+        idp_xml(FIRST_ID, display_names={"en": "First, renamed"}),
+        idp_xml(SECOND_ID, display_names={"en": "Second"}),
+    )
+    result = runner.invoke(cli.manage, ["--hide", SECOND_ID])
+    assert result.exit_code == 0, result.output
+    delta = deltas(client, since=revision)
+    assert delta["revision"] == revision + 2
+    assert [entry["entityID"] for entry in delta["changed"]] == [FIRST_ID]
+    assert delta["changed"][0]["DisplayNames"] == [
+        {"value": "First, renamed", "lang": "en"},
+    ]
+    assert delta["removed"] == [SECOND_ID]
+
+    # revisions unknown to the server get the whole feed
+    assert "feed" in deltas(client, since=revision + 100)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test export of the disco feed to static files."""
+
+import gzip
+import json
+import os
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+
+from invenio_edugain import cli
+from invenio_edugain.feed import KEPT_EXPORTS, LATEST_POINTER_FILENAME, export_feed
+
+IDP_ID = "https://exported.org/idp"
+
+
+@pytest.fixture
+def export_dir(base_app: Flask, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Configure feed-export to `tmp_path`."""
+    monkeypatch.setitem(base_app.config, "EDUGAIN_FEED_EXPORT_DIR", str(tmp_path))
+    monkeypatch.setitem(base_app.config, "EDUGAIN_FEED_EXPORT_URL", "/static/feed/")
+    return tmp_path
+
+
+def test_exported_on_changes(
+    base_app: Flask,
+    export_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """Ingest and manage export the feed, which the discovery page then loads."""
+    ingest_idps(idp_xml(IDP_ID))
+    first_export = (export_dir / LATEST_POINTER_FILENAME).read_text()
+
+    result = base_app.test_cli_runner().invoke(cli.manage, ["--enable", IDP_ID])
+    assert result.exit_code == 0, result.output
+    latest_export = (export_dir / LATEST_POINTER_FILENAME).read_text()
+    assert latest_export != first_export
+
+    client = base_app.test_client()
+    content = (export_dir / latest_export).read_bytes()
+    assert json.loads(content) == client.get("/saml/discofeed").json
+    assert IDP_ID in {entry["entityID"] for entry in json.loads(content)}
+    assert gzip.decompress((export_dir / f"{latest_export}.gz").read_bytes()) == content
+
+    # the page's assets aren't built in tests, hence only its context is checked
+    monkeypatch.setattr(
+        "invenio_edugain.views.render_template",
+        lambda _template, **context: json.dumps(context),
+    )
+    context = json.loads(client.get("/saml/login/discover").get_data())
+    # the page loads the variant of its language
+    language_export = (export_dir / "discofeed.en.latest").read_text()
+    assert (
+        context["shibboleth_eds_config"]["dataSource"]
+        == f"/static/feed/{language_export}"
+    )
+    assert json.loads((export_dir / language_export).read_bytes()) == (
+        client.get("/saml/discofeed", query_string={"lang": "en"}).json
+    )
+
+
+def test_outdated_exports_pruned(db: SQLAlchemy, export_dir: Path):  # noqa: ARG001
+    """Exporting anew reuses an unchanged export, and prunes all but the latest few."""
+    outdated = []
+    for index in range(KEPT_EXPORTS + 1):
+        path = export_dir / f"discofeed.outdated{index}.json"
+        path.write_text("[]")
+        path.with_name(f"{path.name}.gz").write_bytes(b"")
+        os.utime(path, ns=(index, index))
+        outdated.append(path)
+
+    filename = export_feed(export_dir)
+    assert export_feed(export_dir) == filename
+    assert sorted(path.name for path in export_dir.glob("discofeed.*.json")) == sorted(
+        [filename, *(path.name for path in outdated[-(KEPT_EXPORTS - 1) :])],
+    )
+    assert not outdated[0].with_name(f"{outdated[0].name}.gz").exists()
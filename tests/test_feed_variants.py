@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test variants of the disco feed, slimmed down to a single language."""
+
+from collections.abc import Callable
+
+import pytest
+from flask import Flask
+
+from invenio_edugain import cli
+from invenio_edugain.feed import FeedVariant, FeedVariantCache
+
+IDP_ID = "https://variants.org/idp"
+
+ENTRY = {
+    "entityID": IDP_ID,
+    "DisplayNames": [
+        {"value": "Universität", "lang": "de"},
+        {"value": "University", "lang": "en"},
+    ],
+    "Keywords": [{"value": "uni", "lang": "en"}],
+    "Logos": [
+        {"value": "/wide.png", "height": "40", "width": "160"},
+        {"value": "/fitting.png", "height": "30", "width": "40"},
+        {"value": "/tiny.png", "height": "12", "width": "16"},
+        {"value": "/icon-de.png", "height": "32", "width": "32", "lang": "de"},
+        {"value": "/icon.png", "height": "32", "width": "32"},
+    ],
+}
+
+
+def test_slim_mirrors_eds_selection():
+    """Variants keep the entries shibboleth-EDS shows, and the best-fitting logo."""
+    slimmed = FeedVariant(lang="de-at").slim(ENTRY)
+    assert slimmed["DisplayNames"] == [{"value": "Universität", "lang": "de"}]
+    # falls back to default language
+    assert slimmed["Keywords"] == [{"value": "uni", "lang": "en"}]
+    assert [logo["value"] for logo in slimmed["Logos"]] == [
+        "/fitting.png",
+        "/icon-de.png",
+    ]
+
+    slimmed = FeedVariant(lang="fr", keywords=False, logo_width=4, logo_height=1).slim(
+        ENTRY,
+    )
+    assert slimmed["DisplayNames"] == [{"value": "University", "lang": "en"}]
+    assert slimmed["Keywords"] == []
+    assert [logo["value"] for logo in slimmed["Logos"]] == ["/wide.png", "/icon.png"]
+
+
+def test_variants_served(
+    base_app: Flask,
+    monkeypatch: pytest.MonkeyPatch,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """Feed and deltas are served slimmed down per `?lang`, up to date with each revision."""
+    monkeypatch.setitem(base_app.config, "BABEL_DEFAULT_LOCALE", "en")
+    monkeypatch.setitem(base_app.config, "I18N_LANGUAGES", [("de", "German")])
+
+    def ingest_idp(display_name: str) -> None:
+        ingest_idps(
+            idp_xml(
+                IDP_ID,
+                display_names={"en": display_name, "de": f"{display_name} (de)"},
+                keywords={"en": "uni"},
+            ),
+        )
+
+    client = base_app.test_client()
+    ingest_idp("Variants")
+    result = base_app.test_cli_runner().invoke(cli.manage, ["--enable", IDP_ID])
+    assert result.exit_code == 0, result.output
+
+    def variant_entry(**query_string: str) -> dict:
+        feed = client.get("/saml/discofeed", query_string=query_string).json
+        return next(entry for entry in feed if entry["entityID"] == IDP_ID)
+
+    entry = variant_entry(lang="de")
+    assert entry["DisplayNames"] == [{"value": "Variants (de)", "lang": "de"}]
+    assert entry["Keywords"] == [{"value": "uni", "lang": "en"}]
+    assert variant_entry(lang="de", keywords="0")["Keywords"] == []
+    # other languages are narrowed to configured ones
+    assert variant_entry(lang="de-AT") == entry
+    assert variant_entry(lang="xx-unknown") == variant_entry(lang="en")
+    assert len(variant_entry()["DisplayNames"]) == 2  # noqa: PLR2004
+
+    deltas = client.get("/saml/discofeed/deltas", query_string={"lang": "en"}).json
+    assert next(e for e in deltas["feed"] if e["entityID"] == IDP_ID) == variant_entry(
+        lang="en",
+    )
+
+    # the cached variant is rebuilt for the new revision
+    ingest_idp("Renamed")
+    assert variant_entry(lang="en")["DisplayNames"] == [
+        {"value": "Renamed", "lang": "en"},
+    ]
+
+
+def test_variant_caches_bounded(base_app: Flask, monkeypatch: pytest.MonkeyPatch):
+    """Arbitrary `?lang` and `?federation` values don't grow caches beyond their bound."""
+    monkeypatch.setitem(base_app.config, "I18N_LANGUAGES", [])
+    extension = base_app.extensions["invenio-edugain"]
+    monkeypatch.setattr(extension, "feed_variant_cache", FeedVariantCache(max_size=2))
+    client = base_app.test_client()
+
+    for i in range(5):
+        response = client.get(
+            "/saml/discofeed",
+            query_string={"lang": f"x{i}", "federation": f"https://fed-{i}.org"},
+        )
+        assert response.status_code == 200  # noqa: PLR2004
+    # all narrowed to the default language, least recently used variants got evicted
+    assert list(extension.feed_variant_cache._variants) == [  # noqa: SLF001
+        (FeedVariant.for_app(base_app, "en"), (f"https://fed-{i}.org",)) for i in (3, 4)
+    ]
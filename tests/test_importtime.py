@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test that modules imported on app-creation, CLI-calls, and worker-boot stay cheap to import."""
+
+import subprocess
+import sys
+
+# imported via entry-points by every app, `invenio` CLI-call, and celery worker
+ENTRY_POINT_MODULES = (
+    "invenio_edugain",
+    "invenio_edugain.cli",
+    "invenio_edugain.config",
+    "invenio_edugain.ext",
+    "invenio_edugain.models",
+    "invenio_edugain.tasks",
+    "invenio_edugain.views",
+)
+
+# these must only be imported on first use
+LAZY_PACKAGES = frozenset(
+    {"lxml", "OpenSSL", "requests", "saml2", "validators", "xmlschema"},
+)
+
+# generous, for slow CI-runners: self-time of invenio_edugain's modules is ~60ms locally
+OWN_MODULES_BUDGET_US = 250_000
+
+
+def import_times() -> dict[str, int]:
+    """Import entry-point modules in a fresh interpreter, get self-time [us] by module."""
+    result = subprocess.run(  # noqa: S603  # no untrusted input
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {', '.join(ENTRY_POINT_MODULES)}",
+        ],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # lines hold self-time, cumulative time, and the (indented) module, separated by "|"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _cumulative_us, module = line.removeprefix("import time:").split("|")
+        times[module.strip()] = int(self_us)
+    return times
+
+
+def test_import_budget():
+    """Entry-point modules don't import pysaml2 et al., and import within budget."""
+    times = import_times()
+
+    eagerly_imported = {module.split(".")[0] for module in times} & LAZY_PACKAGES
+    assert not eagerly_imported
+
+    own_us = sum(
+        self_us
+        for module, self_us in times.items()
+        if module.split(".")[0] == "invenio_edugain"
+    )
+    assert own_us < OWN_MODULES_BUDGET_US
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test the local cache of IdPs' logos, fetched from a local HTTP stand-in."""
+
+import struct
+import threading
+import zlib
+from collections import Counter
+from collections.abc import Callable, Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from invenio_db import db
+
+from invenio_edugain import cli, logos
+from invenio_edugain.logos import prepare_logo, sniff_image_type
+from invenio_edugain.models import IdPData
+
+IDP_ID = "https://logos.org/idp"
+
+
+def png(width: int, height: int) -> bytes:
+    """Build a (grey) PNG image."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        checksum = zlib.crc32(kind + data)
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", checksum)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    rows = b"".join(b"\x00" + b"\x80" * width for _ in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+RESOURCES = {
+    "/logo.png": png(400, 300),
+    "/icon.png": png(16, 16),
+    "/broken.png": b"<html>not found, but 200</html>",
+}
+
+
+@pytest.fixture(scope="module")
+def logo_host() -> Iterator[tuple[str, Counter]]:
+    """Serve `RESOURCES` locally, get base-URL and count of requests by path."""
+    requests_by_path: Counter = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            requests_by_path[self.path] += 1
+            content = RESOURCES.get(self.path)
+            if content is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *_args: object) -> None:
+            """Keep test-output clean."""
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests_by_path
+    server.shutdown()
+    server.server_close()
+
+
+# (path on logo-host, width, height) of the IdP's logos
+LOGOS = [
+    ("/logo.png", 400, 300),
+    ("/icon.png", 16, 16),
+    ("/broken.png", 80, 60),
+    ("/missing.png", 80, 60),
+]
+
+
+@pytest.fixture
+def logo_cache_dir(base_app: Flask, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Configure logo-cache in `tmp_path`, inlining small logos."""
+    monkeypatch.setitem(base_app.config, "EDUGAIN_LOGO_CACHE_DIR", str(tmp_path))
+    monkeypatch.setitem(base_app.config, "EDUGAIN_LOGO_INLINE_MAX_BYTES", 4096)
+    return tmp_path
+
+
+def test_sniff_image_type():
+    """Images are recognized by their leading bytes, anything else isn't."""
+    assert sniff_image_type(png(1, 1)) == ("image/png", "png")
+    assert sniff_image_type(b'<?xml version="1.0"?>\n<svg/>') == (
+        "image/svg+xml",
+        "svg",
+    )
+    assert sniff_image_type(RESOURCES["/broken.png"]) is None
+    with pytest.raises(ValueError, match="not an image"):
+        prepare_logo(RESOURCES["/broken.png"])
+
+
+def test_resized_to_shown_size():
+    """With Pillow installed, logos shrink to what shibboleth-EDS shows, keeping their ratio."""
+    pytest.importorskip("PIL")
+    logo = prepare_logo(png(400, 300))
+    assert (logo.width, logo.height) == (184, 138)
+    assert sniff_image_type(logo.content) == ("image/png", "png")
+
+
+@pytest.mark.usefixtures("logo_cache_dir")
+def test_logos_served_locally(
+    base_app: Flask,
+    logo_host: tuple[str, Counter],
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """Enabling an IdP caches its logos, which the feed then points to."""
+    base_url, requests_by_path = logo_host
+    logos = [(f"{base_url}{path}", width, height) for path, width, height in LOGOS]
+    ingest_idps(idp_xml(IDP_ID, logos=logos))
+    runner = base_app.test_cli_runner()
+    result = runner.invoke(cli.manage, ["--enable", IDP_ID])
+    assert result.exit_code == 0, result.output
+
+    client = base_app.test_client()
+    feed = client.get("/saml/discofeed").json
+    logos = next(entry for entry in feed if entry["entityID"] == IDP_ID)["Logos"]
+    # failed logos are left out, the icon is inlined
+    assert len(logos) == 2  # noqa: PLR2004
+    logo, icon = logos
+    assert logo["value"].startswith("/saml/logos/")
+    assert icon["value"].startswith("data:image/png;base64,")
+
+    response = client.get(logo["value"])
+    assert response.status_code == 200  # noqa: PLR2004
+    assert sniff_image_type(response.get_data()) == ("image/png", "png")
+    assert response.cache_control.immutable
+    response.close()
+
+    # only failed logos get retried, and only after a while
+    result = runner.invoke(cli.cache_logos)
+    assert result.exit_code == 0, result.output
+    assert "Stored 0 logos" in result.output
+    assert set(requests_by_path.values()) == {1}
+
+
+@pytest.mark.usefixtures("logo_cache_dir")
+def test_logos_fetched_after_commit(
+    base_app: Flask,
+    logo_host: tuple[str, Counter],
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Fetching logos doesn't hold the transaction enabling their IdP open."""
+    idp_id = "https://logos.org/committed-idp"
+    base_url, _requests_by_path = logo_host
+    # a URL of its own, as cached URLs aren't fetched again
+    # a URL of its own, as cached URLs aren't fetched again
+    logo_url = f"{base_url}/logo.png?idp=committed"
+    ingest_idps(idp_xml(idp_id, logos=[(logo_url, 400, 300)]))
+    enabled_while_fetching = []
+    fetch_logos = logos.fetch_logos
+
+    def fetch_logos_checking_commit(*args: object, **kwargs: object) -> dict:
+        # a connection of its own sees only what is committed
+        with db.engine.connect() as connection:
+            enabled_while_fetching.append(
+                connection.scalar(
+                    db.select(IdPData.enabled).where(IdPData.id == idp_id),
+                ),
+            )
+        return fetch_logos(*args, **kwargs)
+
+    monkeypatch.setattr(logos, "fetch_logos", fetch_logos_checking_commit)
+    result = base_app.test_cli_runner().invoke(cli.manage, ["--enable", idp_id])
+    assert result.exit_code == 0, result.output
+    assert enabled_while_fetching == [True]
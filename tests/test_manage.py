@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test set-based management of ingested IdPs."""
+
+from collections.abc import Callable
+
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+
+from invenio_edugain.cli import manage
+from invenio_edugain.manage import (
+    IdPSelector,
+    read_ids,
+    selection,
+    unknown_ids,
+    update_idps,
+)
+from invenio_edugain.models import IdPData
+
+RS_CATEGORY = "http://refeds.org/category/research-and-scholarship"
+
+
+def test_selectors(
+    db: SQLAlchemy,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """Selectors match all of their criteria, updates return changed ids only."""
+    ingest_idps(
+        idp_xml(
+            "https://sel-1.at/idp",
+            registration_authority="http://www.eduid.at/",
+            entity_categories=[RS_CATEGORY],
+        ),
+        idp_xml(
+            "https://sel-2.at/idp",
+            registration_authority="http://www.eduid.at/",
+            entity_categories=["http://other/cat"],
+        ),
+        idp_xml(
+            "https://sel-3.de/idp",
+            registration_authority="https://www.aai.dfn.de",
+            entity_categories=[RS_CATEGORY],
+        ),
+    )
+    selector = IdPSelector(
+        id_regex="^https://sel-",
+        registration_authority="http://www.eduid.at/",
+    )
+    assert update_idps(selection(selector=selector), enabled=True) == [
+        "https://sel-1.at/idp",
+        "https://sel-2.at/idp",
+    ]
+    assert update_idps(selection(selector=selector), enabled=True) == []
+
+    selector = IdPSelector(id_regex="^https://sel-", entity_category=RS_CATEGORY)
+    assert update_idps(selection(selector=selector), discoverable=False) == [
+        "https://sel-1.at/idp",
+        "https://sel-3.de/idp",
+    ]
+    db.session.commit()
+
+    idp = db.session.get(IdPData, "https://sel-3.de/idp")
+    assert not idp.enabled
+    assert not idp.discoverable
+
+    # given ids and selectors combine
+    where = selection(
+        ["https://sel-3.de/idp"],
+        IdPSelector(registration_authority="http://www.eduid.at/"),
+    )
+    assert update_idps(where, discoverable=True) == [
+        "https://sel-1.at/idp",
+        "https://sel-3.de/idp",
+    ]
+
+    assert update_idps(selection(), enabled=False) == []
+    assert unknown_ids(["https://sel-1.at/idp", "https://sel-4.at/idp"]) == [
+        "https://sel-4.at/idp",
+    ]
+
+
+def test_cli_reads_ids_from_stdin(
+    base_app: Flask,
+    db: SQLAlchemy,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """Ids are read from stdin, unknown ids fail without changing anything."""
+    ingest_idps(
+        idp_xml(
+            "https://stdin-1.org/idp",
+            registration_authority="http://ra.org/",
+            entity_categories=[RS_CATEGORY],
+        ),
+        idp_xml(
+            "https://stdin-2.org/idp",
+            registration_authority="http://ra.org/",
+            entity_categories=[RS_CATEGORY],
+        ),
+    )
+    runner = base_app.test_cli_runner()
+
+    stdin = "# comment\nhttps://stdin-1.org/idp\n\nhttps://unknown.org/idp\n"
+    result = runner.invoke(manage, ["--enable", "--ids-from", "-"], input=stdin)
+    assert result.exit_code == 1
+    assert "https://unknown.org/idp" in result.output
+    assert not db.session.get(IdPData, "https://stdin-1.org/idp").enabled
+
+    stdin = "https://stdin-1.org/idp\nhttps://stdin-2.org/idp\n"
+    result = runner.invoke(manage, ["--enable", "--ids-from", "-"], input=stdin)
+    assert result.exit_code == 0
+    assert "Updated 2 IdPs" in result.output
+    db.session.expire_all()
+    assert db.session.get(IdPData, "https://stdin-2.org/idp").enabled
+
+    result = runner.invoke(manage, ["--enable", "--disable"])
+    assert result.exit_code == 2  # noqa: PLR2004
+    assert "at least one idp-id or selector" in result.output
+    assert "mutually exclusive" in result.output
+
+
+def test_read_ids():
+    """Blank lines and comments are skipped, whitespace stripped."""
+    assert read_ids(["  https://a.org \n", "\n", "# https://b.org\n", "c"]) == [
+        "https://a.org",
+        "c",
+    ]
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test instrumentation of the login pipeline."""
+
+import pytest
+from flask import Flask, abort
+from werkzeug.exceptions import Forbidden
+
+from invenio_edugain.metrics import (
+    TOTAL_STAGE,
+    PrometheusSink,
+    instrumented,
+    load_metrics_sink,
+    set_metrics_label,
+    timed_stage,
+)
+
+
+def test_prometheus_exposition():
+    """Observations are aggregated into cumulative buckets per label-set."""
+    sink = PrometheusSink(buckets=(0.1, 1.0))
+    labels = {
+        "pipeline": "acs",
+        "idp": 'https://idp.foo.org/"idp"',
+        "outcome": "success",
+    }
+    for seconds in [0.05, 0.5, 5.0]:
+        sink.observe("parse_response", seconds, labels)
+
+    exposition = sink.exposition()
+    prefix = (
+        "invenio_edugain_stage_duration_seconds_bucket{"
+        'idp="https://idp.foo.org/\\"idp\\"",outcome="success",pipeline="acs",stage="parse_response",'
+    )
+    assert f'{prefix}le="0.1"}} 1' in exposition
+    assert f'{prefix}le="1.0"}} 2' in exposition
+    assert f'{prefix}le="+Inf"}} 3' in exposition
+    assert "# TYPE invenio_edugain_stage_duration_seconds histogram" in exposition
+
+
+def test_instrumented_reports_stages(base_app: Flask):
+    """Stages and total are reported with pipeline, idp, and outcome labels."""
+    observed: list[tuple[str, dict[str, str]]] = []
+    extension = base_app.extensions["invenio-edugain"]
+    extension.metrics_sink = load_metrics_sink(
+        lambda stage, _seconds, labels: observed.append((stage, dict(labels))),
+    )
+
+    @instrumented("test")
+    def view(*, fail: bool) -> str:
+        set_metrics_label("idp", "https://idp.foo.org/idp")
+        with timed_stage("work"):
+            if fail:
+                abort(403)
+        return "ok"
+
+    try:
+        with base_app.test_request_context():
+            assert view(fail=False) == "ok"
+            with pytest.raises(Forbidden):
+                view(fail=True)
+    finally:
+        extension.metrics_sink = None
+
+    labels = {"pipeline": "test", "idp": "https://idp.foo.org/idp"}
+    assert observed == [
+        ("work", {**labels, "outcome": "success"}),
+        (TOTAL_STAGE, {**labels, "outcome": "success"}),
+        ("work", {**labels, "outcome": "http_403"}),
+        (TOTAL_STAGE, {**labels, "outcome": "http_403"}),
+    ]
+
+
+def test_metrics_route_opt_in(base_app: Flask):
+    """Aggregated timings aren't served unless the "metrics" route is configured."""
+    assert "invenio_edugain.metrics" not in base_app.view_functions
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test ingest-rules that enable/show IdPs as they're ingested."""
+
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+from saml2.mdstore import MetadataStore
+
+from invenio_edugain import cli, ingest
+from invenio_edugain.extraction import HIDE_FROM_DISCOVERY_CATEGORY
+from invenio_edugain.models import IdPData
+from invenio_edugain.policy import load_ingest_rules
+
+RS_CATEGORY = "http://refeds.org/category/research-and-scholarship"
+EDUID_AT = "http://www.eduid.at/"
+
+
+def states(db: SQLAlchemy, *idp_ids: str) -> list[tuple[bool, bool]]:
+    """Get (enabled, discoverable) of IdPs."""
+    db.session.expire_all()
+    return [
+        (idp.enabled, idp.discoverable)
+        for idp in (db.session.get(IdPData, idp_id) for idp_id in idp_ids)
+    ]
+
+
+def test_rules_on_ingest(
+    db: SQLAlchemy,
+    tmp_path: Path,
+    idp_xml: Callable[..., str],
+    inline_metadata: Callable[..., MetadataStore],
+):
+    """Rules apply to added IdPs, later rules win, deny-lists override."""
+    deny_list = tmp_path / "deny.txt"
+    deny_list.write_text("# comment\nhttps://rule-3.at/idp\n")
+    rules = load_ingest_rules(
+        [
+            {"registration_authority": EDUID_AT, "enabled": True},
+            {"entity_category": RS_CATEGORY, "discoverable": False},
+            {"ids_file": str(deny_list), "enabled": False},
+        ],
+    )
+    idp_ids = [
+        "https://rule-1.at/idp",
+        "https://rule-2.de/idp",
+        "https://rule-3.at/idp",
+        "https://rule-4.at/idp",
+    ]
+    mds = inline_metadata(
+        idp_xml(
+            idp_ids[0],
+            registration_authority=EDUID_AT,
+            entity_categories=["http://other/cat"],
+        ),
+        idp_xml(
+            idp_ids[1],
+            registration_authority="https://www.aai.dfn.de",
+            entity_categories=[RS_CATEGORY],
+        ),
+        idp_xml(
+            idp_ids[2],
+            registration_authority=EDUID_AT,
+            entity_categories=["http://other/cat"],
+        ),
+        idp_xml(
+            idp_ids[3],
+            registration_authority=EDUID_AT,
+            entity_categories=[HIDE_FROM_DISCOVERY_CATEGORY],
+        ),
+    )
+
+    item = ingest.from_mdstore(mds, rules=rules, dry_run=True)
+    assert item.rule_changes == {
+        idp_ids[0]: {"enabled": True},
+        idp_ids[1]: {"discoverable": False},
+        idp_ids[3]: {"enabled": True},
+    }
+    assert db.session.get(IdPData, idp_ids[0]) is None
+
+    ingest.from_mdstore(mds, rules=rules)
+    assert states(db, *idp_ids) == [
+        (True, True),
+        (False, False),
+        (False, True),
+        (True, False),
+    ]
+
+    # rules don't apply to already ingested IdPs, unless reapplied
+    rules = load_ingest_rules([{"id_regex": r"^https://rule-", "enabled": False}])
+    assert ingest.from_mdstore(mds, rules=rules).rule_changes == {}
+    item = ingest.from_mdstore(mds, rules=rules, reapply_rules=True)
+    assert sorted(item.rule_changes) == [idp_ids[0], idp_ids[3]]
+    assert states(db, idp_ids[0], idp_ids[3]) == [(False, True), (False, False)]
+
+
+@pytest.mark.parametrize(
+    ("rule_config", "error"),
+    [
+        ({"enabled": True, "unknown": 1}, "unknown keys"),
+        ({"id_regex": "^x"}, "no effect"),
+        ({"id_regex": "(", "enabled": True}, "invalid id_regex"),
+    ],
+)
+def test_invalid_rules(rule_config: dict, error: str):
+    """Invalid rules are rejected when loaded."""
+    with pytest.raises(ValueError, match=error):
+        load_ingest_rules([rule_config])
+
+
+def test_cli_dry_run(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+    idp_xml: Callable[..., str],
+    inline_metadata: Callable[..., MetadataStore],
+):
+    """`ingest --dry-run` reports changes by rules, without writing them."""
+    idp_id = "https://rule-cli.at/idp"
+    metadata_file = "./metadata.xml"
+    xml = idp_xml(
+        idp_id,
+        registration_authority=EDUID_AT,
+        entity_categories=[RS_CATEGORY],
+    )
+    # loading from file relies on xmlsec1, the in-process backend suffices here
+    monkeypatch.setattr(
+        "invenio_edugain.utils.load_mdstore",
+        lambda _location, **_: inline_metadata(xml),
+    )
+    monkeypatch.setitem(
+        base_app.config,
+        "EDUGAIN_INGEST_RULES",
+        [{"registration_authority": EDUID_AT, "enabled": True}],
+    )
+
+    runner = base_app.test_cli_runner()
+    result = runner.invoke(cli.ingest_idps, [metadata_file, "--dry-run"])
+    assert result.exit_code == 0, result.output
+    assert f"{idp_id}: enabled=True" in result.output
+    assert "1 enabled/disabled by rules" in result.output
+    assert db.session.get(IdPData, idp_id) is None
+
+    monkeypatch.setitem(base_app.config, "EDUGAIN_INGEST_RULES", [{"enabled": None}])
+    result = runner.invoke(cli.ingest_idps, [metadata_file])
+    assert result.exit_code == 2  # noqa: PLR2004
+    assert "invalid EDUGAIN_INGEST_RULES" in result.output
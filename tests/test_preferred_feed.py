@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test inlining of preferred and recently chosen IdPs into the discovery page."""
+
+import base64
+import json
+from collections.abc import Callable
+from urllib.parse import quote
+
+import pytest
+from flask import Flask
+
+from invenio_edugain import cli
+from invenio_edugain.feed import SAML_IDP_COOKIE, parse_saml_idp_cookie
+
+PREFERRED_ID = "https://preferred.org/idp"
+RECENT_ID = "https://recent.org/idp"
+OTHER_ID = "https://other.org/idp"
+
+
+def cookie_value(*entity_ids: str) -> str:
+    """Encode entity-ids as shibboleth-EDS does, oldest choice first."""
+    return "%20".join(
+        quote(base64.b64encode(entity_id.encode()).decode(), safe="")
+        for entity_id in entity_ids
+    )
+
+
+def test_parse_saml_idp_cookie():
+    """Most recent choice comes first, malformed parts are skipped."""
+    value = cookie_value(OTHER_ID, RECENT_ID)
+    assert parse_saml_idp_cookie(value) == [RECENT_ID, OTHER_ID]
+    assert parse_saml_idp_cookie(f"{value}%20not-base64!") == [RECENT_ID, OTHER_ID]
+    assert parse_saml_idp_cookie("") == []
+
+
+def test_preferred_idps_inlined(
+    base_app: Flask,
+    monkeypatch: pytest.MonkeyPatch,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """The page inlines entries of `preferredIdP` and of the `_saml_idp` cookie."""
+    ingest_idps(
+        *(
+            idp_xml(idp_id, display_names={"en": idp_id})
+            for idp_id in [PREFERRED_ID, RECENT_ID, OTHER_ID]
+        ),
+    )
+    result = base_app.test_cli_runner().invoke(
+        cli.manage,
+        ["--enable", PREFERRED_ID, RECENT_ID, OTHER_ID],
+    )
+    assert result.exit_code == 0, result.output
+
+    monkeypatch.setitem(
+        base_app.config,
+        "EDUGAIN_SHIBBOLETH_EDS_CONFIG",
+        {
+            **base_app.config["EDUGAIN_SHIBBOLETH_EDS_CONFIG"],
+            "preferredIdP": [PREFERRED_ID],
+            "maxPreferredIdPs": 2,
+        },
+    )
+    # the page's assets aren't built in tests, hence only its context is checked
+    monkeypatch.setattr(
+        "invenio_edugain.views.render_template",
+        lambda _template, **context: json.dumps(context),
+    )
+    client = base_app.test_client()
+    client.set_cookie(SAML_IDP_COOKIE, cookie_value(OTHER_ID, RECENT_ID, "unknown"))
+    context = json.loads(client.get("/saml/login/discover").get_data())
+
+    # only the first `maxPreferredIdPs` known IdPs, slimmed down as the page's feed
+    assert [entry["entityID"] for entry in context["preferred_feed"]] == [PREFERRED_ID]
+    client.set_cookie(SAML_IDP_COOKIE, cookie_value(OTHER_ID, RECENT_ID))
+    context = json.loads(client.get("/saml/login/discover").get_data())
+    assert sorted(entry["entityID"] for entry in context["preferred_feed"]) == sorted(
+        [PREFERRED_ID, RECENT_ID],
+    )
+    assert context["preferred_feed"][0]["DisplayNames"] == [
+        {"value": context["preferred_feed"][0]["entityID"], "lang": "en"},
+    ]
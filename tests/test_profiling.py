@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test opt-in profiling of CLI commands and views."""
+
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from saml2 import BINDING_HTTP_POST
+
+from invenio_edugain.cli import search
+from invenio_edugain.crypto import IN_PROCESS_CRYPTO_BACKEND
+from invenio_edugain.profiling import PROFILE_HEADER, Profiler
+
+PKI = Path(__file__).parent / "build_config" / "pki"
+SP_CONFIG = {
+    "crypto_backend": IN_PROCESS_CRYPTO_BACKEND,
+    "entityid": "https://repository.foo.org/saml/sp/xml",
+    "cert_file": str(PKI / "signing.crt"),
+    "key_file": str(PKI / "signing.key"),
+    "service": {
+        "sp": {
+            "endpoints": {
+                "assertion_consumer_service": [
+                    ("https://repository.foo.org/saml/acs", BINDING_HTTP_POST),
+                ],
+            },
+        },
+    },
+}
+
+
+def test_one_profile_at_a_time(tmp_path: Path):
+    """Profiles aren't nested, their stats and peak memory are written to disk."""
+    profiler = Profiler("outer", tmp_path)
+    assert profiler.start()
+    assert not Profiler("inner", tmp_path).start()
+    buffer = bytearray(1024 * 1024)
+    del buffer
+    summary_path = profiler.stop()
+
+    summary = summary_path.read_text()
+    assert "name: outer" in summary
+    assert "peak memory (tracemalloc): 1." in summary
+    assert summary_path.with_suffix(".prof").exists()
+
+
+@pytest.mark.usefixtures("db")
+def test_cli(base_app: Flask, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Commands given `--profile` are profiled."""
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PROFILE_DIR", str(tmp_path))
+    runner = base_app.test_cli_runner()
+
+    result = runner.invoke(search, ["no-such-idp"])
+    assert result.exit_code == 0, result.output
+    assert not list(tmp_path.iterdir())
+
+    result = runner.invoke(search, ["no-such-idp", "--profile"])
+    assert result.exit_code == 0, result.output
+    [summary_path] = tmp_path.glob("cli-search-*.txt")
+    assert "search_idps" in summary_path.read_text()
+
+
+def test_views(base_app: Flask, tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Views are profiled when sent the configured token, or when sampled."""
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PYSAML2_CONFIG", SP_CONFIG)
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PROFILE_DIR", str(tmp_path))
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PROFILE_REQUEST_TOKEN", "s3cret")
+    client = base_app.test_client()
+
+    def profile_count() -> int:
+        return len(list(tmp_path.glob("invenio_edugain-sp_xml-*.prof")))
+
+    for headers in [{}, {PROFILE_HEADER: "wrong"}]:
+        response = client.get("/saml/sp/xml", headers=headers)
+        assert response.status_code == HTTPStatus.OK
+    assert profile_count() == 0
+
+    client.get("/saml/sp/xml", headers={PROFILE_HEADER: "s3cret"})
+    assert profile_count() == 1
+
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PROFILE_SAMPLE_RATE", 1.0)
+    client.get("/saml/sp/xml")
+    assert profile_count() == len(["header-triggered", "sampled"])
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test single-transaction user provisioning."""
+
+import pytest
+from flask import Flask
+from invenio_accounts.models import User, UserIdentity
+from invenio_db.shared import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from invenio_edugain.utils import (
+    AuthnInfo,
+    AuthnResponseError,
+    default_authn_response_handler,
+    provision_user,
+)
+
+
+def authn_info(email: str = "user@foo.org", username: str = "user-1") -> AuthnInfo:
+    """Build authentication info as parsed from a SAML response."""
+    return AuthnInfo(
+        id_by_method={
+            "pairwise-id": None,
+            "subject-id": f"{username}@foo.org",
+            "eduPersonPrincipalName": None,
+        },
+        additional_attributes={},
+        affiliations=["member@foo.org", "staff@foo.org"],
+        emails=[email],
+        full_name="Some User",
+        issuer="https://idp.foo.org/idp",
+        next=None,
+        pysaml2_response=None,
+        suggested_username=username,
+        user=None,
+    )
+
+
+def test_first_login_commits_once(base_app: Flask, db: SQLAlchemy):
+    """User, profile, identity, and login-bookkeeping are committed together."""
+    commits = []
+
+    def count_commit(session: Session) -> None:
+        commits.append(session)
+
+    event.listen(Session, "after_commit", count_commit)
+    try:
+        with base_app.test_request_context():
+            response = default_authn_response_handler(authn_info(), "/next")
+    finally:
+        event.remove(Session, "after_commit", count_commit)
+
+    assert response.location == "/next"
+    assert len(commits) == 1
+    identity = db.session.get(UserIdentity, ("user-1@foo.org", "subject-id"))
+    user = identity.user
+    assert user.email == "user@foo.org"
+    assert user.username.startswith("user-")  # random username
+    assert user.confirmed_at is not None
+    assert user.password is None
+    assert user.user_profile["full_name"] == "Some User"
+    assert user.user_profile["affiliations"] == "member@foo.org;staff@foo.org"
+
+
+def test_validates_like_registration_form(base_app: Flask, db: SQLAlchemy):
+    """Malformed, taken emails and taken usernames are refused."""
+    with base_app.test_request_context():
+        provision_user(authn_info(email="taken@foo.org", username="taken"))
+        db.session.commit()
+        user_count = len(db.session.scalars(db.select(User)).all())
+
+        for info in [
+            authn_info(email="not an email", username="user-2"),
+            authn_info(email="TAKEN@foo.org", username="user-2"),
+            authn_info(email="other@foo.org", username="TAKEN"),
+        ]:
+            with pytest.raises(AuthnResponseError):
+                provision_user(info)
+        assert len(db.session.scalars(db.select(User)).all()) == user_count
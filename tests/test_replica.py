@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test routing of read-only queries to a read replica, with fallback to the primary."""
+
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+from sqlalchemy import create_engine, event
+
+from invenio_edugain import cli
+from invenio_edugain.replica import read_replica
+from invenio_edugain.search import search_idps
+from invenio_edugain.utils import MetaDataFlaskSQL
+
+IDP_ID = "https://replica.org/idp"
+
+
+@pytest.fixture
+def enabled_idp(
+    base_app: Flask,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+) -> str:
+    """Ingest and enable an IdP."""
+    ingest_idps(idp_xml(IDP_ID))
+    result = base_app.test_cli_runner().invoke(cli.manage, ["--enable", IDP_ID])
+    assert result.exit_code == 0, result.output
+    return IDP_ID
+
+
+@pytest.fixture
+def use_replica(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Callable[[str], list[str]]:
+    """Get function configuring a replica-bind at `url`, which gets the statements executed on it."""
+
+    def use_replica_at(url: str) -> list[str]:
+        engine = create_engine(url)
+        statements: list[str] = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def record(*args: object) -> None:
+            statements.append(str(args[2]))
+
+        with base_app.app_context():
+            monkeypatch.setitem(db.engines, "replica", engine)
+        monkeypatch.setitem(base_app.config, "EDUGAIN_READ_REPLICA_BIND", "replica")
+        return statements
+
+    return use_replica_at
+
+
+@pytest.fixture(autouse=True)
+def forget_failures() -> Iterator[None]:
+    """Don't carry failures of replicas over between tests."""
+    read_replica.reset()
+    yield
+    read_replica.reset()
+
+
+def test_reads_routed_to_replica(
+    base_app: Flask,
+    db: SQLAlchemy,
+    enabled_idp: str,
+    use_replica: Callable[[str], list[str]],
+):
+    """Disco feed, loading enabled IdPs, and search read from the replica."""
+    # the replica of this test is the primary's db-file, opened via a separate engine
+    with base_app.app_context():
+        statements = use_replica(str(db.engine.url))
+
+    client = base_app.test_client()
+    feed = client.get("/saml/discofeed").json
+    assert enabled_idp in [entry["entityID"] for entry in feed]
+    assert any("edugain_idp_data" in statement for statement in statements)
+
+    statements.clear()
+    feed = client.get("/saml/discofeed", query_string={"lang": "en"}).json
+    assert enabled_idp in [entry["entityID"] for entry in feed]
+    assert any("edugain_disco_feed" in statement for statement in statements)
+
+    statements.clear()
+    with base_app.app_context():
+        metadata = MetaDataFlaskSQL(None, "load-id")
+        metadata.load()
+        assert enabled_idp in metadata.entity
+        assert statements
+
+        statements.clear()
+        assert [match.id for match in search_idps("replica\\.org")] == [enabled_idp]
+        assert statements
+
+
+def test_falls_back_to_primary(
+    base_app: Flask,
+    enabled_idp: str,
+    use_replica: Callable[[str], list[str]],
+    tmp_path: Path,
+    caplog: pytest.LogCaptureFixture,
+):
+    """Reads fall back to the primary while the replica fails, which is retried only later."""
+    # sqlite can't open a db-file in a directory that doesn't exist
+    statements = use_replica(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    client = base_app.test_client()
+    feed = client.get("/saml/discofeed").json
+    assert enabled_idp in [entry["entityID"] for entry in feed]
+    assert "couldn't read from replica 'replica'" in caplog.text
+
+    # the failed replica isn't tried again right away
+    caplog.clear()
+    assert client.get("/saml/discofeed").json == feed
+    assert "couldn't read from replica" not in caplog.text
+    assert statements == []
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test serving metadata-dependent views from a snapshot, revalidated in the background."""
+
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+from saml2 import BINDING_HTTP_POST
+from sqlalchemy.exc import OperationalError
+
+from invenio_edugain import cli
+from invenio_edugain.authn_request import idp_sso_location_cache
+from invenio_edugain.crypto import IN_PROCESS_CRYPTO_BACKEND
+from invenio_edugain.revalidate import MetadataSnapshot, StaleWhileRevalidate
+from invenio_edugain.utils import MetaDataFlaskSQL
+
+IDP_ID = "https://revalidate.org/idp"
+PKI = Path(__file__).parent / "build_config" / "pki"
+SP_CONFIG = {
+    "crypto_backend": IN_PROCESS_CRYPTO_BACKEND,
+    "entityid": "https://repository.foo.org/saml/sp/xml",
+    "cert_file": str(PKI / "signing.crt"),
+    "key_file": str(PKI / "signing.key"),
+    "metadata": [
+        {
+            "class": "invenio_edugain.utils.MetaDataFlaskSQL",
+            "metadata": [(None,)],
+        },
+    ],
+    "service": {
+        "sp": {
+            "authn_requests_signed": False,
+            "endpoints": {
+                "assertion_consumer_service": [
+                    ("https://repository.foo.org/saml/acs", BINDING_HTTP_POST),
+                ],
+            },
+        },
+    },
+}
+
+
+class Clock:
+    """Stand-in for `monotonic`, advanced by hand."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        """Get current time."""
+        return self.now
+
+
+def test_stale_while_revalidate(base_app: Flask, monkeypatch: pytest.MonkeyPatch):
+    """Stale results are served while a single background load runs, until too stale."""
+    clock = Clock()
+    monkeypatch.setattr("invenio_edugain.revalidate.monotonic", clock)
+    msg = "db down"
+    results: list[str | Exception] = [
+        "first",
+        "second",
+        ValueError(msg),
+        "third",
+        "fourth",
+    ]
+    loaded = threading.Event()
+    proceed = threading.Event()
+    proceed.set()
+
+    def load() -> str:
+        proceed.wait(timeout=10)
+        result = results.pop(0)
+        loaded.set()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    holder = StaleWhileRevalidate(
+        load,
+        fresh_for=10,
+        max_stale=60,
+        logger=base_app.logger,
+    )
+
+    def wait_for_refresh() -> None:
+        assert loaded.wait(timeout=10)
+        loaded.clear()
+        while holder._refreshing:  # noqa: SLF001
+            threading.Event().wait(0.01)
+
+    assert holder.get() == "first"
+    loaded.clear()
+    clock.now += 5
+    assert holder.get() == "first"
+
+    # stale: served as is, while a single background load runs
+    clock.now += 10
+    proceed.clear()
+    assert holder.get() == "first"
+    assert holder.get() == "first"
+    proceed.set()
+    wait_for_refresh()
+    assert holder.get() == "second"
+
+    # failing revalidation keeps serving the stale result, retried on the next call
+    clock.now += 20
+    assert holder.get() == "second"
+    wait_for_refresh()
+    assert holder.get() == "second"
+    wait_for_refresh()
+    assert holder.get() == "third"
+
+    # too stale: loaded on the calling thread
+    clock.now += 61
+    assert holder.get() == "fourth"
+    assert results == []
+
+
+def test_snapshot_variants_bounded(monkeypatch: pytest.MonkeyPatch):
+    """Snapshots hold serialized variants up to a bound, evicting the least recently used."""
+    monkeypatch.setattr("invenio_edugain.revalidate.MAX_CACHED_VARIANTS", 2)
+    entry = {"entityID": IDP_ID}
+    snapshot = MetadataSnapshot(
+        settings_by_id={},
+        registration_authority_by_id={IDP_ID: "https://fed-1.org"},
+        feed=[entry],
+    )
+    for federation in ["https://fed-1.org", "https://fed-2.org", "https://fed-1.org"]:
+        snapshot.feed_content(federations=[federation])
+    snapshot.feed_content(federations=["https://fed-3.org"])
+    assert list(snapshot._serialized) == [  # noqa: SLF001
+        (None, ("https://fed-1.org",)),
+        (None, ("https://fed-3.org",)),
+    ]
+
+
+def test_served_while_db_fails(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """Disco feed, AuthnRequests, and the ACS' metadata are served from the snapshot while the db fails."""
+    ingest_idps(idp_xml(IDP_ID))
+    result = base_app.test_cli_runner().invoke(cli.manage, ["--enable", IDP_ID])
+    assert result.exit_code == 0, result.output
+
+    clock = Clock()
+    monkeypatch.setattr("invenio_edugain.revalidate.monotonic", clock)
+    monkeypatch.setitem(base_app.config, "EDUGAIN_METADATA_SNAPSHOT_TTL", 10)
+    monkeypatch.setitem(base_app.config, "EDUGAIN_METADATA_SNAPSHOT_MAX_STALENESS", 60)
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PYSAML2_CONFIG", SP_CONFIG)
+    extension = base_app.extensions["invenio-edugain"]
+    monkeypatch.setattr(extension, "metadata_snapshot_holder", None)
+    idp_sso_location_cache.invalidate()
+
+    client = base_app.test_client()
+    feed = client.get("/saml/discofeed").json
+    assert IDP_ID in [entry["entityID"] for entry in feed]
+
+    def fail(*_args: object, **_kwargs: object) -> None:
+        msg = "db down"
+        raise OperationalError(None, None, Exception(msg))
+
+    for method in ["execute", "scalar", "scalars"]:
+        monkeypatch.setattr(db.session, method, fail)
+
+    assert client.get("/saml/discofeed").json == feed
+    response = client.get("/saml/discofeed", query_string={"lang": "en"})
+    assert [entry["entityID"] for entry in response.json] == [
+        entry["entityID"] for entry in feed
+    ]
+    response = client.get(
+        "/saml/login/authn-request",
+        query_string={"entityID": IDP_ID},
+        base_url="https://repository.foo.org/",
+    )
+    assert response.status_code == 303  # noqa: PLR2004
+    assert response.location.startswith(f"{IDP_ID}/sso?SAMLRequest=")
+    with base_app.app_context():
+        metadata = MetaDataFlaskSQL(None, "load-id")
+        metadata.load()
+        assert IDP_ID in metadata.entity
+
+    # beyond the maximum staleness, requests fail like without a snapshot
+    clock.now += 61
+    with pytest.raises(OperationalError):
+        client.get("/saml/discofeed")
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test searching through ingested IdPs."""
+
+from collections.abc import Callable
+
+import pytest
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+
+from invenio_edugain.cli import search
+from invenio_edugain.models import IdPData
+from invenio_edugain.search import InvalidRegexError, search_idps
+
+
+def test_search(
+    db: SQLAlchemy,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """Entity-ids, names, and keywords are searched, `^` anchors at each of them."""
+    ingest_idps(
+        idp_xml(
+            "https://idp.search-a.org",
+            display_names={"en": "Search University A"},
+            keywords={"en": "library alpha"},
+        ),
+        idp_xml(
+            "https://idp.search-b.org",
+            display_names={"en": "Search College B"},
+            keywords={"en": "university beta"},
+        ),
+    )
+    idp = db.session.get(IdPData, "https://idp.search-a.org")
+    assert idp.search_text.splitlines() == [
+        "https://idp.search-a.org",
+        "Search University A",
+        "library alpha",
+    ]
+
+    assert [r.id for r in search_idps("search.*univ")] == ["https://idp.search-a.org"]
+    assert [r.id for r in search_idps("^university")] == ["https://idp.search-b.org"]
+    assert [r.id for r in search_idps("search-b")] == ["https://idp.search-b.org"]
+    assert len(search_idps("idp.search-", limit=1)) == 1
+    # matches don't span multiple terms
+    assert search_idps("alpha.*beta|College.*beta") == []
+
+    [result] = search_idps("library")
+    assert result.terms == ["Search University A", "library alpha"]
+    assert not result.enabled
+    assert result.discoverable
+
+
+def test_extracts_missing_search_texts(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """IdPs ingested before search-text got extracted are found anyway."""
+    ingest_idps(
+        idp_xml(
+            "https://idp.legacy.org",
+            display_names={"en": "Legacy Institute"},
+            keywords={"en": "old"},
+        ),
+    )
+    db.session.get(IdPData, "https://idp.legacy.org").search_text = None
+    db.session.commit()
+    # as after upgrading, before this process looked for missing columns
+    extension = base_app.extensions["invenio-edugain"]
+    monkeypatch.setattr(extension, "missing_columns_extracted", False)
+
+    assert [r.id for r in search_idps("legacy inst")] == ["https://idp.legacy.org"]
+    assert db.session.get(IdPData, "https://idp.legacy.org").search_text is not None
+
+
+def test_cli_limit(
+    base_app: Flask,
+    idp_xml: Callable[..., str],
+    ingest_idps: Callable[..., object],
+):
+    """CLI shows at most `--limit` results, and tells when there are more."""
+    ingest_idps(
+        idp_xml(
+            "https://idp.cli-1.org",
+            display_names={"en": "Cli Idp One"},
+            keywords={"en": "cli"},
+        ),
+        idp_xml(
+            "https://idp.cli-2.org",
+            display_names={"en": "Cli Idp Two"},
+            keywords={"en": "cli"},
+        ),
+    )
+    runner = base_app.test_cli_runner()
+
+    result = runner.invoke(search, ["^cli idp", "--limit", "1"])
+    assert result.exit_code == 0
+    assert "https://idp.cli-1.org" in result.output
+    assert "https://idp.cli-2.org" not in result.output
+    assert "see --limit" in result.output
+
+    result = runner.invoke(search, ["("])
+    assert result.exit_code == 2  # noqa: PLR2004
+    assert "invalid regex" in result.output
+
+
+@pytest.mark.usefixtures("db")
+def test_invalid_regex():
+    """Regexes rejected by the db (or Python) raise a dedicated error."""
+    with pytest.raises(InvalidRegexError, match="invalid regex"):
+        search_idps("(")
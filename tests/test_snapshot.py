@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test exporting and importing snapshots of ingested IdPs."""
+
+import gzip
+import io
+import json
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from invenio_db.shared import SQLAlchemy
+
+from invenio_edugain.cli import export_idps, import_idps
+from invenio_edugain.models import IdPData
+from invenio_edugain.snapshot import SnapshotError, export_snapshot, import_snapshot
+
+SETTINGS = {"entity_id": "https://snap-1.org/idp", "idpsso_descriptor": []}
+
+
+def all_rows(db: SQLAlchemy) -> list[tuple]:
+    """Get all IdPs' columns, ordered by id."""
+    db.session.expire_all()
+    return [
+        (idp.id, idp.enabled, idp.discoverable, idp.settings, idp.search_text)
+        for idp in db.session.scalars(db.select(IdPData).order_by(IdPData.id))
+    ]
+
+
+def test_round_trip(db: SQLAlchemy):
+    """Importing an export restores flags and settings, also with small batches."""
+    db.session.add_all(
+        [
+            IdPData(
+                id=f"https://snap-{i}.org/idp",
+                enabled=i % 2 == 0,
+                discoverable=i != 1,
+                settings={**SETTINGS, "entity_id": f"https://snap-{i}.org/idp"},
+                search_text=f"https://snap-{i}.org/idp\nSnap {i}",
+                display_names=[],
+            )
+            for i in range(5)
+        ],
+    )
+    db.session.commit()
+    exported_rows = all_rows(db)
+
+    buffer = io.BytesIO()
+    assert export_snapshot(buffer, batch_size=2) == len(exported_rows)
+
+    # local changes are overwritten, IdPs not in snapshot are kept unless replacing
+    db.session.get(IdPData, "https://snap-0.org/idp").enabled = False
+    db.session.add(IdPData(id="https://snap-x.org/idp", settings={}))
+    db.session.commit()
+
+    count = import_snapshot(io.BytesIO(buffer.getvalue()), batch_size=2)
+    assert count == len(exported_rows)
+    rows = all_rows(db)
+    assert [row for row in rows if row[0] != "https://snap-x.org/idp"] == exported_rows
+
+    import_snapshot(io.BytesIO(buffer.getvalue()), replace=True)
+    assert all_rows(db) == exported_rows
+
+
+def test_extracts_columns_missing_from_snapshot(
+    base_app: Flask,
+    db: SQLAlchemy,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """Snapshots of earlier versions lack extracted columns, which importing extracts."""
+    idp_id = "https://snap-old.org/idp"
+    # as if this process already found no missing columns
+    extension = base_app.extensions["invenio-edugain"]
+    monkeypatch.setattr(extension, "missing_columns_extracted", True)
+    header = {
+        "format": "invenio-edugain-idp-snapshot",
+        "version": 1,
+        "columns": ["id", "settings"],
+    }
+    row = {"id": idp_id, "settings": {**SETTINGS, "entity_id": idp_id}}
+    lines = [json.dumps(header), json.dumps(row)]
+    import_snapshot(io.BytesIO(gzip.compress("\n".join(lines).encode())))
+
+    db.session.expire_all()
+    idp = db.session.get(IdPData, idp_id)
+    assert idp.search_text is not None
+    assert idp.display_names is not None
+
+
+def test_rejects_invalid_snapshots(db: SQLAlchemy):
+    """Invalid snapshots are rejected without changing the db."""
+    db.session.add(IdPData(id="https://keep.org/idp", settings={}))
+    db.session.commit()
+
+    with pytest.raises(SnapshotError, match="couldn't read"):
+        import_snapshot(io.BytesIO(b"not gzipped"), replace=True)
+
+    header = {"format": "invenio-edugain-idp-snapshot", "version": 1, "columns": ["id"]}
+    with pytest.raises(SnapshotError, match="unsupported snapshot-version"):
+        import_snapshot(
+            io.BytesIO(gzip.compress(b'{"format": "invenio-edugain-idp-snapshot"}\n')),
+        )
+    lines = [json.dumps(header), '{"id": "https://a.org"}', "{"]
+    with pytest.raises(SnapshotError, match="line 3"):
+        import_snapshot(
+            io.BytesIO(gzip.compress("\n".join(lines).encode())),
+            replace=True,
+        )
+
+    assert db.session.get(IdPData, "https://keep.org/idp") is not None
+
+
+def test_cli(base_app: Flask, db: SQLAlchemy, tmp_path: Path):
+    """Export to and import from files."""
+    db.session.add(IdPData(id="https://snap-cli.org/idp", enabled=True, settings={}))
+    db.session.commit()
+    runner = base_app.test_cli_runner()
+    snapshot = tmp_path / "idps.jsonl.gz"
+
+    result = runner.invoke(export_idps, [str(snapshot)])
+    assert result.exit_code == 0, result.output
+    header = json.loads(gzip.decompress(snapshot.read_bytes()).splitlines()[0])
+    assert header["format"] == "invenio-edugain-idp-snapshot"
+
+    db.session.get(IdPData, "https://snap-cli.org/idp").enabled = False
+    db.session.commit()
+    result = runner.invoke(import_idps, [str(snapshot)])
+    assert result.exit_code == 0, result.output
+    db.session.expire_all()
+    assert db.session.get(IdPData, "https://snap-cli.org/idp").enabled
+
+    snapshot.write_bytes(b"garbage")
+    result = runner.invoke(import_idps, [str(snapshot)])
+    assert result.exit_code == 1
+    assert "couldn't import snapshot" in result.output
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2026 Graz University of Technology.
+#
+# invenio-edugain is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Test cached, pre-rendered SP metadata."""
+
+from datetime import UTC, datetime, timedelta
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from saml2 import BINDING_HTTP_POST
+from saml2.md import EntityDescriptor, entity_descriptor_from_string
+
+from invenio_edugain.crypto import IN_PROCESS_CRYPTO_BACKEND, in_process_crypto_backend
+from invenio_edugain.sp_metadata import SPMetadataCache, render_sp_metadata
+
+PKI = Path(__file__).parent / "build_config" / "pki"
+SP_CONFIG = {
+    "crypto_backend": IN_PROCESS_CRYPTO_BACKEND,
+    "entityid": "https://repository.foo.org/saml/sp/xml",
+    "cert_file": str(PKI / "signing.crt"),
+    "key_file": str(PKI / "signing.key"),
+    "service": {
+        "sp": {
+            "endpoints": {
+                "assertion_consumer_service": [
+                    ("https://repository.foo.org/saml/acs", BINDING_HTTP_POST),
+                ],
+            },
+        },
+    },
+}
+
+
+def test_validity_and_signature():
+    """`validUntil` and `cacheDuration` are set, signature verifies after pretty-printing."""
+    rendered = render_sp_metadata(
+        SP_CONFIG,
+        valid_for=timedelta(days=7),
+        cache_duration=timedelta(hours=6),
+        sign=True,
+    )
+    assert rendered.xml.startswith(b"<?xml")
+    assert b"\n  " in rendered.xml  # pretty-printed
+    ed = entity_descriptor_from_string(rendered.xml)
+    assert ed.valid_until == rendered.valid_until.strftime("%Y-%m-%dT%H:%M:%SZ")
+    assert rendered.valid_until == rendered.rendered_at + timedelta(days=7)
+    assert ed.cache_duration == "PT21600S"
+
+    assert in_process_crypto_backend.validate_signature(
+        rendered.xml,
+        str(PKI / "signing.crt"),
+        "pem",
+        f"{EntityDescriptor.c_namespace}:{EntityDescriptor.c_tag}",
+        ed.id,
+    )
+
+
+def test_cache_renders_once_until_stale():
+    """Cache renders once per config and options, and again once half the validity elapsed."""
+    cache = SPMetadataCache()
+    rendered = cache.get(SP_CONFIG, valid_for=timedelta(days=2))
+    assert cache.get(SP_CONFIG, valid_for=timedelta(days=2)) is rendered
+    assert cache.get(dict(SP_CONFIG), valid_for=timedelta(days=2)) is not rendered
+
+    assert not rendered.is_stale(rendered.rendered_at + timedelta(hours=23))
+    assert rendered.is_stale(rendered.rendered_at + timedelta(days=1))
+
+
+def test_conditional_get(base_app: Flask, monkeypatch: pytest.MonkeyPatch):
+    """Responses carry ETag and Cache-Control, matching ETags get a 304."""
+    monkeypatch.setitem(base_app.config, "EDUGAIN_PYSAML2_CONFIG", SP_CONFIG)
+    monkeypatch.setitem(
+        base_app.config,
+        "EDUGAIN_SP_METADATA_CACHE_DURATION",
+        timedelta(hours=1),
+    )
+    client = base_app.test_client()
+
+    response = client.get("/saml/sp/xml")
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "application/xml"
+    assert response.cache_control.public
+    assert response.cache_control.max_age == timedelta(hours=1).total_seconds()
+    assert response.last_modified <= datetime.now(UTC)
+    etag, _ = response.get_etag()
+
+    response = client.get("/saml/sp/xml", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert not response.data